@@ -1,14 +1,16 @@
 from datetime import timedelta
 from typing import List, Optional
 
-from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import Paginator
-from django.db.models import Avg, Count, Q
+from django.db import transaction
+from django.db.models import Avg, Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
 from django.utils import timezone
 from ninja import File, Query, Router, UploadedFile
 from ninja.responses import codes_4xx, codes_5xx
 
-from articles.models import Article, ArticlePDF, Discussion, Reaction, Review
+from articles.models import Article, ArticlePDF, Discussion, Review
 from articles.schemas import (
     ArticleBasicOut,
     ArticleCreateSchema,
@@ -20,10 +22,21 @@ from articles.schemas import (
     OfficialArticleStatsResponse,
     PaginatedArticlesResponse,
 )
+from articles.search import search_articles
+from articles.similarity import similar_articles
 from communities.models import Community, CommunityArticle
+from communities.roles import is_member
+from myapp.cache import cached_response
+from myapp.etag import check_etag, compute_etag
+from myapp.pagination import InvalidCursor, paginate_by_cursor
 from myapp.schemas import FilterType
+from stats.models import DailyStat
+from uploads.models import UploadSession
+from uploads.sessions import UploadError, attach_upload, get_verified_uploads
 from users.auth import JWTAuth, OptionalJWTAuth
-from users.models import Hashtag, HashtagRelation, Notification, User
+from users.hashtags import sync_hashtags
+from users.models import User
+from users.notifications import notify_community
 
 router = Router(tags=["Articles"])
 
@@ -37,42 +50,57 @@ def create_article(
     request,
     details: ArticleCreateSchema,
     image_file: File[UploadedFile] = None,
-    pdf_files: List[UploadedFile] = File(...),
+    pdf_files: List[UploadedFile] = File(None),
 ):
     # Check if the article link is unique
     if details.payload.article_link:
         if Article.objects.filter(article_link=details.payload.article_link).exists():
             return 400, {"message": "This article has already been submitted."}
 
-    # Create the Article instance
-    article = Article.objects.create(
-        title=details.payload.title,
-        abstract=details.payload.abstract,
-        authors=[author.dict() for author in details.payload.authors],
-        article_image_url=image_file,
-        article_link=details.payload.article_link or None,
-        submission_type=details.payload.submission_type,
-        submitter=request.auth,
-    )
+    # The article, its files and the uploads it takes over are saved together,
+    # the locked uploads can't be attached by a concurrent request
+    try:
+        with transaction.atomic():
+            # Files uploaded straight to storage beforehand
+            pdf_uploads = get_verified_uploads(
+                request.auth, UploadSession.ARTICLE_PDF, details.payload.pdf_upload_ids
+            )
+            image_uploads = get_verified_uploads(
+                request.auth,
+                UploadSession.ARTICLE_IMAGE,
+                filter(None, [details.payload.image_upload_id]),
+            )
+            if not pdf_files and not pdf_uploads:
+                return 400, {"message": "At least one PDF file is required."}
+
+            # Create the Article instance
+            article = Article.objects.create(
+                title=details.payload.title,
+                abstract=details.payload.abstract,
+                authors=[author.dict() for author in details.payload.authors],
+                article_image_url=image_file,
+                article_link=details.payload.article_link or None,
+                submission_type=details.payload.submission_type,
+                submitter=request.auth,
+            )
 
-    for file in pdf_files:
-        ArticlePDF.objects.create(article=article, pdf_file_url=file)
-    # Todo: Create a common method to handle the creation of hashtags
-    content_type = ContentType.objects.get_for_model(Article)
-    for hashtag_name in details.payload.keywords:
-        hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name.lower())
-        HashtagRelation.objects.create(
-            hashtag=hashtag, content_type=content_type, object_id=article.id
-        )
+            for file in pdf_files or []:
+                ArticlePDF.objects.create(article=article, pdf_file_url=file)
+            for upload in pdf_uploads + image_uploads:
+                attach_upload(upload, article)
+            sync_hashtags(article, details.payload.keywords)
 
-    if details.payload.community_name:
-        community = Community.objects.get(name=details.payload.community_name)
-        CommunityArticle.objects.create(article=article, community=community)
+            community = None
+            if details.payload.community_name:
+                community = Community.objects.get(name=details.payload.community_name)
+                CommunityArticle.objects.create(article=article, community=community)
+    except UploadError as e:
+        return 400, {"message": str(e)}
 
-        # Send notification to the community admin
-        Notification.objects.create(
-            user=community.admins.first(),
-            community=community,
+    if community:
+        # Send notification to the community admins
+        notify_community(
+            community,
             category="communities",
             notification_type="article_submitted",
             message=(
@@ -91,7 +119,12 @@ def create_article(
     response={200: ArticleOut, codes_4xx: Message, codes_5xx: Message},
     auth=JWTAuth(),
 )
-def get_article(request, article_slug: str, community_name: Optional[str] = None):
+def get_article(
+    request,
+    response: HttpResponse,
+    article_slug: str,
+    community_name: Optional[str] = None,
+):
     article = Article.objects.get(slug=article_slug)
 
     # Check submission type and user's access
@@ -111,7 +144,7 @@ def get_article(request, article_slug: str, community_name: Optional[str] = None
             return 403, {"message": "This article is not available in this community."}
 
         if community.type == "hidden":
-            if request.auth not in community.members.all():
+            if not is_member(request, community):
                 return 403, {
                     "message": (
                         "You don't have access to this article in this community."
@@ -119,6 +152,20 @@ def get_article(request, article_slug: str, community_name: Optional[str] = None
                     )
                 }
 
+    etag = compute_etag(
+        "article",
+        [
+            article.pk,
+            article.updated_at,
+            *[getattr(article, field) for field in Article.COUNTER_FIELDS],
+        ],
+        ["articles", "users"],
+        request.auth,
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
     # Use the custom method to create the ArticleOut instance
     article_data = ArticleOut.from_orm_with_custom_fields(article, request.auth)
 
@@ -150,15 +197,7 @@ def update_article(
     article.faqs = [faq.dict() for faq in details.payload.faqs]
 
     # Update Keywords
-    content_type = ContentType.objects.get_for_model(Article)
-    HashtagRelation.objects.filter(
-        content_type=content_type, object_id=article.id
-    ).delete()
-    for hashtag_name in details.payload.keywords:
-        hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name.lower())
-        HashtagRelation.objects.create(
-            hashtag=hashtag, content_type=content_type, object_id=article.id
-        )
+    sync_hashtags(article, details.payload.keywords)
 
     # Only update the image and pdf file if a new file is uploaded
     if image_file:
@@ -176,6 +215,7 @@ def update_article(
     summary="Get Public Articles",
     auth=OptionalJWTAuth,
 )
+@cached_response("articles", families=["articles", "communities"])
 def get_articles(
     request,
     community_id: Optional[int] = None,
@@ -184,6 +224,7 @@ def get_articles(
     rating: Optional[int] = None,
     page: int = 1,
     per_page: int = 10,
+    cursor: Optional[str] = None,
 ):
     # Start with all public articles
     articles = Article.objects.filter(submission_type="Public").order_by("-created_at")
@@ -206,9 +247,7 @@ def get_articles(
 
         # If the community is hidden and the user is not a member,
         # return an empty queryset
-        if community.type == "hidden" and (
-            not current_user or not community.is_member(current_user)
-        ):
+        if community.type == "hidden" and not is_member(request, community):
             return 400, {"message": "You don't have access to this community."}
     else:
         # Just do not display articles that belong to hidden communities
@@ -217,7 +256,7 @@ def get_articles(
         )
 
     if search:
-        articles = articles.filter(title__icontains=search)
+        articles = search_articles(articles, search)
 
     # Todo: Add rating field to the Article model
     # if rating:
@@ -226,24 +265,37 @@ def get_articles(
     if sort:
         if sort == "latest":
             articles = articles.order_by("-created_at")
-        # Todo: Implement sorting by popularity
-        # elif sort == "popular":
-        #     articles = articles.order_by("-popularity")
+        elif sort == "popular":
+            articles = articles.order_by("-hot_score", "-id")
         elif sort == "older":
             articles = articles.order_by("created_at")
+    elif search:
+        articles = articles.order_by("-search_rank", "-created_at")
     else:
         articles = articles.order_by("-created_at")  # Default sort by latest
 
-    paginator = Paginator(articles, per_page)
-    paginated_articles = paginator.get_page(page)
-
     current_user: Optional[User] = None if not request.auth else request.auth
 
+    if cursor is not None:
+        try:
+            cursor_page = paginate_by_cursor(
+                articles.select_related("submitter"), cursor, per_page
+            )
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+
+        return PaginatedArticlesResponse(
+            items=ArticleOut.from_queryset_batch(cursor_page.items, current_user),
+            per_page=per_page,
+            next_cursor=cursor_page.next_cursor,
+            prev_cursor=cursor_page.prev_cursor,
+        )
+
+    paginator = Paginator(articles.select_related("submitter"), per_page)
+    paginated_articles = paginator.get_page(page)
+
     return PaginatedArticlesResponse(
-        items=[
-            ArticleOut.from_orm_with_custom_fields(article, current_user)
-            for article in paginated_articles
-        ],
+        items=ArticleOut.from_queryset_batch(paginated_articles, current_user),
         total=paginator.count,
         page=page,
         per_page=per_page,
@@ -280,158 +332,140 @@ Article Stats Endpoints
     response={200: OfficialArticleStatsResponse, 400: Message},
     auth=JWTAuth(),
 )
-def get_official_article_stats(request, article_slug: str):
-    article = Article.objects.get(slug=article_slug)
-
-    # Get discussions count
-    discussions_count = Discussion.objects.filter(article=article).count()
-
-    # Get likes count
-    likes_count = Reaction.objects.filter(
-        content_type__model="article", object_id=article.id, vote=Reaction.LIKE
-    ).count()
-
-    # Get reviews count
-    reviews_count = Review.objects.filter(article=article).count()
+def get_official_article_stats(
+    request, article_slug: str, days: int = Query(7, ge=1, le=90)
+):
+    # Get the article along with its average rating
+    article = (
+        Article.objects.select_related("submitter")
+        .annotate(
+            average_rating=_aggregate_subquery(
+                Review.objects.filter(article=OuterRef("pk")), Avg("rating")
+            )
+        )
+        .get(slug=article_slug)
+    )
 
     # Get recent reviews
     recent_reviews = Review.objects.filter(article=article).order_by("-created_at")[:3]
 
-    # Get reviews over time (last 7 days)
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=6)
-    reviews_over_time = (
-        Review.objects.filter(
-            article=article, created_at__date__range=[start_date, end_date]
-        )
-        .values("created_at__date")
-        .annotate(count=Count("id"))
-        .order_by("created_at__date")
-    )
-
-    # Get likes over time (last 7 days)
-    likes_over_time = (
-        Reaction.objects.filter(
-            content_type__model="article",
-            object_id=article.id,
-            vote=Reaction.LIKE,
-            created_at__date__range=[start_date, end_date],
-        )
-        .values("created_at__date")
-        .annotate(count=Count("id"))
-        .order_by("created_at__date")
+    # Get reviews and likes over time from the daily rollups
+    start_date = timezone.localdate() - timedelta(days=days - 1)
+    series = DailyStat.get_series(
+        Article, article.id, [DailyStat.REVIEWS, DailyStat.LIKES], start_date
     )
 
-    # Get average rating
-    average_rating = Review.objects.filter(article=article).aggregate(Avg("rating"))[
-        "rating__avg"
-    ]
-
     return {
         "title": article.title,
         "submission_date": article.created_at,
         "submitter": article.submitter.username,
-        "discussions": discussions_count,
-        "likes": likes_count,
-        "reviews_count": reviews_count,
+        "discussions": article.discussions_count,
+        "likes": article.likes_count,
+        "reviews_count": article.reviews_count,
         "recent_reviews": [
             {"excerpt": review.content[:100], "date": review.created_at}
             for review in recent_reviews
         ],
-        "reviews_over_time": [
-            {"date": item["created_at__date"], "count": item["count"]}
-            for item in reviews_over_time
-        ],
-        "likes_over_time": [
-            {"date": item["created_at__date"], "count": item["count"]}
-            for item in likes_over_time
-        ],
-        "average_rating": average_rating or 0,
+        "reviews_over_time": _date_counts(series[DailyStat.REVIEWS]),
+        "likes_over_time": _date_counts(series[DailyStat.LIKES]),
+        "average_rating": article.average_rating or 0,
     }
 
 
+def _date_counts(daily):
+    return [{"date": day, "count": count} for day, count in sorted(daily.items())]
+
+
+def _scoped_review_stats(article, community):
+    """
+    Correlated number of reviews and discussions of `article` made within
+    `community` (None for none), and the average rating of those reviews.
+    """
+    reviews = Review.objects.filter(article=article, community=community)
+    discussions = Discussion.objects.filter(article=article, community=community)
+    return {
+        "scoped_reviews_count": _aggregate_subquery(reviews, Count("*"), 0),
+        "scoped_average_rating": _aggregate_subquery(reviews, Avg("rating")),
+        "scoped_discussions_count": _aggregate_subquery(discussions, Count("*"), 0),
+    }
+
+
+def _aggregate_subquery(queryset, aggregate, default=None):
+    value = Subquery(
+        queryset.order_by().values("article").annotate(value=aggregate).values("value")
+    )
+    return value if default is None else Coalesce(value, default)
+
+
 @router.get(
     "/article/{article_slug}/community-stats",
     response={200: CommunityArticleStatsResponse, 400: Message},
     auth=JWTAuth(),
 )
-def get_community_article_stats(request, article_slug: str):
-    article = Article.objects.get(slug=article_slug)
-
-    try:
-        community_article = CommunityArticle.objects.get(article=article)
+def get_community_article_stats(
+    request, article_slug: str, days: int = Query(7, ge=1, le=90)
+):
+    # Get the article, its community and the scalar stats in one query
+    community_article = (
+        CommunityArticle.objects.select_related("community", "article__submitter")
+        .annotate(**_scoped_review_stats(OuterRef("article"), OuterRef("community")))
+        .filter(article__slug=article_slug)
+        .first()
+    )
+    if community_article is not None:
+        article = community_article.article
         community = community_article.community
         submission_date = community_article.submitted_at
         community_name = community.name  # Assuming Community model has a 'name' field
-    except CommunityArticle.DoesNotExist:
+        scoped = community_article
+    else:
+        article = (
+            Article.objects.select_related("submitter")
+            .annotate(**_scoped_review_stats(OuterRef("pk"), None))
+            .get(slug=article_slug)
+        )
         community = None
         submission_date = article.created_at
         community_name = None
+        scoped = article
 
-    # Get discussions count
-    discussions_count = Discussion.objects.filter(
-        article=article, community=community
-    ).count()
-
-    # Get likes count
-    likes_count = Reaction.objects.filter(
-        content_type__model="article", object_id=article.id, vote=Reaction.LIKE
-    ).count()
-
-    # Get reviews count and data
     reviews = Review.objects.filter(article=article, community=community)
-    reviews_count = reviews.count()
 
     # Get recent reviews
     recent_reviews = reviews.order_by("-created_at")[:3]
 
-    # Get reviews over time (last 7 days)
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=6)
-    reviews_over_time = (
-        reviews.filter(created_at__date__range=[start_date, end_date])
-        .values("created_at__date")
-        .annotate(count=Count("id"))
-        .order_by("created_at__date")
-    )
-
-    # Get likes over time (last 7 days)
-    likes_over_time = (
-        Reaction.objects.filter(
-            content_type__model="article",
-            object_id=article.id,
-            vote=Reaction.LIKE,
-            created_at__date__range=[start_date, end_date],
-        )
-        .values("created_at__date")
-        .annotate(count=Count("id"))
-        .order_by("created_at__date")
+    # Get reviews and likes over time from the daily rollups
+    start_date = timezone.localdate() - timedelta(days=days - 1)
+    series = DailyStat.get_series(
+        Article,
+        article.id,
+        [DailyStat.REVIEWS, DailyStat.COMMUNITY_REVIEWS, DailyStat.LIKES],
+        start_date,
     )
-
-    # Get average rating
-    average_rating = reviews.aggregate(Avg("rating"))["rating__avg"]
+    reviews_over_time = series[DailyStat.COMMUNITY_REVIEWS]
+    if community is None:
+        # Reviews made outside of any community
+        reviews_over_time = {
+            day: count - reviews_over_time.get(day, 0)
+            for day, count in series[DailyStat.REVIEWS].items()
+            if count > reviews_over_time.get(day, 0)
+        }
 
     return {
         "title": article.title,
         "submission_date": submission_date,
         "submitter": article.submitter.username,
         "community_name": community_name,
-        "discussions": discussions_count,
-        "likes": likes_count,
-        "reviews_count": reviews_count,
+        "discussions": scoped.scoped_discussions_count,
+        "likes": article.likes_count,
+        "reviews_count": scoped.scoped_reviews_count,
         "recent_reviews": [
             {"excerpt": review.content[:100], "date": review.created_at}
             for review in recent_reviews
         ],
-        "reviews_over_time": [
-            {"date": item["created_at__date"], "count": item["count"]}
-            for item in reviews_over_time
-        ],
-        "likes_over_time": [
-            {"date": item["created_at__date"], "count": item["count"]}
-            for item in likes_over_time
-        ],
-        "average_rating": average_rating or 0,
+        "reviews_over_time": _date_counts(reviews_over_time),
+        "likes_over_time": _date_counts(series[DailyStat.LIKES]),
+        "average_rating": scoped.scoped_average_rating or 0,
     }
 
 
@@ -448,23 +482,14 @@ Relevant Articles Endpoint
 def get_relevant_articles(
     request, article_id: int, filters: ArticleFilters = Query(...)
 ):
-    base_article = Article.objects.get(id=article_id)
-
-    # Get hashtags of the base article
-    base_hashtags = base_article.hashtags.values_list("hashtag_id", flat=True)
+    # Unknown articles are a 404
+    Article.objects.only("id").get(id=article_id)
 
-    # Query for relevant articles
-    queryset = Article.objects.exclude(id=article_id).exclude(
+    # Neighbours by shared hashtags, precomputed in articles/similarity.py
+    queryset = similar_articles(article_id).exclude(
         communityarticle__community__type="hidden"
     )
 
-    # Calculate relevance score based on shared hashtags
-    queryset = queryset.annotate(
-        relevance_score=Count(
-            "hashtags", filter=Q(hashtags__hashtag_id__in=base_hashtags)
-        )
-    ).filter(relevance_score__gt=0)
-
     if filters.community_id:
         queryset = queryset.filter(
             communityarticle__community_id=filters.community_id,
@@ -472,13 +497,10 @@ def get_relevant_articles(
         )
 
     if filters.filter_type == FilterType.POPULAR:
-        queryset = queryset.annotate(
-            popularity_score=Count("reviews") + Count("discussions")
-        ).order_by("-popularity_score", "-relevance_score")
+        queryset = queryset.order_by("-hot_score", "-relevance_score")
     elif filters.filter_type == FilterType.RECENT:
         queryset = queryset.order_by("-created_at", "-relevance_score")
-    else:  # "relevant" is the default
-        queryset = queryset.order_by("-relevance_score", "-created_at")
+    # "relevant" is the default ordering of `similar_articles`
 
     articles = queryset[filters.offset : filters.offset + filters.limit]
 
@@ -1,6 +1,7 @@
 from typing import List, Optional
 
 from django.core.paginator import Paginator
+from django.http import HttpResponse
 from ninja import Router
 from ninja.responses import codes_4xx
 
@@ -14,6 +15,10 @@ from articles.schemas import (
     PaginatedDiscussionSchema,
 )
 from communities.models import Community
+from communities.roles import is_member
+from myapp.etag import check_etag, compute_etag
+from myapp.pagination import InvalidCursor, paginate_by_cursor
+from myapp.resolvers import get_content_type_id
 from myapp.schemas import Message
 from users.auth import JWTAuth, OptionalJWTAuth
 from users.models import User
@@ -44,7 +49,7 @@ def create_discussion(
 
     if community_id:
         community = Community.objects.get(id=community_id)
-        if not community.is_member(user):
+        if not is_member(request, community):
             return 403, {"message": "You are not a member of this community."}
 
     discussion = Discussion.objects.create(
@@ -63,11 +68,16 @@ def create_discussion(
 
 @router.get(
     "/{article_id}/discussions/",
-    response={200: PaginatedDiscussionSchema, 404: Message, 500: Message},
+    response={200: PaginatedDiscussionSchema, 400: Message, 404: Message, 500: Message},
     auth=OptionalJWTAuth,
 )
 def list_discussions(
-    request, article_id: int, community_id: int = None, page: int = 1, size: int = 10
+    request,
+    article_id: int,
+    community_id: int = None,
+    page: int = 1,
+    size: int = 10,
+    cursor: Optional[str] = None,
 ):
     article = Article.objects.get(id=article_id)
     discussions = Discussion.objects.filter(article=article).order_by("-created_at")
@@ -75,16 +85,32 @@ def list_discussions(
     if community_id:
         community = Community.objects.get(id=community_id)
         # if the community is hidden, only members can view reviews
-        if not community.is_member(request.auth) and community.type == "hidden":
+        if not is_member(request, community) and community.type == "hidden":
             return 403, {"message": "You are not a member of this community."}
 
         discussions = discussions.filter(community=community)
     else:
         discussions = discussions.filter(community=None)
 
+    current_user: Optional[User] = None if not request.auth else request.auth
+
+    if cursor is not None:
+        try:
+            cursor_page = paginate_by_cursor(discussions, cursor, size)
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+
+        return PaginatedDiscussionSchema(
+            items=[
+                DiscussionOut.from_orm(item, current_user) for item in cursor_page.items
+            ],
+            per_page=size,
+            next_cursor=cursor_page.next_cursor,
+            prev_cursor=cursor_page.prev_cursor,
+        )
+
     paginator = Paginator(discussions, size)
     page_obj = paginator.page(page)
-    current_user: Optional[User] = None if not request.auth else request.auth
 
     items = [
         DiscussionOut.from_orm(review, current_user) for review in page_obj.object_list
@@ -100,13 +126,23 @@ def list_discussions(
     response={200: DiscussionOut, 404: Message, 500: Message},
     auth=OptionalJWTAuth,
 )
-def get_discussion(request, discussion_id: int):
+def get_discussion(request, response: HttpResponse, discussion_id: int):
     discussion = Discussion.objects.get(id=discussion_id)
     user = request.auth
 
-    if discussion.community and not discussion.community.is_member(user):
+    if discussion.community and not is_member(request, discussion.community):
         return 403, {"message": "You are not a member of this community."}
 
+    etag = compute_etag(
+        "discussion",
+        [discussion.pk, discussion.updated_at],
+        ["articles", "users"],
+        user,
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
     return 200, DiscussionOut.from_orm(discussion, user)
 
 
@@ -125,7 +161,7 @@ def update_discussion(
     if discussion.author != user:
         return 403, {"message": "You do not have permission to update this review."}
 
-    if discussion.community and not discussion.community.is_member(user):
+    if discussion.community and not is_member(request, discussion.community):
         return 403, {"message": "You are not a member of this community."}
 
     # Update the review with new data if provided
@@ -148,7 +184,7 @@ def delete_discussion(request, discussion_id: int):
     if discussion.author != user:
         return 403, {"message": "You do not have permission to delete this review."}
 
-    if discussion.community and not discussion.community.is_member(user):
+    if discussion.community and not is_member(request, discussion.community):
         return 403, {"message": "You are not a member of this community."}
 
     discussion.topic = "[deleted]"
@@ -173,7 +209,7 @@ def create_comment(request, discussion_id: int, payload: DiscussionCommentCreate
     user = request.auth
     discussion = Discussion.objects.get(id=discussion_id)
 
-    if discussion.community and not discussion.community.is_member(user):
+    if discussion.community and not is_member(request, discussion.community):
         return 403, {"message": "You are not a member of this community."}
 
     parent_comment = None
@@ -210,7 +246,7 @@ def get_comment(request, comment_id: int):
 
     if (
         comment.discussion.community
-        and not comment.discussion.community.is_member(current_user)
+        and not is_member(request, comment.discussion.community)
         and comment.discussion.community.type == "hidden"
     ):
         return 403, {"message": "You are not a member of this community."}
@@ -231,22 +267,17 @@ def list_discussion_comments(
 
     if (
         discussion.community
-        and not discussion.community.is_member(current_user)
+        and not is_member(request, discussion.community)
         and discussion.community.type == "hidden"
     ):
         return 403, {"message": "You are not a member of this community."}
 
-    comments = (
-        DiscussionComment.objects.filter(discussion=discussion, parent=None)
-        .select_related("author")
-        .order_by("-created_at")
+    return DiscussionCommentOut.from_thread(
+        DiscussionComment.objects.filter(discussion=discussion),
+        current_user,
+        newest_first=True,
     )
 
-    return [
-        DiscussionCommentOut.from_orm_with_replies(comment, current_user)
-        for comment in comments
-    ]
-
 
 @router.put(
     "/discussions/comments/{comment_id}/",
@@ -259,8 +290,8 @@ def update_comment(request, comment_id: int, payload: DiscussionCommentUpdateSch
     if comment.author != request.auth:
         return 403, {"message": "You do not have permission to update this comment."}
 
-    if comment.discussion.community and not comment.discussion.community.is_member(
-        request.auth
+    if comment.discussion.community and not is_member(
+        request, comment.discussion.community
     ):
         return 403, {"message": "You are not a member of this community."}
 
@@ -286,7 +317,7 @@ def delete_comment(request, comment_id: int):
 
     # Delete reactions associated with the comment
     Reaction.objects.filter(
-        content_type__model="discussioncomment", object_id=comment.id
+        content_type_id=get_content_type_id(DiscussionComment), object_id=comment.id
     ).delete()
 
     # Logically delete the comment by clearing its content and marking it as deleted
@@ -0,0 +1,94 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from articles.models import Article
+from posts.models import Post
+from tasks.models import PeriodicRun
+
+# Scores decayed below this are dropped to zero, so that old rows leave the
+# set of rows touched by every run
+HOT_SCORE_FLOOR = 0.01
+
+DECAY_RUN_NAME = "decay_hot_scores"
+
+
+class Command(BaseCommand):
+    help = (
+        "Decay the hot scores of articles and posts by the time elapsed since "
+        "the previous run. Meant to be run every hour."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=float,
+            help=(
+                "Hours to decay the scores by, instead of the time elapsed "
+                "since the previous run."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows updated per UPDATE statement.",
+        )
+
+    def handle(self, *args, **options):
+        hours = self.claim_elapsed_hours(options["hours"])
+        factor = 0.5 ** (hours / settings.HOT_SCORE_HALF_LIFE_HOURS)
+        for model in (Article, Post):
+            decayed = self.decay(model, factor, options["batch_size"])
+            name = model._meta.verbose_name_plural
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Decayed the hot score of {decayed} {name} by {hours:.2f} hours."
+                )
+            )
+
+    def claim_elapsed_hours(self, hours: Optional[float]) -> float:
+        """
+        Record this run and return the hours elapsed since the previous one,
+        so that late or missed runs still decay scores by the wall-clock time
+        that removals assume. The row lock keeps overlapping runs from
+        decaying the same hours twice.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            run, created = PeriodicRun.objects.select_for_update().get_or_create(
+                name=DECAY_RUN_NAME, defaults={"last_run_at": now}
+            )
+            if hours is None:
+                # The first run has nothing to catch up on beyond its schedule
+                elapsed = (now - run.last_run_at).total_seconds() / 3600
+                hours = 1 if created else elapsed
+            run.last_run_at = now
+            run.save(update_fields=["last_run_at"])
+        return hours
+
+    def decay(self, model, factor: float, batch_size: int) -> int:
+        decayed = 0
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects.filter(id__gt=last_id, hot_score__gt=0)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                decayed += model.objects.filter(id__in=ids).update(
+                    hot_score=Case(
+                        When(hot_score__lt=HOT_SCORE_FLOOR / factor, then=Value(0.0)),
+                        default=F("hot_score") * factor,
+                    )
+                )
+            last_id = ids[-1]
+        return decayed
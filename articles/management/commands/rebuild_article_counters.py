@@ -0,0 +1,76 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from articles.models import Article, Discussion, Reaction, Review, ReviewComment
+
+
+def count_subquery(queryset, group_by: str):
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(count=Count("*"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized engagement counters of every article."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of articles updated per UPDATE statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        content_type = ContentType.objects.get_for_model(Article)
+        reactions = Reaction.objects.filter(
+            content_type=content_type, object_id=OuterRef("pk")
+        )
+        counters = {
+            "reviews_count": count_subquery(
+                Review.objects.filter(article=OuterRef("pk")), "article"
+            ),
+            "discussions_count": count_subquery(
+                Discussion.objects.filter(article=OuterRef("pk")), "article"
+            ),
+            "comments_count": count_subquery(
+                ReviewComment.objects.filter(review__article=OuterRef("pk")),
+                "review__article",
+            ),
+            "likes_count": count_subquery(
+                reactions.filter(vote=Reaction.LIKE), "object_id"
+            ),
+            "dislikes_count": count_subquery(
+                reactions.filter(vote=Reaction.DISLIKE), "object_id"
+            ),
+        }
+
+        updated = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Article.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                updated += Article.objects.filter(id__in=ids).update(**counters)
+            last_id = ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt engagement counters for {updated} articles.")
+        )
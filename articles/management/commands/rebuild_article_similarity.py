@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from articles.similarity import rebuild_similarities
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed hashtag neighbours of every article."
+
+    def handle(self, *args, **options):
+        stored = rebuild_similarities()
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} article neighbours."))
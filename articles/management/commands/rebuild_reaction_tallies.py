@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from articles.models import Reaction, ReactionTally
+
+
+class Command(BaseCommand):
+    help = "Recompute the like/dislike tallies of every reacted object."
+
+    def handle(self, *args, **options):
+        rows = (
+            Reaction.objects.order_by()
+            .values("content_type_id", "object_id")
+            .annotate(
+                likes_count=Count("id", filter=Q(vote=Reaction.LIKE)),
+                dislikes_count=Count("id", filter=Q(vote=Reaction.DISLIKE)),
+            )
+        )
+
+        with transaction.atomic():
+            ReactionTally.objects.all().delete()
+            tallies = ReactionTally.objects.bulk_create(
+                (ReactionTally(**row) for row in rows.iterator()), batch_size=1000
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt reaction tallies for {len(tallies)} objects.")
+        )
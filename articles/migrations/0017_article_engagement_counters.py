@@ -0,0 +1,75 @@
+# Generated by Django 5.0.14 on 2026-10-16 23:36
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, group_by):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_by).annotate(count=Count('*')).values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Review = apps.get_model('articles', 'Review')
+    Discussion = apps.get_model('articles', 'Discussion')
+    ReviewComment = apps.get_model('articles', 'ReviewComment')
+    Reaction = apps.get_model('articles', 'Reaction')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    content_type = ContentType.objects.filter(app_label='articles', model='article').first()
+    if content_type is None:
+        return
+
+    reactions = Reaction.objects.filter(content_type=content_type, object_id=OuterRef('pk'))
+    Article.objects.update(
+        reviews_count=count_subquery(Review.objects.filter(article=OuterRef('pk')), 'article'),
+        discussions_count=count_subquery(Discussion.objects.filter(article=OuterRef('pk')), 'article'),
+        comments_count=count_subquery(
+            ReviewComment.objects.filter(review__article=OuterRef('pk')), 'review__article'
+        ),
+        likes_count=count_subquery(reactions.filter(vote=1), 'object_id'),
+        dislikes_count=count_subquery(reactions.filter(vote=-1), 'object_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0016_alter_article_article_link'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='discussions_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-16 23:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_tallies(apps, schema_editor):
+    Reaction = apps.get_model('articles', 'Reaction')
+    ReactionTally = apps.get_model('articles', 'ReactionTally')
+
+    rows = (
+        Reaction.objects.order_by()
+        .values('content_type_id', 'object_id')
+        .annotate(likes_count=Count('id', filter=Q(vote=1)), dislikes_count=Count('id', filter=Q(vote=-1)))
+    )
+    ReactionTally.objects.bulk_create((ReactionTally(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0017_article_engagement_counters'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReactionTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('likes_count', models.PositiveIntegerField(default=0)),
+                ('dislikes_count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(backfill_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.14 on 2026-10-16 23:43
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, JSONField, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Cast
+
+
+def backfill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    Article = apps.get_model('articles', 'Article')
+    HashtagRelation = apps.get_model('users', 'HashtagRelation')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    content_type = ContentType.objects.filter(app_label='articles', model='article').first()
+    keywords = Subquery(
+        HashtagRelation.objects.filter(content_type=content_type, object_id=OuterRef('pk'))
+        .order_by()
+        .values('object_id')
+        .annotate(names=StringAgg('hashtag__name', ' '))
+        .values('names')
+    )
+    authors = Cast(
+        Func(F('authors'), Value('$[*].label'), function='jsonb_path_query_array', output_field=JSONField()),
+        TextField(),
+    )
+    Article.objects.update(
+        search_vector=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector(keywords, weight='B', config='english')
+            + SearchVector(authors, weight='C', config='english')
+            + SearchVector('abstract', weight='D', config='english')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0018_reactiontally'),
+        ('users', '0012_alter_notification_notification_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_gin'),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
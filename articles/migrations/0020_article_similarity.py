@@ -0,0 +1,82 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of articles.similarity as of this migration, so that later
+# changes to that module can't break migrating a fresh database
+SIMILARITY_TOP_K = 50
+BLOCK_SIZE = 1000
+
+
+def backfill_similarities(apps, schema_editor):
+    import numpy as np
+    from scipy import sparse
+
+    Article = apps.get_model('articles', 'Article')
+    ArticleSimilarity = apps.get_model('articles', 'ArticleSimilarity')
+    HashtagRelation = apps.get_model('users', 'HashtagRelation')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    content_type = ContentType.objects.filter(app_label='articles', model='article').first()
+    pairs = HashtagRelation.objects.filter(
+        content_type=content_type, object_id__in=Article.objects.values('id')
+    ).values_list('object_id', 'hashtag_id')
+
+    # Article x hashtag incidence matrix
+    pairs = np.array(list(pairs.iterator()), dtype=np.int64).reshape(-1, 2)
+    article_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    hashtag_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(article_ids), len(hashtag_ids)),
+    )
+    matrix.data[:] = 1
+    sizes = np.asarray(matrix.sum(axis=1)).ravel()
+
+    # Jaccard index with every article sharing a hashtag, best SIMILARITY_TOP_K kept
+    for start in range(0, len(article_ids), BLOCK_SIZE):
+        block = np.arange(start, min(start + BLOCK_SIZE, len(article_ids)))
+        shared = (matrix[block] @ matrix.T).tocsr()
+        similarities = []
+        for offset, row in enumerate(block):
+            begin, end = shared.indptr[offset], shared.indptr[offset + 1]
+            neighbours, common = shared.indices[begin:end], shared.data[begin:end]
+            keep = neighbours != row
+            neighbours, common = neighbours[keep], common[keep]
+            scores = common / (sizes[row] + sizes[neighbours] - common)
+            if len(scores) > SIMILARITY_TOP_K:
+                best = np.argpartition(-scores, SIMILARITY_TOP_K)[:SIMILARITY_TOP_K]
+                neighbours, scores = neighbours[best], scores[best]
+            similarities.extend(
+                ArticleSimilarity(article_id=int(article_ids[row]), neighbour_id=int(article_ids[column]), score=float(score))
+                for column, score in zip(neighbours, scores)
+            )
+        ArticleSimilarity.objects.bulk_create(similarities, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0019_article_search_vector'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('users', '0008_alter_hashtag_unique_together_alter_hashtag_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='articles.article')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='articles.article')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['article', '-score'], name='article_similarity_score')],
+                'unique_together': {('article', 'neighbour')},
+            },
+        ),
+        migrations.RunPython(backfill_similarities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:19
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Discussion = apps.get_model('articles', 'Discussion')
+    DiscussionComment = apps.get_model('articles', 'DiscussionComment')
+    Reaction = apps.get_model('articles', 'Reaction')
+    Review = apps.get_model('articles', 'Review')
+    ReviewComment = apps.get_model('articles', 'ReviewComment')
+
+    # Frozen copy of HOT_SCORE_WEIGHTS
+    now = timezone.now()
+    half_life = settings.HOT_SCORE_HALF_LIFE_HOURS * 3600
+    scores = defaultdict(float)
+
+    def add(weight, rows):
+        for article_id, created_at in rows.iterator():
+            scores[article_id] += weight * 0.5 ** (max((now - created_at).total_seconds(), 0) / half_life)
+
+    content_type = ContentType.objects.filter(app_label='articles', model='article').first()
+    if content_type is not None:
+        add(1.0, Reaction.objects.filter(content_type=content_type, vote=1).values_list('object_id', 'created_at'))
+    add(3.0, Review.objects.values_list('article_id', 'created_at'))
+    add(2.0, Discussion.objects.values_list('article_id', 'created_at'))
+    add(1.0, ReviewComment.objects.values_list('review__article_id', 'created_at'))
+    add(1.0, DiscussionComment.objects.values_list('discussion__article_id', 'created_at'))
+
+    articles = [Article(pk=article_id, hot_score=score) for article_id, score in scores.items()]
+    Article.objects.bulk_update(articles, ['hot_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0020_article_similarity'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-hot_score', '-id'], name='article_hot_score'),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
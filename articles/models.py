@@ -1,14 +1,48 @@
+import copy
 import random
 import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Optional
 
+from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models
+from django.db.models import F, Func, JSONField, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Cast, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 from faker import Faker
 
-from users.models import HashtagRelation, User
+from myapp.cache import bump_cache_version
+from stats.models import DailyStat
+from tasks.queue import enqueue
+from users.models import HashtagRelation, User, hashtags_synced
+
+SEARCH_CONFIG = "english"
+
+# Worth of an engagement event in the hot score of articles and posts. Hot
+# scores halve every HOT_SCORE_HALF_LIFE_HOURS, see `decay_hot_scores`.
+HOT_SCORE_WEIGHTS = {"like": 1.0, "comment": 1.0, "discussion": 2.0, "review": 3.0}
+
+
+def hot_score_weight(event: str, happened_at: Optional[datetime] = None) -> float:
+    """
+    Current worth of an engagement `event`, decayed since `happened_at` so
+    that it can be taken back out of a hot score. Fresh events are worth
+    their full weight.
+    """
+    weight = HOT_SCORE_WEIGHTS[event]
+    if happened_at is None:
+        return weight
+    hours = max((timezone.now() - happened_at).total_seconds(), 0) / 3600
+    return weight * 0.5 ** (hours / settings.HOT_SCORE_HALF_LIFE_HOURS)
 
 
 class Article(models.Model):
@@ -31,8 +65,41 @@ class Article(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized engagement counters, kept in sync by the signal handlers
+    # at the bottom of this module and rebuilt by `rebuild_article_counters`
+    reviews_count = models.PositiveIntegerField(default=0)
+    discussions_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    dislikes_count = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = (
+        "reviews_count",
+        "discussions_count",
+        "comments_count",
+        "likes_count",
+        "dislikes_count",
+    )
+
+    # Time-decayed engagement, see HOT_SCORE_WEIGHTS
+    hot_score = models.FloatField(default=0)
+
+    # Weighted full-text document (title A, keywords B, authors C, abstract D),
+    # only maintained on PostgreSQL by `update_search_vectors`
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Columns derived from other rows which `save()` never writes back
+    DERIVED_FIELDS = COUNTER_FIELDS + ("hot_score", "search_vector")
+    SEARCHABLE_FIELDS = ("title", "abstract", "authors")
+
     hashtags = GenericRelation(HashtagRelation, related_query_name="articles")
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="article_search_vector_gin"),
+            models.Index(fields=["-hot_score", "-id"], name="article_hot_score"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
@@ -40,8 +107,105 @@ class Article(models.Model):
             while Article.objects.filter(slug=self.slug).exists():
                 unique_id = uuid.uuid4().hex[:8]  # Generate a short unique ID
                 self.slug = f"{original_slug}-{unique_id}"
+
+        # Never write the derived columns back from a possibly stale instance,
+        # they are only changed through UPDATE expressions.
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            search_changed = bool(set(update_fields) & set(self.SEARCHABLE_FIELDS))
+        else:
+            search_changed = self._state.adding or self._searchable_fields_changed()
+            if not self._state.adding:
+                kwargs["update_fields"] = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.DERIVED_FIELDS
+                ]
         super(Article, self).save(*args, **kwargs)
 
+        if search_changed:
+            Article.update_search_vectors(Q(pk=self.pk))
+        self._loaded_searchable = self._searchable_values()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the searchable fields, so that saves which leave them
+        # alone skip rebuilding the search vector
+        instance._loaded_searchable = instance._searchable_values()
+        return instance
+
+    def _searchable_values(self) -> Dict[str, object]:
+        # Deferred fields are left out, `authors` is copied as lists are
+        # edited in place
+        return {
+            name: copy.deepcopy(self.__dict__[name])
+            for name in self.SEARCHABLE_FIELDS
+            if name in self.__dict__
+        }
+
+    def _searchable_fields_changed(self) -> bool:
+        loaded = getattr(self, "_loaded_searchable", None)
+        if loaded is None:
+            return True
+        return any(
+            name in self.__dict__
+            and (name not in loaded or loaded[name] != self.__dict__[name])
+            for name in self.SEARCHABLE_FIELDS
+        )
+
+    @staticmethod
+    def update_counters(article_filter: Q, **deltas: float) -> None:
+        """
+        Atomically shift counters of the matching articles, e.g.
+        `Article.update_counters(Q(pk=1), reviews_count=1)`.
+        """
+        Article.objects.filter(article_filter).update(
+            **{
+                field: Greatest(F(field) + delta, 0)
+                for field, delta in deltas.items()
+                if delta
+            }
+        )
+
+    @staticmethod
+    def update_search_vectors(article_filter: Q) -> None:
+        """
+        Recompute the search vector of the matching articles in one UPDATE.
+        This is a no-op on databases other than PostgreSQL.
+        """
+        articles = Article.objects.filter(article_filter)
+        if connections[articles.db].vendor != "postgresql":
+            return
+
+        keywords = Subquery(
+            HashtagRelation.objects.filter(
+                content_type=ContentType.objects.get_for_model(Article),
+                object_id=OuterRef("pk"),
+            )
+            .order_by()
+            .values("object_id")
+            .annotate(names=StringAgg("hashtag__name", " "))
+            .values("names")
+        )
+        authors = Cast(
+            Func(
+                F("authors"),
+                Value("$[*].label"),
+                function="jsonb_path_query_array",
+                output_field=JSONField(),
+            ),
+            TextField(),
+        )
+        articles.update(
+            search_vector=(
+                SearchVector("title", weight="A", config=SEARCH_CONFIG)
+                + SearchVector(keywords, weight="B", config=SEARCH_CONFIG)
+                + SearchVector(authors, weight="C", config=SEARCH_CONFIG)
+                + SearchVector("abstract", weight="D", config=SEARCH_CONFIG)
+            )
+        )
+
     def __str__(self):
         return self.title
 
@@ -93,6 +257,27 @@ class AnonymousIdentity(models.Model):
         )
         return identity.fake_name
 
+    @classmethod
+    def get_fake_names(cls, article_id, user_ids):
+        """
+        Return a {user_id: fake_name} mapping for an article using one query,
+        creating the identities that do not exist yet.
+        """
+        user_ids = set(user_ids)
+        fake_names = dict(
+            cls.objects.filter(article_id=article_id, user_id__in=user_ids).values_list(
+                "user_id", "fake_name"
+            )
+        )
+        for user_id in user_ids - fake_names.keys():
+            identity, created = cls.objects.get_or_create(
+                user_id=user_id,
+                article_id=article_id,
+                defaults={"fake_name": cls.generate_reddit_style_username()},
+            )
+            fake_names[user_id] = identity.fake_name
+        return fake_names
+
 
 class Review(models.Model):
     article = models.ForeignKey(
@@ -228,6 +413,64 @@ class Reaction(models.Model):
             f"{self.user.username} - {self.get_vote_display()} on {self.content_object}"
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored vote so that counters can be adjusted on change
+        instance._loaded_vote = instance.__dict__.get("vote")
+        return instance
+
+
+class ReactionTally(models.Model):
+    """
+    Running like/dislike totals per reactable object, kept in sync with
+    `Reaction` by the signal receivers at the bottom of this module.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+    likes_count = models.PositiveIntegerField(default=0)
+    dislikes_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("content_type", "object_id")
+
+    def __str__(self):
+        return (
+            f"{self.content_type.model} {self.object_id}: "
+            f"{self.likes_count} likes, {self.dislikes_count} dislikes"
+        )
+
+    @classmethod
+    def update_tally(cls, content_type_id: int, object_id: int, **deltas: int):
+        cls.objects.get_or_create(content_type_id=content_type_id, object_id=object_id)
+        cls.objects.filter(content_type_id=content_type_id, object_id=object_id).update(
+            **{field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+        )
+
+    @classmethod
+    def get_tallies(
+        cls, content_type: ContentType | type[models.Model], ids: Iterable[int]
+    ) -> Dict[int, "ReactionTally"]:
+        """
+        Return the tally of every object in `ids` with a single query. Objects
+        nobody has reacted to get an unsaved, zeroed tally.
+        """
+        if not isinstance(content_type, ContentType):
+            content_type = ContentType.objects.get_for_model(content_type)
+        ids = list(ids)
+        tallies = {
+            tally.object_id: tally
+            for tally in cls.objects.filter(
+                content_type=content_type, object_id__in=ids
+            )
+        }
+        for object_id in ids:
+            if object_id not in tallies:
+                tallies[object_id] = cls(content_type=content_type, object_id=object_id)
+        return tallies
+
 
 """
 Discussion Threads for Articles
@@ -311,3 +554,219 @@ class DiscussionComment(models.Model):
 # def handle_reply_delete(sender, instance, **kwargs):
 #     instance.deleted_at = timezone.now()
 #     instance.save()
+
+
+class ArticleSimilarity(models.Model):
+    """
+    A precomputed neighbour of an article, scored by the Jaccard index of
+    their hashtags. Only the best ARTICLE_SIMILARITY_TOP_K neighbours of an
+    article are kept, see articles/similarity.py.
+    """
+
+    article = models.ForeignKey(
+        Article, on_delete=models.CASCADE, related_name="neighbours"
+    )
+    neighbour = models.ForeignKey(
+        Article, on_delete=models.CASCADE, related_name="neighbour_of"
+    )
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ("article", "neighbour")
+        indexes = [
+            models.Index(fields=["article", "-score"], name="article_similarity_score")
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} ~ {self.neighbour_id}: {self.score:.3f}"
+
+
+"""
+Signal handlers keeping the Article engagement counters in sync
+"""
+
+
+@receiver(post_save, sender=Review)
+def increment_reviews_count(sender, instance, created, **kwargs):
+    if created:
+        Article.update_counters(
+            Q(pk=instance.article_id),
+            reviews_count=1,
+            hot_score=hot_score_weight("review"),
+        )
+
+
+@receiver(post_delete, sender=Review)
+def decrement_reviews_count(sender, instance, **kwargs):
+    Article.update_counters(
+        Q(pk=instance.article_id),
+        reviews_count=-1,
+        hot_score=-hot_score_weight("review", instance.created_at),
+    )
+
+
+@receiver(post_save, sender=Discussion)
+def increment_discussions_count(sender, instance, created, **kwargs):
+    if created:
+        Article.update_counters(
+            Q(pk=instance.article_id),
+            discussions_count=1,
+            hot_score=hot_score_weight("discussion"),
+        )
+
+
+@receiver(post_delete, sender=Discussion)
+def decrement_discussions_count(sender, instance, **kwargs):
+    Article.update_counters(
+        Q(pk=instance.article_id),
+        discussions_count=-1,
+        hot_score=-hot_score_weight("discussion", instance.created_at),
+    )
+
+
+@receiver(post_save, sender=ReviewComment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Article.update_counters(
+            Q(reviews=instance.review_id),
+            comments_count=1,
+            hot_score=hot_score_weight("comment"),
+        )
+
+
+@receiver(post_delete, sender=ReviewComment)
+def decrement_comments_count(sender, instance, **kwargs):
+    Article.update_counters(
+        Q(reviews=instance.review_id),
+        comments_count=-1,
+        hot_score=-hot_score_weight("comment", instance.created_at),
+    )
+
+
+@receiver(post_save, sender=DiscussionComment)
+def add_discussion_comment_hot_score(sender, instance, created, **kwargs):
+    if created:
+        Article.update_counters(
+            Q(discussions=instance.discussion_id),
+            hot_score=hot_score_weight("comment"),
+        )
+
+
+@receiver(post_delete, sender=DiscussionComment)
+def remove_discussion_comment_hot_score(sender, instance, **kwargs):
+    Article.update_counters(
+        Q(discussions=instance.discussion_id),
+        hot_score=-hot_score_weight("comment", instance.created_at),
+    )
+
+
+REACTION_COUNTERS = {Reaction.LIKE: "likes_count", Reaction.DISLIKE: "dislikes_count"}
+
+
+def _apply_reaction_deltas(reaction: Reaction, deltas: Dict[str, int]):
+    ReactionTally.update_tally(reaction.content_type_id, reaction.object_id, **deltas)
+
+    likes = deltas.get("likes_count", 0)
+    hot_score = 0.0
+    if likes > 0:
+        hot_score = hot_score_weight("like")
+    elif likes < 0:
+        hot_score = -hot_score_weight("like", reaction.created_at)
+
+    model = ContentType.objects.get_for_id(reaction.content_type_id).model_class()
+    if model is Article:
+        Article.update_counters(Q(pk=reaction.object_id), hot_score=hot_score, **deltas)
+        DailyStat.record(
+            Article, reaction.object_id, DailyStat.LIKES, reaction.created_at, likes
+        )
+    elif hot_score and hasattr(model, "hot_score"):
+        # Posts keep a hot score too
+        model.update_hot_score(Q(pk=reaction.object_id), hot_score)
+
+
+@receiver(post_save, sender=Reaction)
+def update_reaction_counts(sender, instance, created, **kwargs):
+    previous_vote = None if created else getattr(instance, "_loaded_vote", None)
+    if not created and previous_vote is None:
+        # The previous vote is unknown, leave it to the rebuild commands
+        return
+    if previous_vote == instance.vote:
+        return
+
+    deltas = {REACTION_COUNTERS[instance.vote]: 1}
+    if previous_vote is not None:
+        deltas[REACTION_COUNTERS[previous_vote]] = -1
+    _apply_reaction_deltas(instance, deltas)
+    instance._loaded_vote = instance.vote
+
+
+@receiver(post_delete, sender=Reaction)
+def decrement_reaction_counts(sender, instance, **kwargs):
+    _apply_reaction_deltas(instance, {REACTION_COUNTERS[instance.vote]: -1})
+
+
+@receiver(post_save, sender=Review)
+def record_review_stats(sender, instance, created, **kwargs):
+    if created:
+        _record_review_stats(instance, 1)
+
+
+@receiver(post_delete, sender=Review)
+def forget_review_stats(sender, instance, **kwargs):
+    _record_review_stats(instance, -1)
+
+
+def _record_review_stats(review: Review, delta: int):
+    metrics = [DailyStat.REVIEWS]
+    if review.community_id is not None:
+        metrics.append(DailyStat.COMMUNITY_REVIEWS)
+    for metric in metrics:
+        DailyStat.record(Article, review.article_id, metric, review.created_at, delta)
+
+
+@receiver(post_delete, sender=Article)
+def forget_article_stats(sender, instance, **kwargs):
+    DailyStat.forget(Article, instance.pk)
+
+
+@receiver(post_save, sender=HashtagRelation)
+@receiver(post_delete, sender=HashtagRelation)
+def update_article_keywords(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Article).id:
+        Article.update_search_vectors(Q(pk=instance.object_id))
+
+
+@receiver(hashtags_synced, sender=Article)
+def update_synced_article_keywords(sender, instance, **kwargs):
+    Article.update_search_vectors(Q(pk=instance.pk))
+
+
+@receiver(hashtags_synced, sender=Article)
+def queue_similarity_refresh(sender, instance, **kwargs):
+    # articles.similarity imports this module, and the worker, commands and
+    # shells that sync hashtags may never import it themselves
+    from articles.similarity import refresh_article_similarity
+
+    enqueue(refresh_article_similarity, article_id=instance.pk)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=ArticlePDF)
+@receiver(post_delete, sender=ArticlePDF)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Discussion)
+@receiver(post_delete, sender=Discussion)
+@receiver(post_save, sender=ReviewComment)
+@receiver(post_delete, sender=ReviewComment)
+@receiver(post_save, sender=DiscussionComment)
+@receiver(post_delete, sender=DiscussionComment)
+def invalidate_articles_cache(sender, **kwargs):
+    bump_cache_version("articles")
+
+
+@receiver(post_save, sender=Reaction)
+@receiver(post_delete, sender=Reaction)
+def invalidate_reactions_cache(sender, **kwargs):
+    bump_cache_version("articles", "posts")
@@ -1,6 +1,7 @@
 from typing import List, Optional
 
 from django.core.paginator import Paginator
+from django.http import HttpResponse
 from django.utils import timezone
 from ninja import Router
 from ninja.responses import codes_4xx
@@ -17,6 +18,10 @@ from articles.schemas import (
     ReviewUpdateSchema,
 )
 from communities.models import Community
+from communities.roles import is_member
+from myapp.etag import check_etag, compute_etag
+from myapp.pagination import InvalidCursor, paginate_by_cursor
+from myapp.resolvers import get_content_type_id
 from users.auth import JWTAuth, OptionalJWTAuth
 from users.models import User
 
@@ -46,7 +51,7 @@ def create_review(
 
     if community_id:
         community = Community.objects.get(id=community_id)
-        if not community.is_member(user):
+        if not is_member(request, community):
             return 403, {"message": "You are not a member of this community."}
 
         if existing_review.filter(community=community).exists():
@@ -76,11 +81,16 @@ def create_review(
 
 @router.get(
     "/{article_id}/reviews/",
-    response={200: PaginatedReviewSchema, 404: Message, 500: Message},
+    response={200: PaginatedReviewSchema, 400: Message, 404: Message, 500: Message},
     auth=OptionalJWTAuth,
 )
 def list_reviews(
-    request, article_id: int, community_id: int = None, page: int = 1, size: int = 10
+    request,
+    article_id: int,
+    community_id: int = None,
+    page: int = 1,
+    size: int = 10,
+    cursor: Optional[str] = None,
 ):
     article = Article.objects.get(id=article_id)
     reviews = Review.objects.filter(article=article).order_by("-created_at")
@@ -88,16 +98,32 @@ def list_reviews(
     if community_id:
         community = Community.objects.get(id=community_id)
         # if the community is hidden, only members can view reviews
-        if not community.is_member(request.auth) and community.type == "hidden":
+        if not is_member(request, community) and community.type == "hidden":
             return 403, {"message": "You are not a member of this community."}
 
         reviews = reviews.filter(community=community)
     else:
         reviews = reviews.filter(community=None)
 
+    current_user: Optional[User] = None if not request.auth else request.auth
+
+    if cursor is not None:
+        try:
+            cursor_page = paginate_by_cursor(reviews, cursor, size)
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+
+        return PaginatedReviewSchema(
+            items=[
+                ReviewOut.from_orm(item, current_user) for item in cursor_page.items
+            ],
+            size=size,
+            next_cursor=cursor_page.next_cursor,
+            prev_cursor=cursor_page.prev_cursor,
+        )
+
     paginator = Paginator(reviews, size)
     page_obj = paginator.page(page)
-    current_user: Optional[User] = None if not request.auth else request.auth
 
     items = [
         ReviewOut.from_orm(review, current_user) for review in page_obj.object_list
@@ -113,13 +139,20 @@ def list_reviews(
     response={200: ReviewOut, 404: Message, 500: Message},
     auth=OptionalJWTAuth,
 )
-def get_review(request, review_id: int):
+def get_review(request, response: HttpResponse, review_id: int):
     review = Review.objects.get(id=review_id)
     user = request.auth
 
-    if review.community and not review.community.is_member(user):
+    if review.community and not is_member(request, review.community):
         return 403, {"message": "You are not a member of this community."}
 
+    etag = compute_etag(
+        "review", [review.pk, review.updated_at], ["articles", "users"], user
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
     return 200, ReviewOut.from_orm(review, user)
 
 
@@ -136,7 +169,7 @@ def update_review(request, review_id: int, review_data: ReviewUpdateSchema):
     if review.user != user:
         return 403, {"message": "You do not have permission to update this review."}
 
-    if review.community and not review.community.is_member(user):
+    if review.community and not is_member(request, review.community):
         return 403, {"message": "You are not a member of this community."}
 
     # Update the review with new data if provided
@@ -160,7 +193,7 @@ def delete_review(request, review_id: int):
     if review.user != user:
         return 403, {"message": "You do not have permission to delete this review."}
 
-    if review.community and not review.community.is_member(user):
+    if review.community and not is_member(request, review.community):
         return 403, {"message": "You are not a member of this community."}
 
     review.subject = "[deleted]"
@@ -183,7 +216,7 @@ def create_comment(request, review_id: int, payload: ReviewCommentCreateSchema):
     user = request.auth
     review = Review.objects.get(id=review_id)
 
-    if review.community and not review.community.is_member(user):
+    if review.community and not is_member(request, review.community):
         return 403, {"message": "You are not a member of this community."}
 
     parent_comment = None
@@ -221,7 +254,7 @@ def get_comment(request, comment_id: int):
 
     if (
         comment.community
-        and not comment.community.is_member(current_user)
+        and not is_member(request, comment.community)
         and comment.community.type == "hidden"
     ):
         return 403, {"message": "You are not a member of this community."}
@@ -240,22 +273,15 @@ def list_review_comments(request, review_id: int):
 
     if (
         review.community
-        and not review.community.is_member(current_user)
+        and not is_member(request, review.community)
         and review.community.type == "hidden"
     ):
         return 403, {"message": "You are not a member of this community."}
 
-    comments = (
-        ReviewComment.objects.filter(review=review, parent=None)
-        .select_related("author")
-        .order_by("-created_at")
+    return ReviewCommentOut.from_thread(
+        ReviewComment.objects.filter(review=review), current_user, newest_first=True
     )
 
-    return [
-        ReviewCommentOut.from_orm_with_replies(comment, current_user)
-        for comment in comments
-    ]
-
 
 @router.put(
     "reviews/comments/{comment_id}/",
@@ -268,7 +294,7 @@ def update_comment(request, comment_id: int, payload: ReviewCommentUpdateSchema)
     if comment.author != request.auth:
         return 403, {"message": "You do not have permission to update this comment."}
 
-    if comment.community and not comment.community.is_member(request.auth):
+    if comment.community and not is_member(request, comment.community):
         return 403, {"message": "You are not a member of this community."}
 
     comment.content = payload.content or comment.content
@@ -292,7 +318,7 @@ def delete_comment(request, comment_id: int):
 
     # Delete reactions associated with the comment
     Reaction.objects.filter(
-        content_type__model="reviewcomment", object_id=comment.id
+        content_type_id=get_content_type_id(ReviewComment), object_id=comment.id
     ).delete()
 
     # Logically delete the comment by clearing its content and marking it as deleted
@@ -1,8 +1,10 @@
+from collections import defaultdict
 from datetime import datetime
 from enum import Enum
-from typing import List, Literal, Optional
+from typing import Dict, Iterable, List, Literal, Optional
 
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import QuerySet
 from ninja import Field, ModelSchema, Schema
 
 from articles.models import (
@@ -16,6 +18,7 @@ from articles.models import (
     ReviewVersion,
 )
 from communities.models import Community, CommunityArticle
+from myapp.comment_tree import build_comment_tree, get_subtree_ids, get_upvotes
 from myapp.schemas import FilterType, UserStats
 from users.models import HashtagRelation, User
 
@@ -76,6 +79,8 @@ class ArticleOut(ModelSchema):
     user: UserStats
     is_submitter: bool
     submission_type: SubmissionType
+    # Highlighted abstract excerpt, only set for search results
+    search_snippet: Optional[str] = None
 
     class Config:
         model = Article
@@ -94,56 +99,105 @@ class ArticleOut(ModelSchema):
     def from_orm_with_custom_fields(
         cls, article: Article, current_user: Optional[User]
     ):
-        keywords = [
-            relation.hashtag.name
-            for relation in HashtagRelation.objects.filter(
+        return cls.from_queryset_batch([article], current_user)[0]
+
+    @classmethod
+    def from_queryset_batch(
+        cls, articles: Iterable[Article], current_user: Optional[User]
+    ) -> List["ArticleOut"]:
+        """
+        Serialize a page of articles using a fixed number of queries,
+        regardless of how many articles are on the page.
+        """
+        articles = list(articles)
+        article_ids = [article.id for article in articles]
+
+        keywords = defaultdict(list)
+        for object_id, name in (
+            HashtagRelation.objects.filter(
                 content_type=ContentType.objects.get_for_model(Article),
-                object_id=article.id,
+                object_id__in=article_ids,
+            )
+            .order_by("id")
+            .values_list("object_id", "hashtag__name")
+        ):
+            keywords[object_id].append(name)
+
+        article_pdf_urls = defaultdict(list)
+        for pdf in ArticlePDF.objects.filter(article_id__in=article_ids).order_by("id"):
+            article_pdf_urls[pdf.article_id].append(pdf.pdf_file_url.url)
+
+        community_articles = {}
+        for community_article in (
+            CommunityArticle.objects.filter(article_id__in=article_ids)
+            .select_related("community")
+            .order_by("id")
+        ):
+            community_articles.setdefault(
+                community_article.article_id, community_article
             )
-        ]
-
-        article_pdf_urls = [
-            pdf.pdf_file_url.url for pdf in ArticlePDF.objects.filter(article=article)
-        ]
 
-        total_reviews = Review.objects.filter(article=article).count()
-        total_discussions = Discussion.objects.filter(article=article).count()
-        total_comments = ReviewComment.objects.filter(review__article=article).count()
-        user = UserStats.from_model(article.submitter, basic_details=True)
+        submitters = _get_submitters(articles)
+        users = UserStats.from_models_basic(submitters.values())
+        current_user_id = getattr(current_user, "id", None)
+
+        items = []
+        for article in articles:
+            community_article_status = None
+            community_article = community_articles.get(article.id)
+            if community_article:
+                community_article_status = CommunityArticleStatusSchema(
+                    community=ArticleCommunityDetails.from_orm(
+                        community_article.community
+                    ),
+                    status=community_article.status,
+                    submitted_at=community_article.submitted_at,
+                    published_at=community_article.published_at,
+                )
+
+            items.append(
+                cls(
+                    id=article.id,
+                    slug=article.slug,
+                    title=article.title,
+                    abstract=article.abstract,
+                    article_link=article.article_link,
+                    article_image_url=article.article_image_url,
+                    article_pdf_urls=article_pdf_urls[article.id],
+                    created_at=article.created_at,
+                    updated_at=article.updated_at,
+                    submission_type=article.submission_type,
+                    authors=article.authors,
+                    keywords=keywords[article.id],
+                    faqs=article.faqs,
+                    total_reviews=article.reviews_count,
+                    total_discussions=article.discussions_count,
+                    total_comments=article.comments_count,
+                    community_article_status=community_article_status,
+                    user=users[article.submitter_id],
+                    is_submitter=(
+                        current_user_id is not None
+                        and article.submitter_id == current_user_id
+                    ),
+                    search_snippet=getattr(article, "search_snippet", None),
+                )
+            )
 
-        community_article_status = None
+        return items
 
-        if CommunityArticle.objects.filter(article=article).exists():
-            community_article = CommunityArticle.objects.get(article=article)
-            community = community_article.community
-            community_article_status = CommunityArticleStatusSchema(
-                community=ArticleCommunityDetails.from_orm(community),
-                status=community_article.status,
-                submitted_at=community_article.submitted_at,
-                published_at=community_article.published_at,
-            )
 
-        return cls(
-            id=article.id,
-            slug=article.slug,
-            title=article.title,
-            abstract=article.abstract,
-            article_link=article.article_link,
-            article_image_url=article.article_image_url,
-            article_pdf_urls=article_pdf_urls,
-            created_at=article.created_at,
-            updated_at=article.updated_at,
-            submission_type=article.submission_type,
-            authors=article.authors,
-            keywords=keywords,
-            faqs=article.faqs,
-            total_reviews=total_reviews,
-            total_discussions=total_discussions,
-            total_comments=total_comments,
-            community_article_status=community_article_status,
-            user=user,
-            is_submitter=(article.submitter == current_user) if current_user else False,
-        )
+def _get_submitters(articles: List[Article]) -> Dict[int, User]:
+    # Reuse submitters that were loaded with select_related and fetch the rest
+    # in a single query.
+    submitters = {
+        article.submitter_id: article.submitter
+        for article in articles
+        if Article.submitter.is_cached(article)
+    }
+    missing_ids = {article.submitter_id for article in articles} - submitters.keys()
+    if missing_ids:
+        submitters.update(User.objects.in_bulk(missing_ids))
+    return submitters
 
 
 class ArticleBasicOut(ModelSchema):
@@ -165,8 +219,6 @@ class ArticleBasicOut(ModelSchema):
     def from_orm_with_custom_fields(
         cls, article: Article, current_user: Optional[User]
     ):
-        total_reviews = Review.objects.filter(article=article).count()
-        total_discussions = Discussion.objects.filter(article=article).count()
         user = UserStats.from_model(article.submitter, basic_details=True)
 
         return cls(
@@ -174,8 +226,8 @@ class ArticleBasicOut(ModelSchema):
             slug=article.slug,
             title=article.title,
             article_image_url=article.article_image_url,
-            total_reviews=total_reviews,
-            total_discussions=total_discussions,
+            total_reviews=article.reviews_count,
+            total_discussions=article.discussions_count,
             user=user,
             is_submitter=(article.submitter == current_user) if current_user else False,
         )
@@ -186,10 +238,13 @@ class ArticleBasicOut(ModelSchema):
 
 class PaginatedArticlesResponse(Schema):
     items: List[ArticleOut]
-    total: int
-    page: int
+    # Only set in page mode, cursor mode skips the COUNT(*) query
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
-    num_pages: int
+    num_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 class ArticleCreateDetails(Schema):
@@ -200,6 +255,9 @@ class ArticleCreateDetails(Schema):
     article_link: Optional[str] = Field(default=None)
     submission_type: Literal["Public", "Private"]
     community_name: Optional[str] = Field(default=None)
+    # Verified upload sessions, an alternative to sending the files along
+    pdf_upload_ids: List[int] = []
+    image_upload_id: Optional[int] = Field(default=None)
 
 
 class ArticleCreateSchema(Schema):
@@ -302,9 +360,11 @@ class ReviewOut(ModelSchema):
 
 class PaginatedReviewSchema(Schema):
     items: List[ReviewOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 class ReviewUpdateSchema(Schema):
@@ -331,26 +391,53 @@ class ReviewCommentOut(ModelSchema):
 
     @staticmethod
     def from_orm_with_replies(comment: ReviewComment, current_user: Optional[User]):
-        author = UserStats.from_model(comment.author, basic_details=True)
-        replies = [
-            ReviewCommentOut.from_orm_with_replies(reply, current_user)
-            for reply in comment.review_replies.all()
-        ]
-        anonymous_name = AnonymousIdentity.objects.get(
-            article=comment.review.article, user=comment.author
-        ).fake_name
+        thread = ReviewComment.objects.filter(review_id=comment.review_id)
+        return ReviewCommentOut.from_thread(
+            thread.filter(pk__in=get_subtree_ids(thread, comment)),
+            current_user,
+            roots=[comment],
+        )[0]
 
-        return ReviewCommentOut(
-            id=comment.id,
-            rating=comment.rating,
-            author=author,
-            content=comment.content,
-            created_at=comment.created_at,
-            upvotes=comment.reactions.filter(vote=1).count(),
-            replies=replies,
-            anonymous_name=anonymous_name,
-            is_author=(comment.author == current_user) if current_user else False,
+    @staticmethod
+    def from_thread(
+        comments: QuerySet,
+        current_user: Optional[User],
+        roots: Optional[List[ReviewComment]] = None,
+        newest_first: bool = False,
+    ) -> List["ReviewCommentOut"]:
+        """
+        Serialize the comments of a single review as nested threads, loading
+        authors, upvotes and anonymous names in bulk.
+        """
+        comments = list(
+            comments.select_related("author", "review").order_by("created_at", "id")
+        )
+        if not comments:
+            return []
+
+        authors = {comment.author_id: comment.author for comment in comments}
+        users = UserStats.from_models_basic(authors.values())
+        upvotes = get_upvotes(ReviewComment, [comment.id for comment in comments])
+        anonymous_names = AnonymousIdentity.get_fake_names(
+            comments[0].review.article_id, authors
         )
+        current_user_id = getattr(current_user, "id", None)
+
+        def make_node(comment: ReviewComment, replies: List["ReviewCommentOut"]):
+            return ReviewCommentOut(
+                id=comment.id,
+                rating=comment.rating,
+                author=users[comment.author_id],
+                content=comment.content,
+                created_at=comment.created_at,
+                upvotes=upvotes.get(comment.id, 0),
+                replies=replies,
+                anonymous_name=anonymous_names[comment.author_id],
+                is_author=comment.author_id == current_user_id,
+            )
+
+        thread = build_comment_tree(comments, make_node, roots)
+        return thread[::-1] if newest_first else thread
 
 
 class ReviewCommentCreateSchema(Schema):
@@ -419,9 +506,11 @@ class CreateDiscussionSchema(Schema):
 
 class PaginatedDiscussionSchema(Schema):
     items: List[DiscussionOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 """
@@ -442,25 +531,54 @@ class DiscussionCommentOut(ModelSchema):
 
     @staticmethod
     def from_orm_with_replies(comment: DiscussionComment, current_user: Optional[User]):
-        author = UserStats.from_model(comment.author, basic_details=True)
-        replies = [
-            DiscussionCommentOut.from_orm_with_replies(reply, current_user)
-            for reply in DiscussionComment.objects.filter(parent=comment)
-        ]
-        anonymous_name = AnonymousIdentity.objects.get(
-            article=comment.discussion.article, user=comment.author
-        ).fake_name
+        thread = DiscussionComment.objects.filter(discussion_id=comment.discussion_id)
+        return DiscussionCommentOut.from_thread(
+            thread.filter(pk__in=get_subtree_ids(thread, comment)),
+            current_user,
+            roots=[comment],
+        )[0]
 
-        return DiscussionCommentOut(
-            id=comment.id,
-            author=author,
-            content=comment.content,
-            created_at=comment.created_at,
-            upvotes=comment.reactions.filter(vote=1).count(),
-            replies=replies,
-            anonymous_name=anonymous_name,
-            is_author=(comment.author == current_user) if current_user else False,
+    @staticmethod
+    def from_thread(
+        comments: QuerySet,
+        current_user: Optional[User],
+        roots: Optional[List[DiscussionComment]] = None,
+        newest_first: bool = False,
+    ) -> List["DiscussionCommentOut"]:
+        """
+        Serialize the comments of a single discussion as nested threads,
+        loading authors, upvotes and anonymous names in bulk.
+        """
+        comments = list(
+            comments.select_related("author", "discussion").order_by("created_at", "id")
+        )
+        if not comments:
+            return []
+
+        authors = {comment.author_id: comment.author for comment in comments}
+        users = UserStats.from_models_basic(authors.values())
+        upvotes = get_upvotes(DiscussionComment, [comment.id for comment in comments])
+        anonymous_names = AnonymousIdentity.get_fake_names(
+            comments[0].discussion.article_id, authors
         )
+        current_user_id = getattr(current_user, "id", None)
+
+        def make_node(
+            comment: DiscussionComment, replies: List["DiscussionCommentOut"]
+        ):
+            return DiscussionCommentOut(
+                id=comment.id,
+                author=users[comment.author_id],
+                content=comment.content,
+                created_at=comment.created_at,
+                upvotes=upvotes.get(comment.id, 0),
+                replies=replies,
+                anonymous_name=anonymous_names[comment.author_id],
+                is_author=comment.author_id == current_user_id,
+            )
+
+        thread = build_comment_tree(comments, make_node, roots)
+        return thread[::-1] if newest_first else thread
 
 
 class DiscussionCommentCreateSchema(Schema):
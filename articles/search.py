@@ -0,0 +1,67 @@
+"""
+Full-text search over articles
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import (
+    CharField,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Value,
+)
+
+from articles.models import SEARCH_CONFIG, Article
+from users.models import HashtagRelation
+
+
+def search_articles(queryset: QuerySet, search: str) -> QuerySet:
+    """
+    Filter `queryset` down to the articles matching `search` and annotate
+    them with `search_rank` and a highlighted `search_snippet` of the
+    abstract.
+
+    On PostgreSQL this is a web-search style query against the GIN indexed
+    `Article.search_vector` ranked with ts_rank. Other databases fall back to
+    requiring every word to appear in the title, abstract, authors or
+    keywords, with a constant rank and no snippet.
+    """
+    if connections[queryset.db].vendor == "postgresql":
+        query = SearchQuery(search, search_type="websearch", config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .defer("search_vector")
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), query),
+                search_snippet=SearchHeadline(
+                    "abstract",
+                    query,
+                    config=SEARCH_CONFIG,
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_words=35,
+                    min_words=15,
+                ),
+            )
+        )
+
+    keywords = HashtagRelation.objects.filter(
+        content_type=ContentType.objects.get_for_model(Article),
+        object_id=OuterRef("pk"),
+    )
+    for word in search.split():
+        queryset = queryset.filter(
+            Q(title__icontains=word)
+            | Q(abstract__icontains=word)
+            | Q(authors__icontains=word)
+            | Exists(keywords.filter(hashtag__name__icontains=word))
+        )
+    return queryset.annotate(
+        search_rank=Value(0.0, output_field=FloatField()),
+        search_snippet=Value(None, output_field=CharField()),
+    )
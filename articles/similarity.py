@@ -0,0 +1,180 @@
+"""
+Hashtag similarity between articles
+
+Articles are the rows of a sparse article x hashtag incidence matrix, and
+two articles are as similar as the Jaccard index of their hashtag sets. The
+neighbours of every article are computed offline by
+`rebuild_article_similarity` and recomputed in the background for articles
+whose hashtags changed, so relevant-article listings only read the
+`ArticleSimilarity` rows.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from scipy import sparse
+
+from articles.models import Article, ArticleSimilarity
+from myapp.resolvers import get_content_type_id
+from tasks.queue import task
+from users.models import HashtagRelation
+
+# Rows of the incidence matrix multiplied at once, bounds memory use
+BLOCK_SIZE = 1000
+
+
+def incidence_matrix(
+    pairs: Iterable[Tuple[int, int]]
+) -> Tuple[np.ndarray, sparse.csr_matrix]:
+    """
+    Build the article x hashtag matrix from (article id, hashtag id) pairs,
+    returning the article id of every row along with it.
+    """
+    pairs = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+    article_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    hashtag_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(article_ids), len(hashtag_ids)),
+    )
+    # Duplicate relations would otherwise count twice
+    matrix.data[:] = 1
+    return article_ids, matrix
+
+
+def jaccard_neighbours(
+    matrix: sparse.csr_matrix, sources: np.ndarray, top_k: Optional[int]
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Yield (row, neighbour rows, scores) for every row in `sources`, keeping
+    the `top_k` best neighbours, or all of them when `top_k` is None.
+    """
+    sizes = np.asarray(matrix.sum(axis=1)).ravel()
+    for start in range(0, len(sources), BLOCK_SIZE):
+        block = sources[start : start + BLOCK_SIZE]
+        # Number of shared hashtags with every other article
+        shared = (matrix[block] @ matrix.T).tocsr()
+        for offset, row in enumerate(block):
+            begin, end = shared.indptr[offset], shared.indptr[offset + 1]
+            columns, common = shared.indices[begin:end], shared.data[begin:end]
+            keep = columns != row
+            columns, common = columns[keep], common[keep]
+            scores = common / (sizes[row] + sizes[columns] - common)
+            if top_k is not None and len(scores) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                columns, scores = columns[best], scores[best]
+            yield row, columns, scores
+
+
+def _article_hashtags(article_ids: Optional[Iterable[int]] = None) -> QuerySet:
+    relations = HashtagRelation.objects.filter(
+        content_type_id=get_content_type_id(Article),
+        # Relations outlive deleted articles
+        object_id__in=Article.objects.values("id"),
+    )
+    if article_ids is not None:
+        relations = relations.filter(object_id__in=list(article_ids))
+    return relations.values_list("object_id", "hashtag_id")
+
+
+def rebuild_similarities() -> int:
+    """
+    Recompute the neighbours of every article, one short transaction per
+    block of articles. Returns the number of neighbours stored.
+    """
+    article_ids, matrix = incidence_matrix(_article_hashtags().iterator())
+    top_k = settings.ARTICLE_SIMILARITY_TOP_K
+
+    stored = 0
+    for start in range(0, len(article_ids), BLOCK_SIZE):
+        rows = np.arange(start, min(start + BLOCK_SIZE, len(article_ids)))
+        similarities = [
+            ArticleSimilarity(
+                article_id=int(article_ids[row]),
+                neighbour_id=int(article_ids[column]),
+                score=float(score),
+            )
+            for row, columns, scores in jaccard_neighbours(matrix, rows, top_k)
+            for column, score in zip(columns, scores)
+        ]
+        with transaction.atomic():
+            ArticleSimilarity.objects.filter(
+                article_id__in=article_ids[rows].tolist()
+            ).delete()
+            ArticleSimilarity.objects.bulk_create(similarities, batch_size=1000)
+        stored += len(similarities)
+
+    # Articles left without hashtags have no neighbours
+    ArticleSimilarity.objects.exclude(
+        article_id__in=_article_hashtags().values("object_id")
+    ).delete()
+    return stored
+
+
+@transaction.atomic
+def refresh_similarities(article_ids: Iterable[int]) -> None:
+    """
+    Recompute the neighbours of the given articles after their hashtags
+    changed, and their place among the neighbours of other articles.
+
+    The other articles get the changed articles inserted into their lists
+    regardless of rank, so a list can outgrow ARTICLE_SIMILARITY_TOP_K until
+    the next full rebuild. Listings rank by score, so that only costs rows.
+    """
+    article_ids = set(article_ids)
+    hashtag_ids = HashtagRelation.objects.filter(
+        content_type_id=get_content_type_id(Article), object_id__in=article_ids
+    ).values("hashtag_id")
+    related = set(
+        HashtagRelation.objects.filter(
+            content_type_id=get_content_type_id(Article), hashtag_id__in=hashtag_ids
+        ).values_list("object_id", flat=True)
+    )
+
+    ArticleSimilarity.objects.filter(
+        Q(article_id__in=article_ids) | Q(neighbour_id__in=article_ids)
+    ).delete()
+
+    ids, matrix = incidence_matrix(_article_hashtags(article_ids | related))
+    sources = np.flatnonzero(np.isin(ids, list(article_ids)))
+    top_k = settings.ARTICLE_SIMILARITY_TOP_K
+
+    similarities: Dict[Tuple[int, int], float] = {}
+    for row, columns, scores in jaccard_neighbours(matrix, sources, None):
+        best = (
+            np.argsort(-scores)[:top_k] if len(scores) > top_k else range(len(scores))
+        )
+        for index in best:
+            similarities[int(ids[row]), int(ids[columns[index]])] = float(scores[index])
+        for column, score in zip(columns, scores):
+            similarities[int(ids[column]), int(ids[row])] = float(score)
+
+    ArticleSimilarity.objects.bulk_create(
+        [
+            ArticleSimilarity(
+                article_id=article_id, neighbour_id=neighbour_id, score=score
+            )
+            for (article_id, neighbour_id), score in similarities.items()
+        ],
+        batch_size=1000,
+    )
+
+
+@task(max_attempts=3, concurrency=1, batch_size=100)
+def refresh_article_similarity(payloads: List[Dict]) -> None:
+    refresh_similarities(payload["article_id"] for payload in payloads)
+
+
+def similar_articles(article_id: int) -> QuerySet:
+    """
+    Return the precomputed neighbours of an article, annotated with their
+    `relevance_score` and ordered from the most similar.
+    """
+    return (
+        Article.objects.filter(neighbour_of__article_id=article_id)
+        .annotate(relevance_score=F("neighbour_of__score"))
+        .order_by("-relevance_score", "-created_at")
+    )
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from articles.models import Article, Reaction, Review
+from communities.models import Community, CommunityArticle
+from myapp.resolvers import get_content_type_id
+from users.models import User
+
+# Most queries a stats endpoint may run, however much data there is
+STATS_QUERY_LIMIT = 4
+
+
+class ArticleStatsQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", email="reader@example.com", password="secret"
+        )
+        cls.community = Community.objects.create(name="Biology", description="Cells")
+        cls.article = Article.objects.create(
+            title="On cells",
+            abstract="Cells divide.",
+            submitter=cls.user,
+            submission_type="Public",
+        )
+        cls.standalone = Article.objects.create(
+            title="On atoms",
+            abstract="Atoms bond.",
+            submitter=cls.user,
+            submission_type="Public",
+        )
+        CommunityArticle.objects.create(
+            article=cls.article, community=cls.community, status="published"
+        )
+
+        for index in range(5):
+            reviewer = User.objects.create_user(
+                username=f"reviewer{index}",
+                email=f"reviewer{index}@example.com",
+                password="secret",
+            )
+            for article, community in (
+                (cls.article, cls.community),
+                (cls.article, None),
+                (cls.standalone, None),
+            ):
+                Review.objects.create(
+                    article=article,
+                    user=reviewer,
+                    community=community,
+                    rating=index + 1,
+                    subject="Review",
+                    content="Well argued.",
+                )
+            Reaction.objects.create(
+                user=reviewer,
+                content_type_id=get_content_type_id(Article),
+                object_id=cls.article.id,
+                vote=Reaction.LIKE,
+            )
+
+    def setUp(self):
+        cache.clear()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+    def assert_query_limit(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), STATS_QUERY_LIMIT)
+        return response.json()
+
+    def test_official_article_stats(self):
+        stats = self.assert_query_limit(
+            f"/api/articles/article/{self.article.slug}/official-stats?days=30"
+        )
+        self.assertEqual(stats["reviews_count"], 10)
+        self.assertEqual(stats["likes"], 5)
+        self.assertEqual(len(stats["recent_reviews"]), 3)
+
+    def test_community_article_stats(self):
+        stats = self.assert_query_limit(
+            f"/api/articles/article/{self.article.slug}/community-stats?days=30"
+        )
+        self.assertEqual(stats["community_name"], "Biology")
+        self.assertEqual(stats["reviews_count"], 5)
+        self.assertEqual(stats["average_rating"], 3)
+
+    def test_article_stats_outside_communities(self):
+        stats = self.assert_query_limit(
+            f"/api/articles/article/{self.standalone.slug}/community-stats?days=30"
+        )
+        self.assertIsNone(stats["community_name"])
+        self.assertEqual(stats["reviews_count"], 5)
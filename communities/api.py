@@ -1,15 +1,16 @@
 from datetime import timedelta
 from typing import List, Optional
 
-from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import Paginator
 from django.db.models import Count, Q
+from django.http import HttpResponse
 from django.utils import timezone
 from ninja import File, Query, Router, UploadedFile
 from ninja.errors import HttpRequest
 
 from articles.models import Discussion, Review
 from communities.models import Community, CommunityArticle
+from communities.roles import is_admin, is_member
 from communities.schemas import (
     CommunityBasicOut,
     CommunityCreateSchema,
@@ -18,10 +19,16 @@ from communities.schemas import (
     CommunityStatsResponse,
     CommunityUpdateSchema,
     PaginatedCommunities,
+    count_subquery,
 )
-from myapp.schemas import Message
+from myapp.cache import cached_response
+from myapp.etag import check_etag, compute_etag
+from myapp.pagination import InvalidCursor, paginate_by_cursor
+from myapp.schemas import AutocompleteOut, Message
+from myapp.search import autocomplete, fuzzy_search
+from stats.models import DailyStat, cumulative_counts
 from users.auth import JWTAuth, OptionalJWTAuth
-from users.models import Hashtag, HashtagRelation
+from users.hashtags import sync_hashtags
 
 router = Router(tags=["Communities"])
 
@@ -56,13 +63,7 @@ def create_community(
     )
 
     # Create Tags
-    content_type = ContentType.objects.get_for_model(Community)
-
-    for hashtag_name in payload.details.tags:
-        hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name.lower())
-        HashtagRelation.objects.create(
-            hashtag=hashtag, content_type=content_type, object_id=new_community.id
-        )
+    sync_hashtags(new_community, payload.details.tags)
 
     new_community.admins.add(user)  # Add the creator as an admin
     new_community.members.add(user)  # Add the creator as a member
@@ -78,22 +79,23 @@ def create_community(
         500: Message,
     },
     summary="Get Communities",
+    auth=OptionalJWTAuth,
 )
+@cached_response("communities", families=["communities"])
 def list_communities(
     request: HttpRequest,
     search: Optional[str] = None,
     sort: Optional[str] = None,
     page: int = 1,
     per_page: int = 10,
+    cursor: Optional[str] = None,
 ):
     # Start with all non-hidden communities
     communities = Community.objects.filter(~Q(type="hidden"))
 
     # Apply search if provided
     if search:
-        communities = communities.filter(
-            Q(name__icontains=search) | Q(description__icontains=search)
-        )
+        communities = fuzzy_search(communities, ["name", "description"], search)
 
     # Apply sorting
     if sort:
@@ -110,13 +112,31 @@ def list_communities(
         # Default sort by latest
         communities = communities.order_by("-created_at")
 
+    # Rank search results by similarity, the requested sort breaks ties
+    if search:
+        communities = communities.order_by(
+            "-search_similarity", *communities.query.order_by
+        )
+
+    if cursor is not None:
+        try:
+            cursor_page = paginate_by_cursor(communities, cursor, per_page)
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+
+        return 200, PaginatedCommunities(
+            items=CommunityOut.from_queryset_batch(cursor_page.items, request.auth),
+            per_page=per_page,
+            next_cursor=cursor_page.next_cursor,
+            prev_cursor=cursor_page.prev_cursor,
+        )
+
     paginator = Paginator(communities, per_page)
     paginated_communities = paginator.get_page(page)
 
-    results = [
-        CommunityOut.from_orm_with_custom_fields(community)
-        for community in paginated_communities.object_list
-    ]
+    results = CommunityOut.from_queryset_batch(
+        paginated_communities.object_list, request.auth
+    )
 
     return 200, PaginatedCommunities(
         items=results,
@@ -127,18 +147,42 @@ def list_communities(
     )
 
 
+@router.get(
+    "/autocomplete",
+    response={200: List[AutocompleteOut]},
+    summary="Autocomplete community names",
+)
+def autocomplete_communities(
+    request: HttpRequest,
+    search: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+):
+    communities = Community.objects.filter(~Q(type="hidden"))
+    return [
+        AutocompleteOut(id=community.id, name=community.name)
+        for community in autocomplete(communities, "name", search, limit)
+    ]
+
+
 @router.get(
     "/community/{community_name}/",
     response={200: CommunityOut, 400: Message, 500: Message},
     auth=JWTAuth(),
 )
-def get_community(request, community_name: str):
+def get_community(request, response: HttpResponse, community_name: str):
     community = Community.objects.get(name=community_name)
     user = request.auth
 
-    if community.type == "hidden" and not community.is_member(user):
+    if community.type == "hidden" and not is_member(request, community):
         return 403, {"message": "You do not have permission to view this community."}
 
+    # Communities have no `updated_at`, every change to them, their members
+    # and their articles bumps the "communities" version instead
+    etag = compute_etag("community", [community.pk], ["communities"], user)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
     return 200, CommunityOut.from_orm_with_custom_fields(community, user)
 
 
@@ -157,7 +201,7 @@ def update_community(
     community = Community.objects.get(id=community_id)
 
     # Check if the user is an admin of this community
-    if not community.admins.filter(id=request.auth.id).exists():
+    if not is_admin(request, community):
         return 403, {"message": "You do not have permission to modify this community."}
 
     # Update fields
@@ -167,15 +211,7 @@ def update_community(
     community.about = payload.details.about
 
     # Update Tags
-    content_type = ContentType.objects.get_for_model(Community)
-    HashtagRelation.objects.filter(
-        content_type=content_type, object_id=community.id
-    ).delete()
-    for hashtag_name in payload.details.tags:
-        hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name.lower())
-        HashtagRelation.objects.create(
-            hashtag=hashtag, content_type=content_type, object_id=community.id
-        )
+    sync_hashtags(community, payload.details.tags)
 
     if banner_pic_file:
         community.banner_pic_url = banner_pic_file
@@ -192,7 +228,7 @@ def delete_community(request: HttpRequest, community_id: int):
     community = Community.objects.get(id=community_id)
 
     # Check if the user is an admin of this community
-    if not community.admins.filter(id=request.auth.id).exists():
+    if not is_admin(request, community):
         return 403, {"message": "You do not have permission to delete this community."}
 
     # Todo: Do not delete the community, just mark it as deleted
@@ -248,54 +284,55 @@ Community Stats Endpoint
     "/{community_slug}/dashboard",
     response={200: CommunityStatsResponse, 400: Message},
 )
-def get_community_dashboard(request, community_slug: str):
-    community = Community.objects.get(slug=community_slug)
+@cached_response("community_dashboard", families=["communities", "articles"])
+def get_community_dashboard(
+    request, community_slug: str, days: int = Query(5, ge=1, le=90)
+):
     now = timezone.now()
     week_ago = now - timedelta(days=7)
 
-    # Member stats
-    total_members = community.members.count()
-    new_members_this_week = community.members.filter(
-        membership__joined_at__gte=week_ago
-    ).count()
+    # Member, review and discussion stats along with the community
+    community = Community.objects.annotate(
+        total_members=Count("membership"),
+        new_members_this_week=Count(
+            "membership", filter=Q(membership__joined_at__gte=week_ago)
+        ),
+        total_reviews=count_subquery(Review.objects),
+        total_discussions=count_subquery(Discussion.objects),
+    ).get(slug=community_slug)
 
     # Article stats
     community_articles = CommunityArticle.objects.filter(community=community)
-    total_articles = community_articles.count()
-    new_articles_this_week = community_articles.filter(
-        submitted_at__gte=week_ago
-    ).count()
-    articles_published = community_articles.filter(status="published").count()
-    new_published_articles_this_week = community_articles.filter(
-        status="published", published_at__gte=week_ago
-    ).count()
-
-    # Review and discussion stats
-    total_reviews = Review.objects.filter(community=community).count()
-    total_discussions = Discussion.objects.filter(community=community).count()
-
-    # Member growth over time (last 5 days)
-    member_growth = []
-    for i in range(5):
-        date = now - timedelta(days=i)
-        count = community.members.filter(membership__joined_at__date__lte=date).count()
-        member_growth.append({"date": date.date(), "count": count})
-    member_growth.reverse()
-
-    # Article submission trends (last 5 days)
-    article_submission_trends = []
-    for i in range(5):
-        date = now - timedelta(days=i)
-        count = community_articles.filter(submitted_at__date__lte=date).count()
-        article_submission_trends.append({"date": date.date(), "count": count})
-    article_submission_trends.reverse()
+    article_stats = community_articles.aggregate(
+        total_articles=Count("id"),
+        new_articles_this_week=Count("id", filter=Q(submitted_at__gte=week_ago)),
+        articles_published=Count("id", filter=Q(status="published")),
+        new_published_articles_this_week=Count(
+            "id", filter=Q(status="published", published_at__gte=week_ago)
+        ),
+    )
+
+    # Member growth and article submission trends, as running totals over
+    # the last `days` days, from the daily rollups
+    series = DailyStat.get_series(
+        Community,
+        community.id,
+        [DailyStat.MEMBERS, DailyStat.ARTICLES],
+        timezone.localdate() - timedelta(days=days - 1),
+    )
+    member_growth = cumulative_counts(
+        community.total_members, series[DailyStat.MEMBERS], days
+    )
+    article_submission_trends = cumulative_counts(
+        article_stats["total_articles"], series[DailyStat.ARTICLES], days
+    )
 
     # Recently published articles
-    recently_published = community_articles.filter(status="published").order_by(
-        "-published_at"
-    )[
-        :5
-    ]  # Fetching the 5 most recent articles
+    recently_published = (
+        community_articles.filter(status="published")
+        .select_related("article__submitter")
+        .order_by("-published_at")[:5]
+    )  # Fetching the 5 most recent articles
 
     recently_published_articles = [
         {
@@ -309,14 +346,11 @@ def get_community_dashboard(request, community_slug: str):
     return {
         "name": community.name,
         "description": community.description,
-        "total_members": total_members,
-        "new_members_this_week": new_members_this_week,
-        "total_articles": total_articles,
-        "new_articles_this_week": new_articles_this_week,
-        "articles_published": articles_published,
-        "new_published_articles_this_week": new_published_articles_this_week,
-        "total_reviews": total_reviews,
-        "total_discussions": total_discussions,
+        "total_members": community.total_members,
+        "new_members_this_week": community.new_members_this_week,
+        **article_stats,
+        "total_reviews": community.total_reviews,
+        "total_discussions": community.total_discussions,
         "member_growth": member_growth,
         "article_submission_trends": article_submission_trends,
         "recently_published_articles": recently_published_articles,
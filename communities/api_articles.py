@@ -8,6 +8,7 @@ from ninja.responses import codes_4xx, codes_5xx
 from articles.models import Article
 from articles.schemas import ArticleOut, PaginatedArticlesResponse
 from communities.models import ArticleSubmissionAssessment, Community, CommunityArticle
+from communities.roles import is_admin, is_member
 from communities.schemas import (
     ArticleStatusSchema,
     AssessmentSubmissionSchema,
@@ -16,8 +17,10 @@ from communities.schemas import (
     Filters,
     Message,
 )
+from myapp.pagination import InvalidCursor, paginate_by_cursor
 from users.auth import JWTAuth, OptionalJWTAuth
-from users.models import Notification, User
+from users.models import User
+from users.notifications import notify, notify_community
 
 # Initialize a router for the communities API
 router = Router(tags=["Community Articles"])
@@ -32,7 +35,7 @@ def submit_article(request, community_name: str, article_slug: str):
     community = Community.objects.get(name=community_name)
 
     # if the community isn't public and the user isn't a member, return an error
-    if community.type != "public" and request.auth not in community.members.all():
+    if community.type != "public" and not is_member(request, community):
         return 400, {
             "message": "You must be a member of this community to submit articles"
         }
@@ -44,9 +47,8 @@ def submit_article(request, community_name: str, article_slug: str):
     )
 
     # Send a notification to the community admins
-    Notification.objects.create(
-        user=community.admins.first(),
-        community=community,
+    notify_community(
+        community,
         category="communities",
         notification_type="article_submitted",
         message=(
@@ -78,6 +80,7 @@ def list_community_articles_by_status(
     size: int = 10,
     sort_by: str = "submitted_at",
     sort_order: str = "desc",
+    cursor: Optional[str] = None,
 ):
     # Check if the community exists
     community = Community.objects.get(name=community_name)
@@ -103,19 +106,29 @@ def list_community_articles_by_status(
     sort_prefix = "-" if sort_order.lower() == "desc" else ""
     queryset = queryset.order_by(f"{sort_prefix}{sort_field}")
 
-    queryset = queryset.distinct()
+    queryset = queryset.distinct().select_related("submitter")
+
+    current_user: Optional[User] = None if not request.auth else request.auth
+
+    if cursor is not None:
+        try:
+            cursor_page = paginate_by_cursor(queryset, cursor, size)
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+
+        return {
+            "items": ArticleOut.from_queryset_batch(cursor_page.items, current_user),
+            "per_page": size,
+            "next_cursor": cursor_page.next_cursor,
+            "prev_cursor": cursor_page.prev_cursor,
+        }
 
     # Pagination
     paginator = Paginator(queryset, size)
     paginated_articles = paginator.get_page(page)
 
-    current_user: Optional[User] = None if not request.auth else request.auth
-
     return {
-        "items": [
-            ArticleOut.from_orm_with_custom_fields(article, current_user)
-            for article in paginated_articles
-        ],
+        "items": ArticleOut.from_queryset_batch(paginated_articles, current_user),
         "total": paginator.count,
         "page": page,
         "per_page": size,
@@ -137,7 +150,7 @@ def manage_article(
     community_article = CommunityArticle.objects.get(
         article_id=article_id, community_id=community_id
     )
-    if request.auth not in community_article.community.admins.all():
+    if not is_admin(request, community_article.community):
         return 400, {"message": "You are not an admin of this community"}
 
     if action == "approve":
@@ -174,44 +187,38 @@ def manage_article(
 
 def assign_assessors(community_article: CommunityArticle):
     community = community_article.community
-    reviewers = community.reviewers.order_by("?")[:3]
+    reviewers = list(community.reviewers.order_by("?")[:3])
     moderator = community.moderators.order_by("?").first()
 
-    for reviewer in reviewers:
-        ArticleSubmissionAssessment.objects.create(
+    assessments = [
+        ArticleSubmissionAssessment(
             community_article=community_article, assessor=reviewer, is_moderator=False
         )
-        # Send a notification to the reviewer
-        Notification.objects.create(
-            user=reviewer,
-            community=community,
-            category="articles",
-            notification_type="article_assigned",
-            message=(
-                f"New article assigned to you in {community.name}"
-                f" by {community_article.article.submitter.username}"
-            ),
-            link=f"/community/{community.name}/submissions",
-            content=community_article.article.title,
-        )
-
+        for reviewer in reviewers
+    ]
     if moderator:
-        ArticleSubmissionAssessment.objects.create(
-            community_article=community_article, assessor=moderator, is_moderator=True
-        )
-        # Send a notification to the moderator
-        Notification.objects.create(
-            user=moderator,
-            community=community,
-            category="articles",
-            notification_type="article_assigned",
-            message=(
-                f"New article assigned to you in {community.name}"
-                f" by {community_article.article.submitter.username}"
-            ),
-            link=f"/community/{community.name}/submissions",
-            content=community_article.article.title,
+        assessments.append(
+            ArticleSubmissionAssessment(
+                community_article=community_article,
+                assessor=moderator,
+                is_moderator=True,
+            )
         )
+    ArticleSubmissionAssessment.objects.bulk_create(assessments)
+
+    # Send a notification to the reviewers and the moderator
+    notify(
+        [assessment.assessor_id for assessment in assessments],
+        community=community,
+        category="articles",
+        notification_type="article_assigned",
+        message=(
+            f"New article assigned to you in {community.name}"
+            f" by {community_article.article.submitter.username}"
+        ),
+        link=f"/community/{community.name}/submissions",
+        content=community_article.article.title,
+    )
 
 
 @router.get(
@@ -223,7 +230,7 @@ def get_article_status(request, community_id: int, article_id: int):
     community_article = CommunityArticle.objects.get(
         article_id=article_id, community_id=community_id
     )
-    if request.auth not in community_article.community.members.all():
+    if not is_member(request, community_article.community):
         return 400, {"message": "You are not a member of this community"}
 
     return {
@@ -256,14 +263,12 @@ def get_assigned_articles(request, community_id: int):
         assessor=request.auth,
         approved__isnull=True,
         community_article__community_id=community_id,
-    ).select_related("community_article__article")
+    ).select_related("community_article__article__submitter")
 
-    return [
-        ArticleOut.from_orm_with_custom_fields(
-            assessment.community_article.article, request.auth
-        )
-        for assessment in assigned_articles
-    ]
+    return ArticleOut.from_queryset_batch(
+        [assessment.community_article.article for assessment in assigned_articles],
+        request.auth,
+    )
 
 
 @router.get(
@@ -342,7 +347,7 @@ def get_article_assessors(request, community_id: int, article_id: int):
     community_article = CommunityArticle.objects.get(
         id=article_id, community_id=community_id
     )
-    if request.auth not in community_article.community.admins.all():
+    if not is_admin(request, community_article.community):
         return 400, {"message": "You are not an admin of this community"}
 
     assessments = ArticleSubmissionAssessment.objects.filter(
@@ -360,7 +365,7 @@ def manually_assign_assessors(request, community_id: int, article_id: int):
         id=article_id, community_id=community_id
     )
 
-    if request.auth not in community_article.community.admins.all():
+    if not is_admin(request, community_article.community):
         return 400, {"message": "You are not an admin of this community"}
 
     assign_assessors(community_article)
@@ -378,7 +383,7 @@ def check_assessments(request, community_id: int, article_id: int):
         id=article_id, community_id=community_id
     )
 
-    if request.auth not in community_article.community.admins.all():
+    if not is_admin(request, community_article.community):
         return 400, {"message": "You are not an admin of this community"}
 
     # assessments is a related manager, so we need to call all() to get the queryset
@@ -1,12 +1,13 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
 from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
 from django.core.validators import validate_email
+from django.db import transaction
 from ninja import Router
 from ninja.responses import codes_4xx, codes_5xx
 
 from communities.models import Community, Invitation, Membership
+from communities.roles import is_admin
 from communities.schemas import (
     CommunityInvitationDetails,
     InvitationDetails,
@@ -15,8 +16,10 @@ from communities.schemas import (
     Message,
     SendInvitationsPayload,
 )
+from tasks.mail import queue_mail
 from users.auth import JWTAuth
 from users.models import Notification, User
+from users.notifications import create_notifications, notify_community
 
 router = Router(tags=["Community Invitations"])
 
@@ -35,7 +38,7 @@ def invite_registered_users(request, community_id: int, payload: InvitePayload):
     community = Community.objects.get(pk=community_id)
 
     # Check if the requester is an admin of the community
-    if request.auth not in community.admins.all():
+    if not is_admin(request, community):
         return 403, {"message": "Only community admins can send invitations."}
 
     # check for non-existing users
@@ -61,21 +64,30 @@ def invite_registered_users(request, community_id: int, payload: InvitePayload):
         }
 
     # Send invitations
-    for user in existing_users:
-        invitation = Invitation.objects.create(
-            community=community, username=user.username, status=Invitation.PENDING
-        )
-        link = (
-            f"{settings.FRONTEND_URL}/community/{community_id}"
-            f"/invitations/registered/{invitation.id}"
+    with transaction.atomic():
+        invitations = Invitation.objects.bulk_create(
+            [
+                Invitation(
+                    community=community,
+                    username=user.username,
+                    status=Invitation.PENDING,
+                )
+                for user in existing_users
+            ]
         )
-        Notification.objects.create(
-            user=user,
-            message=f"You have been invited to join {community.name} community.",
-            content=payload.note,
-            link=link,
-            category="communities",
-            notification_type="join_request_received",
+        create_notifications(
+            Notification(
+                user=user,
+                message=f"You have been invited to join {community.name} community.",
+                content=payload.note,
+                link=(
+                    f"{settings.FRONTEND_URL}/community/{community_id}"
+                    f"/invitations/registered/{invitation.id}"
+                ),
+                category="communities",
+                notification_type="join_request_received",
+            )
+            for user, invitation in zip(existing_users, invitations)
         )
 
     return 200, {"message": "Invitations sent successfully."}
@@ -115,8 +127,8 @@ def respond_to_invitation(
         invitation.save()
 
         # Optional: Send notification to community admin about the decision
-        Notification.objects.create(
-            user=invitation.community.admins.first(),
+        notify_community(
+            invitation.community,
             message=f"{request.auth.username} has {payload.action}ed the "
             f"invitation to join {invitation.community.name}.",
             category="communities",
@@ -144,7 +156,7 @@ def send_invitations_to_unregistered_users(
     community = Community.objects.get(pk=community_id)
 
     # Check if the requester is an admin of the community
-    if request.auth not in community.admins.all():
+    if not is_admin(request, community):
         return 403, {"message": "Only community admins can send invitations."}
 
     # validate all emails
@@ -197,12 +209,11 @@ def send_invitations_to_unregistered_users(
                 f"{settings.FRONTEND_URL}/community/{community_id}/"
                 f"invitations/unregistered/{invitation.id}/{signed_email}"
             )
-            send_mail(
+            queue_mail(
                 subject=payload.subject,
                 message=message,
                 from_email="no-reply@example.com",
                 recipient_list=[email],
-                fail_silently=False,
             )
         except Exception as e:
             return 500, {"message": str(e)}
@@ -257,8 +268,8 @@ def respond_to_email_invitation(
         invitation.save()
 
         # Optional: Send notification to community admin about the decision
-        Notification.objects.create(
-            user=invitation.community.admins.first(),
+        notify_community(
+            invitation.community,
             message=(
                 f"{user.username} has {payload.action}ed the "
                 f"invitation to join {invitation.community.name}."
@@ -287,7 +298,7 @@ def get_community_invitations(request, community_id: int):
     community = Community.objects.get(pk=community_id)
 
     # Verify if the authenticated user is an admin of this community
-    if request.auth not in community.admins.all():
+    if not is_admin(request, community):
         return 403, {"detail": "Only community admins can access the invitations."}
 
     # Fetch invitations related to the specified community
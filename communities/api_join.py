@@ -5,9 +5,10 @@ from ninja import Router
 from ninja.responses import codes_4xx, codes_5xx
 
 from communities.models import Community, JoinRequest
+from communities.roles import is_admin, is_member
 from communities.schemas import JoinRequestSchema, Message
 from users.auth import JWTAuth
-from users.models import Notification
+from users.notifications import notify, notify_community
 
 router = Router(auth=JWTAuth(), tags=["Join Community"])
 
@@ -22,11 +23,10 @@ Membership Management Endpoints
     response={200: List[JoinRequestSchema], codes_4xx: Message, codes_5xx: Message},
 )
 def get_join_requests(request, community_name: str):
-    user = request.auth
     community = Community.objects.get(name=community_name)
 
     # Check if the user is an admin of the community
-    if not community.admins.filter(id=user.id).exists():
+    if not is_admin(request, community):
         return 403, {
             "message": "You do not have administrative \
                     privileges in this community."
@@ -47,7 +47,7 @@ def join_community(request, community_id: int):
     community = Community.objects.get(id=community_id)
 
     # Check if the user is already a member
-    if community.members.filter(id=user.id).exists():
+    if is_member(request, community):
         return 400, {"message": "You are already a member of this community."}
 
     if community.type == Community.PUBLIC:
@@ -67,13 +67,14 @@ def join_community(request, community_id: int):
         # Create a join request if the community is locked
         JoinRequest.objects.create(user=user, community=community)
 
-        # Send a notification to the admins
-        Notification.objects.create(
-            user=community.admins.first(),
-            community=community,
+        # Send a notification to the admins, folding a burst of requests
+        # into a single unread notification
+        notify_community(
+            community,
             notification_type="join_request_received",
             message=f"New join request from {user.username}",
             link=f"/community/{community.name}/requests",
+            coalesce=f"{{count}} new join requests in {community.name}",
         )
 
         return {"message": "Your request to join the community has been sent."}
@@ -92,7 +93,7 @@ def manage_join_request(
     community = Community.objects.get(id=community_id)
 
     # Check if the user is an admin of the community
-    if not community.admins.filter(id=request.auth.id).exists():
+    if not is_admin(request, community):
         return 403, {"message": "You do not have administrative privileges."}
 
     join_request = JoinRequest.objects.get(id=join_request_id, community=community)
@@ -103,8 +104,8 @@ def manage_join_request(
         community.members.add(join_request.user)
 
         # Send a notification to the user
-        Notification.objects.create(
-            user=join_request.user,
+        notify(
+            [join_request.user_id],
             community=community,
             notification_type="join_request_approved",
             message=f"Your join request to {community.name} has been approved.",
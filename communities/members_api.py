@@ -6,6 +6,7 @@ from ninja import Router
 from ninja.responses import codes_4xx, codes_5xx
 
 from communities.models import Community, CommunityArticle, Membership
+from communities.roles import is_admin
 from communities.schemas import MembersResponse, Message, UserSchema
 from users.auth import JWTAuth
 from users.models import User
@@ -23,7 +24,7 @@ def get_community_members(request, community_name: str):
     community = Community.objects.get(name=community_name)
 
     # Check if the user is an admin of the community
-    if not community.admins.filter(id=request.auth.id).exists():
+    if not is_admin(request, community):
         return 403, {
             "message": "You do not have administrative \
                     privileges in this community."
@@ -125,7 +126,7 @@ def manage_community_member(
     try:
         community = Community.objects.get(id=community_id)
 
-        if not community.admins.filter(id=request.auth.id).exists():
+        if not is_admin(request, community):
             return 403, {
                 "message": "You do not have administrative  \
                     privileges in this community."
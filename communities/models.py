@@ -1,9 +1,22 @@
+from typing import Iterable, Tuple
+
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
+from myapp.cache import bump_cache_version
+from stats.models import DailyStat
 from users.models import HashtagRelation, User
 
+# Cached role set of one user in one community, see communities/roles.py
+ROLES_CACHE_KEY = "community-roles:{}:{}"
+
 
 class Community(models.Model):
     PUBLIC = "public"
@@ -30,14 +43,22 @@ class Community(models.Model):
 
     hashtags = GenericRelation(HashtagRelation, related_query_name="communities")
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"), name="community_name_trgm"
+            ),
+            GinIndex(
+                OpClass(Upper("description"), name="gin_trgm_ops"),
+                name="community_description_trgm",
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
-    def is_member(self, user):
-        return self.members.filter(pk=user.pk).exists()
-
     def __str__(self):
         return self.name
 
@@ -127,3 +148,122 @@ class ArticleSubmissionAssessment(models.Model):
                 fields=["community_article", "assessor"], name="unique_article_assessor"
             )
         ]
+
+
+@receiver(post_save, sender=Community)
+@receiver(post_delete, sender=Community)
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+@receiver(post_save, sender=JoinRequest)
+@receiver(post_delete, sender=JoinRequest)
+@receiver(m2m_changed, sender=Community.members.through)
+@receiver(m2m_changed, sender=Community.admins.through)
+@receiver(m2m_changed, sender=Community.moderators.through)
+@receiver(m2m_changed, sender=Community.reviewers.through)
+def invalidate_communities_cache(sender, **kwargs):
+    bump_cache_version("communities")
+
+
+@receiver(post_save, sender=CommunityArticle)
+@receiver(post_delete, sender=CommunityArticle)
+def invalidate_community_articles_cache(sender, **kwargs):
+    bump_cache_version("communities", "articles")
+
+
+def forget_community_roles(pairs: Iterable[Tuple[int, int]]) -> None:
+    """
+    Drop the cached roles of the given (community id, user id) pairs once
+    the current transaction commits.
+    """
+    keys = [
+        ROLES_CACHE_KEY.format(community_id, user_id) for community_id, user_id in pairs
+    ]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def forget_membership_roles(sender, instance, **kwargs):
+    forget_community_roles([(instance.community_id, instance.user_id)])
+
+
+@receiver(m2m_changed, sender=Community.members.through)
+@receiver(m2m_changed, sender=Community.admins.through)
+@receiver(m2m_changed, sender=Community.moderators.through)
+@receiver(m2m_changed, sender=Community.reviewers.through)
+def forget_changed_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # The cleared rows are only known before they are deleted
+        own, other = (
+            ("user_id", "community_id") if reverse else ("community_id", "user_id")
+        )
+        pk_set = set(
+            sender.objects.filter(**{own: instance.pk}).values_list(other, flat=True)
+        )
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    if reverse:
+        forget_community_roles([(community_id, instance.pk) for community_id in pk_set])
+    else:
+        forget_community_roles([(instance.pk, user_id) for user_id in pk_set])
+
+
+"""
+Signal handlers keeping the daily community statistics in sync
+"""
+
+
+@receiver(post_save, sender=Membership)
+def record_membership_stats(sender, instance, created, **kwargs):
+    if created:
+        DailyStat.record(
+            Community, instance.community_id, DailyStat.MEMBERS, instance.joined_at
+        )
+
+
+@receiver(post_delete, sender=Membership)
+def forget_membership_stats(sender, instance, **kwargs):
+    DailyStat.record(
+        Community, instance.community_id, DailyStat.MEMBERS, instance.joined_at, -1
+    )
+
+
+@receiver(m2m_changed, sender=Community.members.through)
+def record_added_members_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() bulk inserts memberships without post_save, while remove() and
+    # clear() delete them with post_delete
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        for community_id in pk_set:
+            DailyStat.record(Community, community_id, DailyStat.MEMBERS, timezone.now())
+    else:
+        DailyStat.record(
+            Community, instance.pk, DailyStat.MEMBERS, timezone.now(), len(pk_set)
+        )
+
+
+@receiver(post_save, sender=CommunityArticle)
+def record_community_article_stats(sender, instance, created, **kwargs):
+    if created:
+        DailyStat.record(
+            Community, instance.community_id, DailyStat.ARTICLES, instance.submitted_at
+        )
+
+
+@receiver(post_delete, sender=CommunityArticle)
+def forget_community_article_stats(sender, instance, **kwargs):
+    DailyStat.record(
+        Community,
+        instance.community_id,
+        DailyStat.ARTICLES,
+        instance.submitted_at,
+        -1,
+    )
+
+
+@receiver(post_delete, sender=Community)
+def forget_community_stats(sender, instance, **kwargs):
+    DailyStat.forget(Community, instance.pk)
@@ -0,0 +1,74 @@
+"""
+Community roles of the requesting user
+
+`get_roles` loads every role a user holds in a community with one query. The
+result is memoized on the request and shared between requests through the
+cache; membership and role changes drop the cached entries, see the
+receivers in communities/models.py.
+"""
+
+from typing import FrozenSet
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from communities.models import ROLES_CACHE_KEY, Community, Membership
+from users.models import User
+
+MEMBER = "member"
+ADMIN = "admin"
+MODERATOR = "moderator"
+REVIEWER = "reviewer"
+
+ROLE_TABLES = {
+    MEMBER: Membership,
+    ADMIN: Community.admins.through,
+    MODERATOR: Community.moderators.through,
+    REVIEWER: Community.reviewers.through,
+}
+
+
+def get_roles(request, community: Community) -> FrozenSet[str]:
+    """
+    Return the roles of `request.auth` in `community`, empty for anonymous
+    requests.
+    """
+    user = request.auth
+    # OptionalJWTAuth leaves `request.auth` set to True for anonymous requests
+    if not getattr(user, "is_authenticated", False):
+        return frozenset()
+
+    memo = request.__dict__.setdefault("_community_roles", {})
+    if community.pk not in memo:
+        memo[community.pk] = get_user_roles(community, user)
+    return memo[community.pk]
+
+
+def get_user_roles(community: Community, user: User) -> FrozenSet[str]:
+    key = ROLES_CACHE_KEY.format(community.pk, user.pk)
+    roles = cache.get(key)
+    if roles is None:
+        row = (
+            Community.objects.filter(pk=community.pk)
+            .values(
+                **{
+                    role: Exists(
+                        table.objects.filter(community=OuterRef("pk"), user=user.pk)
+                    )
+                    for role, table in ROLE_TABLES.items()
+                }
+            )
+            .first()
+        ) or {}
+        roles = sorted(role for role, present in row.items() if present)
+        cache.set(key, roles, settings.COMMUNITY_ROLES_CACHE_TIMEOUT)
+    return frozenset(roles)
+
+
+def is_member(request, community: Community) -> bool:
+    return MEMBER in get_roles(request, community)
+
+
+def is_admin(request, community: Community) -> bool:
+    return ADMIN in get_roles(request, community)
@@ -1,8 +1,11 @@
+from collections import defaultdict
 from datetime import datetime
 from enum import Enum
-from typing import List, Literal, Optional
+from typing import Iterable, List, Literal, Optional
 
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Exists, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from ninja import ModelSchema, Schema
 
@@ -12,6 +15,7 @@ from communities.models import (
     Community,
     CommunityArticle,
     JoinRequest,
+    Membership,
 )
 from myapp.schemas import FilterType, UserStats
 from users.models import HashtagRelation, User
@@ -78,65 +82,128 @@ class CommunityOut(ModelSchema):
 
     @staticmethod
     def from_orm_with_custom_fields(community: Community, user: Optional[User] = None):
-        tags = [
-            relation.hashtag.name
-            for relation in HashtagRelation.objects.filter(
+        return CommunityOut.from_queryset_batch([community], user)[0]
+
+    @staticmethod
+    def from_queryset_batch(
+        communities: Iterable[Community], user: Optional[User] = None
+    ) -> List["CommunityOut"]:
+        """
+        Serialize a page of communities with a constant number of queries.
+        Counts and the user's roles are computed as annotations on a single
+        query over the page.
+        """
+        communities = list(communities)
+        community_ids = [community.id for community in communities]
+
+        tags = defaultdict(list)
+        for object_id, name in (
+            HashtagRelation.objects.filter(
                 content_type=ContentType.objects.get_for_model(Community),
-                object_id=community.id,
+                object_id__in=community_ids,
             )
-        ]
-        num_published_articles = CommunityArticle.objects.filter(
-            community=community, status="published"
-        ).count()
-        num_articles = CommunityArticle.objects.filter(community=community).count()
-        response_data = CommunityOut(
-            id=community.id,
-            name=community.name,
-            description=community.description,
-            tags=tags,
-            type=community.type,
-            profile_pic_url=(
-                community.profile_pic_url.url if community.profile_pic_url else None
+            .order_by("id")
+            .values_list("object_id", "hashtag__name")
+        ):
+            tags[object_id].append(name)
+
+        annotations = {
+            "num_moderators": count_subquery(Community.moderators.through.objects),
+            "num_reviewers": count_subquery(Community.reviewers.through.objects),
+            "num_members": count_subquery(Membership.objects),
+            "num_published_articles": count_subquery(
+                CommunityArticle.objects.filter(status="published")
             ),
-            banner_pic_url=(
-                community.banner_pic_url.url if community.banner_pic_url else None
-            ),
-            slug=community.slug,
-            created_at=community.created_at,
-            rules=community.rules,
-            about=community.about,
-            num_moderators=community.moderators.count(),
-            num_reviewers=community.reviewers.count(),
-            num_members=community.members.count(),
-            num_published_articles=num_published_articles,
-            num_articles=num_articles,
-        )
+            "num_articles": count_subquery(CommunityArticle.objects),
+        }
+
+        has_user = bool(user) and not isinstance(user, bool)
+        if has_user:
+            annotations.update(
+                is_member=_has_user(Membership.objects, user),
+                is_moderator=_has_user(Community.moderators.through.objects, user),
+                is_reviewer=_has_user(Community.reviewers.through.objects, user),
+                is_admin=_has_user(Community.admins.through.objects, user),
+                join_request_status=Subquery(
+                    JoinRequest.objects.filter(community=OuterRef("pk"), user=user)
+                    .order_by("-id")
+                    .values("status")[:1]
+                ),
+            )
+
+        rows = {
+            row["id"]: row
+            for row in Community.objects.filter(id__in=community_ids)
+            .annotate(**annotations)
+            .values("id", *annotations)
+        }
+
+        items = []
+        for community in communities:
+            row = rows[community.id]
+            items.append(
+                CommunityOut(
+                    id=community.id,
+                    name=community.name,
+                    description=community.description,
+                    tags=tags[community.id],
+                    type=community.type,
+                    profile_pic_url=(
+                        community.profile_pic_url.url
+                        if community.profile_pic_url
+                        else None
+                    ),
+                    banner_pic_url=(
+                        community.banner_pic_url.url
+                        if community.banner_pic_url
+                        else None
+                    ),
+                    slug=community.slug,
+                    created_at=community.created_at,
+                    rules=community.rules,
+                    about=community.about,
+                    num_moderators=row["num_moderators"],
+                    num_reviewers=row["num_reviewers"],
+                    num_members=row["num_members"],
+                    num_published_articles=row["num_published_articles"],
+                    num_articles=row["num_articles"],
+                    is_member=row.get("is_member", False),
+                    is_moderator=row.get("is_moderator", False),
+                    is_reviewer=row.get("is_reviewer", False),
+                    is_admin=row.get("is_admin", False),
+                    join_request_status=row.get("join_request_status"),
+                )
+            )
+
+        return items
 
-        if user and not isinstance(user, bool):
-            response_data.is_member = community.members.filter(id=user.id).exists()
-            response_data.is_moderator = community.moderators.filter(
-                id=user.id
-            ).exists()
-            response_data.is_reviewer = community.reviewers.filter(id=user.id).exists()
-            response_data.is_admin = community.admins.filter(id=user.id).exists()
 
-            # Check if the user has a latest join request
-            join_request = JoinRequest.objects.filter(
-                community=community, user=user
-            ).order_by("-id")
+def count_subquery(queryset: QuerySet):
+    # Correlated COUNT(*) over a table with a `community` foreign key
+    return Coalesce(
+        Subquery(
+            queryset.filter(community=OuterRef("pk"))
+            .order_by()
+            .values("community")
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
 
-            if join_request.exists():
-                response_data.join_request_status = join_request.first().status
 
-        return response_data
+def _has_user(queryset: QuerySet, user: User):
+    return Exists(queryset.filter(community=OuterRef("pk"), user=user))
 
 
 class PaginatedCommunities(Schema):
     items: List[CommunityOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
-    num_pages: int
+    num_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 class UpdateCommunityDetails(Schema):
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from articles.models import Article, Discussion, Review
+from communities.models import Community, CommunityArticle, Membership
+from users.models import User
+
+# Most queries the dashboard may run, however much data there is
+DASHBOARD_QUERY_LIMIT = 4
+
+
+class CommunityDashboardQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.community = Community.objects.create(name="Biology", description="Cells")
+        for index in range(5):
+            user = User.objects.create_user(
+                username=f"member{index}",
+                email=f"member{index}@example.com",
+                password="secret",
+            )
+            Membership.objects.create(user=user, community=cls.community)
+            article = Article.objects.create(
+                title=f"Article {index}",
+                abstract="Cells divide.",
+                submitter=user,
+                submission_type="Public",
+            )
+            CommunityArticle.objects.create(
+                article=article,
+                community=cls.community,
+                status="published" if index % 2 else "submitted",
+                published_at=timezone.now() if index % 2 else None,
+            )
+            Review.objects.create(
+                article=article,
+                user=user,
+                community=cls.community,
+                rating=4,
+                subject="Review",
+                content="Well argued.",
+            )
+            Discussion.objects.create(
+                article=article,
+                author=user,
+                community=cls.community,
+                topic="Question",
+                content="Why?",
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_dashboard_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"/api/communities/{self.community.slug}/dashboard?days=30"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), DASHBOARD_QUERY_LIMIT)
+
+        stats = response.json()
+        self.assertEqual(stats["total_members"], 5)
+        self.assertEqual(stats["total_articles"], 5)
+        self.assertEqual(stats["articles_published"], 2)
+        self.assertEqual(stats["total_reviews"], 5)
+        self.assertEqual(stats["total_discussions"], 5)
+        self.assertEqual(len(stats["recently_published_articles"]), 2)
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from ninja import NinjaAPI, Router
@@ -11,9 +13,13 @@ from communities.api_articles import router as communities_posts_router
 from communities.api_invitation import router as communities_invitation_router
 from communities.api_join import router as communities_join_router
 from communities.members_api import router as communities_admin_router
+from myapp.cache import get_cache_metrics
+from myapp.schemas import Message
 from posts.api import router as posts_router
+from uploads.api import router as uploads_router
 from users.api import router as users_general_router
 from users.api_auth import router as users_router
+from users.auth import JWTAuth
 from users.common_api import router as users_common_router
 
 api = NinjaAPI(docs_url="docs/", title="MyApp API", urls_namespace="api_v1")
@@ -91,3 +97,21 @@ api.add_router("/users", users_parent_router)
 api.add_router("/articles", articles_parent_router)
 api.add_router("/communities", communities_parent_router)
 api.add_router("/posts", posts_router)
+api.add_router("/uploads", uploads_router)
+
+
+"""
+Response cache metrics
+"""
+
+
+@api.get(
+    "/cache-metrics",
+    response={200: Dict[str, Dict[str, int]], 403: Message},
+    auth=JWTAuth(),
+    tags=["Metrics"],
+)
+def cache_metrics(request):
+    if not request.auth.is_staff:
+        return 403, {"message": "Only staff members can view cache metrics."}
+    return 200, get_cache_metrics()
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myapp.settings")
 
 application = get_asgi_application()
+
+# Imported once the app registry is ready
+from myapp.resolvers import warm_resolvers  # noqa: E402
+
+warm_resolvers()
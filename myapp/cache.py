@@ -0,0 +1,130 @@
+"""
+Versioned response cache for anonymous GET endpoints
+
+Every cached endpoint depends on one or more entity families ("articles",
+"communities", ...). Each family has a version counter in the cache which
+the model signal receivers bump on writes; the counters are part of the
+response keys, so a bump makes every dependent response unreachable and it
+simply expires.
+"""
+
+import hashlib
+import json
+from functools import wraps
+from typing import Dict, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from pydantic_core import to_jsonable_python
+
+VERSION_KEY = "response-cache:version:{}"
+METRIC_KEY = "response-cache:{}:{}"
+
+# Names of the cached endpoints, used to report metrics
+CACHED_ENDPOINTS = []
+
+
+def bump_cache_version(*families: str) -> None:
+    """
+    Invalidate the cached responses of `families` once the current
+    transaction commits.
+    """
+
+    def bump():
+        for family in families:
+            key = VERSION_KEY.format(family)
+            # `add` is a no-op when the counter already exists
+            cache.add(key, 0, timeout=None)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # The counter was evicted in between, any fresh value works
+                cache.set(key, 1, timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def _record(name: str, outcome: str) -> None:
+    key = METRIC_KEY.format(name, outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_cache_metrics() -> Dict[str, Dict[str, int]]:
+    """
+    Return the hit and miss counts of every cached endpoint.
+    """
+    keys = {
+        (name, outcome): METRIC_KEY.format(name, outcome)
+        for name in CACHED_ENDPOINTS
+        for outcome in ("hits", "misses")
+    }
+    values = cache.get_many(keys.values())
+    metrics = {}
+    for (name, outcome), key in keys.items():
+        metrics.setdefault(name, {})[outcome] = values.get(key, 0)
+    return metrics
+
+
+def get_cache_versions(families: Sequence[str]) -> str:
+    """
+    Return the current versions of `families` joined into a single string.
+    """
+    versions = cache.get_many([VERSION_KEY.format(family) for family in families])
+    return ".".join(
+        str(versions.get(VERSION_KEY.format(family), 0)) for family in families
+    )
+
+
+def _response_key(name: str, families: Sequence[str], params: dict) -> str:
+    version = get_cache_versions(families)
+    # The view arguments are the parsed query and path parameters with their
+    # defaults filled in, so equivalent URLs share one entry
+    normalized = json.dumps(to_jsonable_python(params), sort_keys=True)
+    digest = hashlib.sha256(normalized.encode()).hexdigest()
+    return f"response-cache:{name}:{version}:{digest}"
+
+
+def cached_response(name: str, families: Sequence[str], timeout: int = None):
+    """
+    Cache the responses that a GET view returns to anonymous users.
+
+    Authenticated requests always run the view since their responses carry
+    per-user flags (is_submitter, is_member, ...).
+    """
+    if timeout is None:
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+    CACHED_ENDPOINTS.append(name)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            # OptionalJWTAuth leaves `request.auth` set to True for anonymous
+            # requests, only real users are authenticated
+            user = getattr(request, "auth", None)
+            if request.method != "GET" or getattr(user, "is_authenticated", False):
+                return view_func(request, *args, **kwargs)
+
+            key = _response_key(name, families, kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                _record(name, "hits")
+                status, data = cached
+                return data if status is None else (status, data)
+
+            _record(name, "misses")
+            response = view_func(request, *args, **kwargs)
+            status, data = response if isinstance(response, tuple) else (None, response)
+            if status in (None, 200):
+                # Store plain JSON data, ninja validates it against the
+                # response schema again when it is served
+                cache.set(key, (status, to_jsonable_python(data)), timeout)
+            return response
+
+        return wrapper
+
+    return decorator
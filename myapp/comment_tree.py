@@ -0,0 +1,69 @@
+"""
+Helpers to assemble nested comment threads in memory
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from django.db.models import Model, QuerySet
+
+from articles.models import ReactionTally
+
+CommentT = TypeVar("CommentT", bound=Model)
+NodeT = TypeVar("NodeT")
+
+
+def get_upvotes(model: type[Model], ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Return the number of likes of each object in `ids` using a single query.
+    """
+    return {
+        object_id: tally.likes_count
+        for object_id, tally in ReactionTally.get_tallies(model, ids).items()
+    }
+
+
+def get_subtree_ids(comments: QuerySet, root: Model) -> List[int]:
+    """
+    Return the ids of `root` and of all its nested replies in `comments`,
+    with one query per level of nesting rather than loading the whole thread.
+    """
+    ids = [root.pk]
+    level = ids
+    while level:
+        level = list(comments.filter(parent_id__in=level).values_list("id", flat=True))
+        ids.extend(level)
+    return ids
+
+
+def build_comment_tree(
+    comments: Iterable[CommentT],
+    make_node: Callable[[CommentT, List[NodeT]], NodeT],
+    roots: Optional[Iterable[CommentT]] = None,
+) -> List[NodeT]:
+    """
+    Turn a flat list holding a whole thread into nested nodes in O(n).
+
+    `make_node(comment, replies)` is called once per comment, after the nodes
+    of its replies have been built. Replies keep the order of `comments`.
+    Returns the nodes of `roots`, which default to the top level comments.
+    """
+    children = defaultdict(list)
+    for comment in comments:
+        children[comment.parent_id].append(comment)
+
+    roots = children[None] if roots is None else list(roots)
+
+    # Walk the thread breadth first, then build it bottom-up so that every
+    # node is created after its replies without recursing.
+    order = list(roots)
+    for comment in order:
+        order.extend(children[comment.id])
+
+    nodes = {}
+    for comment in reversed(order):
+        nodes[comment.id] = make_node(
+            comment, [nodes[reply.id] for reply in children[comment.id]]
+        )
+
+    return [nodes[root.id] for root in roots]
@@ -0,0 +1,154 @@
+"""
+Keyset (cursor) pagination for list endpoints
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from django.db.models import F, Q, QuerySet
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def paginate_by_cursor(
+    queryset: QuerySet,
+    cursor: Optional[str],
+    per_page: int,
+    ordering: Optional[Sequence[str]] = None,
+) -> CursorPage:
+    """
+    Return the page that follows (or precedes) `cursor`. An empty cursor
+    returns the first page.
+
+    `ordering` takes `order_by()` style field names and defaults to the
+    ordering of `queryset`; the primary key is appended as a tie-breaker so
+    every row has a distinct position. Rows are located with a WHERE clause
+    on the last seen key instead of an OFFSET and no COUNT(*) is run, so deep
+    pages cost the same as the first one. NULLs are sorted last, so walking
+    backwards meets them first.
+    """
+    ordering = list(
+        ordering or queryset.query.order_by or queryset.model._meta.ordering
+    )
+    if not any(key.lstrip("-") in ("id", "pk") for key in ordering):
+        descending = bool(ordering) and ordering[0].startswith("-")
+        ordering.append("-pk" if descending else "pk")
+
+    keys = [
+        (f"_cursor_{index}", key.lstrip("-"), key.startswith("-"))
+        for index, key in enumerate(ordering)
+    ]
+    queryset = queryset.annotate(**{alias: F(field) for alias, field, _ in keys})
+    nullable = {
+        alias: getattr(
+            getattr(queryset.query.annotations[alias], "target", None), "null", False
+        )
+        for alias, _, _ in keys
+    }
+
+    values, backwards = _decode_cursor(cursor, len(keys))
+    if backwards:
+        # Walk the reversed ordering and flip the page back afterwards
+        keys = [(alias, field, not descending) for alias, field, descending in keys]
+
+    nulls = {"nulls_first" if backwards else "nulls_last": True}
+    queryset = queryset.order_by(
+        *[
+            (F(alias).desc if descending else F(alias).asc)(
+                **(nulls if nullable[alias] else {})
+            )
+            for alias, _, descending in keys
+        ]
+    )
+    if values is not None:
+        queryset = queryset.filter(_after(keys, values, nullable, backwards))
+
+    items = list(queryset[: per_page + 1])
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    def cursor_for(item, direction_backwards: bool) -> str:
+        return _encode_cursor(
+            [getattr(item, alias) for alias, _, _ in keys], direction_backwards
+        )
+
+    next_cursor = prev_cursor = None
+    if items:
+        if has_more or backwards:
+            next_cursor = cursor_for(items[-1], False)
+        if values is not None and (has_more or not backwards):
+            prev_cursor = cursor_for(items[0], True)
+
+    return CursorPage(items=items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    """
+    Return the ordering values of the row `cursor` points at, for acting on
+    every row up to a page boundary. Dates come back as ISO strings.
+    """
+    values, _ = _decode_cursor(cursor, length)
+    if values is None:
+        raise InvalidCursor("Invalid cursor.")
+    return values
+
+
+def _after(keys, values, nullable, backwards: bool) -> Q:
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with NULLs placed last, or
+    # first when walking the reversed ordering
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (alias, _, descending), value in zip(keys, values):
+        lookup = "lt" if descending else "gt"
+        if value is None:
+            if backwards:
+                # Every non-NULL value follows the leading NULLs
+                condition |= equal & Q(**{f"{alias}__isnull": False})
+            # Otherwise nothing sorts after NULL, so only ties can follow
+            equal &= Q(**{f"{alias}__isnull": True})
+            continue
+        after = Q(**{f"{alias}__{lookup}": value})
+        if nullable[alias] and not backwards:
+            after |= Q(**{f"{alias}__isnull": True})
+        condition |= equal & after
+        equal &= Q(**{alias: value})
+    return condition
+
+
+def _encode_cursor(values: List[Any], backwards: bool) -> str:
+    payload = {
+        "v": [
+            value.isoformat() if isinstance(value, (date, datetime)) else value
+            for value in values
+        ],
+        "b": backwards,
+    }
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, separators=(",", ":")).encode()
+    ).decode()
+
+
+def _decode_cursor(cursor: Optional[str], length: int):
+    if not cursor:
+        return None, False
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values, backwards = payload["v"], payload["b"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor("Invalid cursor.")
+    return values, bool(backwards)
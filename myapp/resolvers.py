@@ -0,0 +1,82 @@
+"""
+Process-local id resolution for content types and hashtags
+
+Both tables are small and rows are never renamed, so every process keeps a
+key -> id map that is loaded once at startup (see `warm_resolvers`) and only
+goes back to the database for keys it hasn't seen yet.
+"""
+
+from typing import Dict, Iterable, Type, Union
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from users.models import Hashtag
+
+# "app_label.model" -> ContentType id
+_content_type_ids: Dict[str, int] = {}
+# Lowercase hashtag name -> Hashtag id
+_hashtag_ids: Dict[str, int] = {}
+
+
+def warm_resolvers() -> None:
+    """
+    Load every content type and hashtag id. Failures are ignored, the maps
+    then fill up on demand.
+    """
+    try:
+        for app_label, model, content_type_id in ContentType.objects.values_list(
+            "app_label", "model", "id"
+        ):
+            _content_type_ids[f"{app_label}.{model}"] = content_type_id
+        _hashtag_ids.update(Hashtag.objects.values_list("name", "id"))
+    except DatabaseError:
+        pass
+
+
+def get_content_type_id(key: Union[str, Type[Model]]) -> int:
+    """
+    Return the ContentType id of a model class or an "app_label.model" key.
+    """
+    if not isinstance(key, str):
+        key = key._meta.label_lower
+    if key not in _content_type_ids:
+        app_label, model = key.split(".")
+        _content_type_ids[key] = ContentType.objects.get_by_natural_key(
+            app_label, model
+        ).id
+    return _content_type_ids[key]
+
+
+def get_content_type(key: Union[str, Type[Model]]) -> ContentType:
+    return ContentType.objects.get_for_id(get_content_type_id(key))
+
+
+def get_hashtag_ids(names: Iterable[str]) -> Dict[str, int]:
+    """
+    Return the ids of the hashtags called `names` (lowercased), creating the
+    missing ones with a single query.
+    """
+    names = list(dict.fromkeys(name.lower() for name in names))
+    ids = {name: _hashtag_ids[name] for name in names if name in _hashtag_ids}
+    missing = [name for name in names if name not in ids]
+    if missing:
+        Hashtag.objects.bulk_create(
+            [Hashtag(name=name) for name in missing], ignore_conflicts=True
+        )
+        created = dict(
+            Hashtag.objects.filter(name__in=missing).values_list("name", "id")
+        )
+        ids.update(created)
+        # Rows inserted by the caller's transaction vanish if it rolls back,
+        # so they are only remembered once committed
+        transaction.on_commit(lambda: _hashtag_ids.update(created))
+    return {name: ids[name] for name in names}
+
+
+@receiver(post_delete, sender=Hashtag)
+def forget_hashtag(sender, instance, **kwargs):
+    _hashtag_ids.pop(instance.name, None)
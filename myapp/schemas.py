@@ -3,7 +3,7 @@ Common schema for all the models
 """
 
 from enum import Enum
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 from ninja import ModelSchema, Schema
 
@@ -27,6 +27,11 @@ class Message(Schema):
     message: str
 
 
+class AutocompleteOut(Schema):
+    id: int
+    name: str
+
+
 class UserStats(ModelSchema):
     reputation_score: int
     reputation_level: str
@@ -75,6 +80,43 @@ class UserStats(ModelSchema):
             contributed_posts=contributed_posts,
         )
 
+    @staticmethod
+    def from_models_basic(users: Iterable[User]) -> Dict[int, "UserStats"]:
+        """
+        Build basic UserStats for many users at once, keyed by user id.
+        Reputations are fetched in a single query and missing ones are created
+        in bulk, mirroring the get_or_create done by `from_model`.
+        """
+        users = {user.id: user for user in users}
+        reputations = {
+            reputation.user_id: reputation
+            for reputation in Reputation.objects.filter(user_id__in=users)
+        }
+        missing = [
+            Reputation(user_id=user_id)
+            for user_id in users
+            if user_id not in reputations
+        ]
+        if missing:
+            Reputation.objects.bulk_create(missing, ignore_conflicts=True)
+            reputations.update(
+                (reputation.user_id, reputation)
+                for reputation in Reputation.objects.filter(
+                    user_id__in=[reputation.user_id for reputation in missing]
+                )
+            )
+
+        return {
+            user.id: UserStats(
+                id=user.id,
+                username=user.username,
+                profile_pic_url=user.profile_pic_url,
+                reputation_score=reputations[user.id].score,
+                reputation_level=reputations[user.id].level,
+            )
+            for user in users.values()
+        }
+
 
 class FilterType(str, Enum):
     POPULAR = "popular"
@@ -0,0 +1,85 @@
+"""
+Typo-tolerant search helpers backed by pg_trgm indexes
+
+On PostgreSQL the searched columns carry `gin_trgm_ops` indexes on
+UPPER(column), the expression Django's icontains/istartswith lookups compare
+against, so substring and similarity matches are both served by one index.
+Other databases fall back to case-insensitive substring matching with a
+simple prefix-first ranking.
+"""
+
+from typing import Sequence
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, QuerySet, Value, When
+from django.db.models.functions import Greatest, Length, Upper
+
+
+def _is_postgres(queryset: QuerySet) -> bool:
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def _similar(field: str, search: str) -> TrigramWordSimilar:
+    # Trigrams are case-insensitive, comparing UPPER() values only lets the
+    # planner use the expression index
+    return TrigramWordSimilar(Upper(F(field)), Upper(Value(search)))
+
+
+def _similarity(search: str, fields: Sequence[str]):
+    scores = [TrigramWordSimilarity(search, field) for field in fields]
+    return Greatest(*scores) if len(scores) > 1 else scores[0]
+
+
+def _substring_rank(search: str, field: str):
+    return Case(
+        When(**{f"{field}__iexact": search}, then=Value(1.0)),
+        When(**{f"{field}__istartswith": search}, then=Value(0.75)),
+        When(**{f"{field}__icontains": search}, then=Value(0.5)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def fuzzy_search(queryset: QuerySet, fields: Sequence[str], search: str) -> QuerySet:
+    """
+    Keep the rows where any of `fields` contains `search` or closely matches
+    it, annotated with a `search_similarity` score between 0 and 1.
+    """
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__icontains": search})
+
+    if _is_postgres(queryset):
+        for field in fields:
+            condition |= Q(_similar(field, search))
+        similarity = _similarity(search, fields)
+    else:
+        scores = [_substring_rank(search, field) for field in fields]
+        similarity = Greatest(*scores) if len(scores) > 1 else scores[0]
+
+    return queryset.filter(condition).annotate(search_similarity=similarity)
+
+
+def autocomplete(
+    queryset: QuerySet, field: str, search: str, limit: int = 10
+) -> QuerySet:
+    """
+    Return the `limit` values of `field` that best complete `search`,
+    tolerating typos on PostgreSQL.
+    """
+    if _is_postgres(queryset):
+        return (
+            queryset.filter(
+                Q(**{f"{field}__istartswith": search}) | Q(_similar(field, search))
+            )
+            .annotate(search_similarity=TrigramWordSimilarity(search, field))
+            .order_by("-search_similarity", Length(field), field)[:limit]
+        )
+
+    return (
+        queryset.filter(**{f"{field}__icontains": search})
+        .annotate(search_similarity=_substring_rank(search, field))
+        .order_by("-search_similarity", Length(field), field)[:limit]
+    )
@@ -42,12 +42,16 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "ninja",
     "users",
     "communities",
     "articles",
     "posts",
+    "tasks",
+    "stats",
+    "uploads",
     "storages",
 ]
 
@@ -134,6 +138,48 @@ if not DEBUG:
     print(config("DATABASE_URL"))
     DATABASES["default"] = dj_database_url.parse(config("DATABASE_URL"))
 
+# Redis in production, process local memory otherwise
+if config("REDIS_URL", default=None):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": config("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Seconds an anonymous GET response stays cached, see myapp/cache.py
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=300, cast=int)
+
+# Seconds an authenticated user's row stays cached, 0 disables the cache,
+# see users/auth.py
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=60, cast=int)
+
+# Seconds a user's community roles stay cached, see communities/roles.py
+COMMUNITY_ROLES_CACHE_TIMEOUT = config(
+    "COMMUNITY_ROLES_CACHE_TIMEOUT", default=600, cast=int
+)
+
+# Background task worker, see tasks/queue.py. A running task whose worker
+# hasn't finished it TASK_LEASE_SECONDS after starting it is handed out again.
+TASK_POLL_INTERVAL = config("TASK_POLL_INTERVAL", default=2, cast=float)
+TASK_LEASE_SECONDS = config("TASK_LEASE_SECONDS", default=600, cast=int)
+
+# See users/notifications.py. Repeated unread events within the window are
+# coalesced, audiences over the limit are notified by the task worker.
+NOTIFICATION_COALESCE_SECONDS = config(
+    "NOTIFICATION_COALESCE_SECONDS", default=3600, cast=int
+)
+NOTIFICATION_INLINE_LIMIT = config("NOTIFICATION_INLINE_LIMIT", default=200, cast=int)
+
+# Precomputed neighbours kept per article, see articles/similarity.py
+ARTICLE_SIMILARITY_TOP_K = config("ARTICLE_SIMILARITY_TOP_K", default=50, cast=int)
+
+# Hours for an article or post hot score to halve, see the decay_hot_scores
+# command which should run every hour
+HOT_SCORE_HALF_LIFE_HOURS = config("HOT_SCORE_HALF_LIFE_HOURS", default=24, cast=float)
+
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
@@ -155,6 +201,21 @@ AWS_S3_REGION_NAME = config("AWS_S3_REGION_NAME")
 AWS_S3_CUSTOM_DOMAIN = f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com"
 AWS_S3_FILE_OVERWRITE = False
 
+# Direct-to-storage uploads, see uploads/sessions.py
+UPLOAD_URL_EXPIRY_SECONDS = config("UPLOAD_URL_EXPIRY_SECONDS", default=900, cast=int)
+UPLOAD_MAX_PDF_SIZE = config("UPLOAD_MAX_PDF_SIZE", default=50 * 1024 * 1024, cast=int)
+UPLOAD_MAX_IMAGE_SIZE = config(
+    "UPLOAD_MAX_IMAGE_SIZE", default=5 * 1024 * 1024, cast=int
+)
+# Resumable uploads stay open longer, and every chunk but the last must
+# reach the smallest S3 multipart part size
+UPLOAD_RESUMABLE_EXPIRY_SECONDS = config(
+    "UPLOAD_RESUMABLE_EXPIRY_SECONDS", default=86400, cast=int
+)
+UPLOAD_CHUNK_MIN_SIZE = config(
+    "UPLOAD_CHUNK_MIN_SIZE", default=5 * 1024 * 1024, cast=int
+)
+
 
 STORAGES = {
     # Media File (PDFs, images, etc.) Management
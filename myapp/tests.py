@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+
+from articles.models import Article
+from communities.models import Community, CommunityArticle
+from myapp.pagination import paginate_by_cursor
+from users.models import User
+
+
+class CursorPaginationNullableKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(
+            username="author", email="author@example.com", password="secret"
+        )
+        community = Community.objects.create(name="Biology", description="Cells")
+        now = timezone.now()
+        for index in range(8):
+            article = Article.objects.create(
+                title=f"Article {index}",
+                abstract="Cells divide.",
+                submitter=user,
+                submission_type="Public",
+            )
+            # Every other article is unpublished, with ties among the others
+            CommunityArticle.objects.create(
+                article=article,
+                community=community,
+                status="published" if index % 2 else "submitted",
+                published_at=now - timedelta(days=index // 4) if index % 2 else None,
+            )
+
+    def walk(self, ordering, per_page):
+        queryset = CommunityArticle.objects.all()
+        # The listing sorts NULLs last in either direction
+        expected = list(
+            CommunityArticle.objects.order_by(
+                *[
+                    (F(key[1:]).desc if key.startswith("-") else F(key).asc)(
+                        nulls_last=True
+                    )
+                    for key in ordering
+                ]
+            ).values_list("id", flat=True)
+        )
+
+        pages, cursor = [], None
+        while True:
+            page = paginate_by_cursor(queryset, cursor, per_page, ordering)
+            pages.append(page)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual([item.id for page in pages for item in page.items], expected)
+
+        # Every page's prev_cursor leads to the rows right before it
+        start = 0
+        for page in pages:
+            if start:
+                previous = paginate_by_cursor(
+                    queryset, page.prev_cursor, per_page, ordering
+                )
+                self.assertEqual(
+                    [item.id for item in previous.items],
+                    expected[max(start - per_page, 0) : start],
+                )
+            else:
+                self.assertIsNone(page.prev_cursor)
+            start += len(page.items)
+
+    def test_descending_nullable_key(self):
+        for per_page in (1, 2, 3):
+            self.walk(["-published_at", "-id"], per_page)
+
+    def test_ascending_nullable_key(self):
+        for per_page in (1, 2, 3):
+            self.walk(["published_at", "id"], per_page)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myapp.settings")
 
 application = get_wsgi_application()
+
+# Imported once the app registry is ready
+from myapp.resolvers import warm_resolvers  # noqa: E402
+
+warm_resolvers()
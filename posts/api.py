@@ -3,11 +3,16 @@ from typing import List, Optional
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Q
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse
 from ninja import Query, Router
 
 from articles.models import Reaction
+from myapp.cache import cached_response
+from myapp.etag import check_etag, compute_etag
+from myapp.pagination import InvalidCursor, paginate_by_cursor
+from myapp.resolvers import get_content_type_id
 from posts.models import Comment, Post
 from posts.schemas import (
     CommentCreateSchema,
@@ -20,7 +25,8 @@ from posts.schemas import (
     ReactionSchema,
 )
 from users.auth import JWTAuth, OptionalJWTAuth
-from users.models import Hashtag, HashtagRelation, User
+from users.hashtags import sync_hashtags
+from users.models import HashtagRelation, User
 
 router = Router(tags=["Posts"])
 
@@ -35,12 +41,7 @@ def create_post(request: HttpRequest, data: PostCreateSchema):
     post = Post.objects.create(author=user, title=data.title, content=data.content)
 
     # Create or retrieve hashtags and create relations
-    content_type = ContentType.objects.get_for_model(Post)
-    for hashtag_name in data.hashtags:
-        hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name.lower())
-        HashtagRelation.objects.create(
-            hashtag=hashtag, content_type=content_type, object_id=post.id
-        )
+    sync_hashtags(post, data.hashtags)
 
     return 201, PostOut.resolve_post(post, user)
 
@@ -48,14 +49,18 @@ def create_post(request: HttpRequest, data: PostCreateSchema):
 @router.get(
     "/", response={200: PaginatedPostsResponse, 400: Message}, auth=OptionalJWTAuth
 )
+@cached_response("posts", families=["posts"])
 def list_posts(
     request: HttpRequest,
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    sort_by: str = Query("created_at", enum=["created_at", "title", "upvotes"]),
+    sort_by: str = Query(
+        "created_at", enum=["created_at", "title", "upvotes", "popular"]
+    ),
     sort_order: str = Query("desc", enum=["asc", "desc"]),
     hashtag: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
 ):
     user: Optional[User] = None if not request.auth else request.auth
     posts = Post.objects.filter(is_deleted=False)
@@ -75,12 +80,29 @@ def list_posts(
 
     # Apply sorting
     order_prefix = "-" if sort_order == "desc" else ""
-    posts = posts.order_by(f"{order_prefix}{sort_by}")
+    # Posts have no upvote count, "upvotes" is kept as an alias of "popular"
+    sort_field = "hot_score" if sort_by in ("upvotes", "popular") else sort_by
+    posts = posts.order_by(f"{order_prefix}{sort_field}", f"{order_prefix}id")
+
+    if cursor is not None:
+        try:
+            cursor_page = paginate_by_cursor(
+                posts.select_related("author"), cursor, per_page
+            )
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+
+        return PaginatedPostsResponse(
+            items=PostOut.resolve_posts(cursor_page.items, user),
+            per_page=per_page,
+            next_cursor=cursor_page.next_cursor,
+            prev_cursor=cursor_page.prev_cursor,
+        )
 
-    paginator = Paginator(posts, per_page)
+    paginator = Paginator(posts.select_related("author"), per_page)
     page_obj = paginator.get_page(page)
     return PaginatedPostsResponse(
-        items=[PostOut.resolve_post(post, user) for post in page_obj],
+        items=PostOut.resolve_posts(page_obj, user),
         total=paginator.count,
         page=page,
         per_page=per_page,
@@ -89,9 +111,17 @@ def list_posts(
 
 
 @router.get("/{post_id}/", response={200: PostOut, 404: Message}, auth=OptionalJWTAuth)
-def get_post(request, post_id: int):
+def get_post(request, response: HttpResponse, post_id: int):
     current_user: Optional[User] = None if not request.auth else request.auth
     post = Post.objects.get(id=post_id)
+
+    # Reactions and comments bump the "posts" version
+    etag = compute_etag(
+        "post", [post.pk, post.updated_at], ["posts", "users"], request.auth
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
     return PostOut.resolve_post(post, current_user)
 
 
@@ -110,27 +140,20 @@ def update_post(request: HttpRequest, post_id: int, data: PostCreateSchema):
     post.save()
 
     # Update hashtags
-    content_type = ContentType.objects.get_for_model(Post)
-    HashtagRelation.objects.filter(
-        content_type=content_type, object_id=post.id
-    ).delete()
-    for hashtag_name in data.hashtags:
-        hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name.lower())
-        HashtagRelation.objects.create(
-            hashtag=hashtag, content_type=content_type, object_id=post.id
-        )
+    sync_hashtags(post, data.hashtags)
 
     return 200, PostOut.resolve_post(post, user)
 
 
 @router.delete("/{post_id}/", response={204: None, 403: str, 404: str}, auth=JWTAuth())
+@transaction.atomic
 def delete_post(request, post_id: int):
     user = request.auth
     post = Post.objects.get(id=post_id, author=user)
 
     # Delete hashtags and reactions associated with the post
     content_type = ContentType.objects.get_for_model(Post)
-    Hashtag.objects.filter(content_type=content_type, object_id=post.id).delete()
+    sync_hashtags(post, [])
     Reaction.objects.filter(content_type=content_type, object_id=post.id).delete()
 
     post.content = "[deleted]"
@@ -142,15 +165,8 @@ def delete_post(request, post_id: int):
 @router.get("/{post_id}/comments/", response=List[CommentOut], auth=OptionalJWTAuth)
 def list_post_comments(request, post_id: int):
     post = Post.objects.get(id=post_id)
-    comments = (
-        Comment.objects.filter(post=post, parent=None)
-        .select_related("author")
-        .order_by("created_at")
-    )
     current_user: Optional[User] = None if not request.auth else request.auth
-    return [
-        CommentOut.from_orm_with_replies(comment, current_user) for comment in comments
-    ]
+    return CommentOut.from_thread(Comment.objects.filter(post=post), current_user)
 
 
 @router.post(
@@ -221,6 +237,7 @@ def update_comment(request, comment_id: int, payload: CommentUpdateSchema):
 @router.delete(
     "/comments/{comment_id}/", response={204: None, 403: Message}, auth=JWTAuth()
 )
+@transaction.atomic
 def delete_comment(request, comment_id: int):
     user = request.auth
     comment = Comment.objects.get(id=comment_id)
@@ -231,7 +248,7 @@ def delete_comment(request, comment_id: int):
 
     # Delete reactions associated with the comment
     Reaction.objects.filter(
-        content_type__model="comment", object_id=comment.id
+        content_type_id=get_content_type_id(Comment), object_id=comment.id
     ).delete()
 
     # Logically delete the comment by clearing its content and marking it as deleted
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:19
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Post = apps.get_model('posts', 'Post')
+    Reaction = apps.get_model('articles', 'Reaction')
+
+    # Frozen copy of HOT_SCORE_WEIGHTS
+    now = timezone.now()
+    half_life = settings.HOT_SCORE_HALF_LIFE_HOURS * 3600
+    scores = defaultdict(float)
+
+    def add(weight, rows):
+        for post_id, created_at in rows.iterator():
+            scores[post_id] += weight * 0.5 ** (max((now - created_at).total_seconds(), 0) / half_life)
+
+    content_type = ContentType.objects.filter(app_label='posts', model='post').first()
+    if content_type is not None:
+        add(1.0, Reaction.objects.filter(content_type=content_type, vote=1).values_list('object_id', 'created_at'))
+    add(1.0, Comment.objects.values_list('post_id', 'created_at'))
+
+    posts = [Post(pk=post_id, hot_score=score) for post_id, score in scores.items()]
+    Post.objects.bulk_update(posts, ['hot_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0021_article_hot_score'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('posts', '0002_comment_is_deleted_post_is_deleted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-hot_score', '-id'], name='post_hot_score'),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
-from articles.models import Reaction
+from articles.models import Reaction, hot_score_weight
+from myapp.cache import bump_cache_version
 from users.models import HashtagRelation, User
 
 
@@ -14,12 +19,37 @@ class Post(models.Model):
     reactions = GenericRelation(Reaction)
     hashtags = GenericRelation(HashtagRelation, related_query_name="posts")
     is_deleted = models.BooleanField(default=False)
+    # Time-decayed engagement, see `articles.models.HOT_SCORE_WEIGHTS`
+    hot_score = models.FloatField(default=0)
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-hot_score", "-id"],
+                name="post_hot_score",
+                condition=Q(is_deleted=False),
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        # The hot score is only changed through UPDATE expressions
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "hot_score"
+            ]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def update_hot_score(post_filter: Q, delta: float) -> None:
+        Post.objects.filter(post_filter).update(
+            hot_score=Greatest(F("hot_score") + delta, 0)
+        )
 
 
 class Comment(models.Model):
@@ -43,3 +73,24 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_posts_cache(sender, **kwargs):
+    bump_cache_version("posts")
+
+
+@receiver(post_save, sender=Comment)
+def add_comment_hot_score(sender, instance, created, **kwargs):
+    if created:
+        Post.update_hot_score(Q(pk=instance.post_id), hot_score_weight("comment"))
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_hot_score(sender, instance, **kwargs):
+    Post.update_hot_score(
+        Q(pk=instance.post_id), -hot_score_weight("comment", instance.created_at)
+    )
@@ -1,8 +1,13 @@
-from typing import List, Literal, Optional
+from collections import defaultdict
+from typing import Iterable, List, Literal, Optional
 
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
 from ninja import Field, ModelSchema, Schema
 
+from articles.models import ReactionTally
+from myapp.comment_tree import build_comment_tree, get_subtree_ids, get_upvotes
 from myapp.schemas import UserStats
 from posts.models import Comment, Post
 from users.models import HashtagRelation, User
@@ -27,32 +32,83 @@ class PostOut(ModelSchema):
 
     @staticmethod
     def resolve_post(post: Post, current_user: Optional[User]):
-        return {
-            "id": post.id,
-            "title": post.title,
-            "content": post.content,
-            "created_at": post.created_at,
-            "author": UserStats.from_model(post.author, basic_details=True),
-            "upvotes": post.reactions.filter(vote=1).count(),
-            "comments_count": Comment.objects.filter(post=post).count(),
-            "hashtags": [
-                relation.hashtag.name
-                for relation in HashtagRelation.objects.filter(
-                    content_type=ContentType.objects.get_for_model(Post),
-                    object_id=post.id,
-                )
-            ],
-            "is_author": current_user == post.author if current_user else False,
-        }
+        return PostOut.resolve_posts([post], current_user)[0]
+
+    @staticmethod
+    def resolve_posts(
+        posts: Iterable[Post], current_user: Optional[User]
+    ) -> List[dict]:
+        """
+        Resolve a page of posts with a fixed number of queries: likes come
+        from the reaction tallies, comment counts from one annotated query,
+        hashtags and author reputations are loaded for the whole page at once.
+        """
+        posts = list(posts)
+        post_ids = [post.id for post in posts]
+        content_type = ContentType.objects.get_for_model(Post)
+
+        tallies = ReactionTally.get_tallies(content_type, post_ids)
+        comments_count = dict(
+            Post.objects.filter(id__in=post_ids)
+            .annotate(
+                comments_count=_count_subquery(
+                    Comment.objects.filter(post=OuterRef("pk")), "post"
+                ),
+            )
+            .values_list("id", "comments_count")
+        )
+
+        hashtags = defaultdict(list)
+        for object_id, name in (
+            HashtagRelation.objects.filter(
+                content_type=content_type, object_id__in=post_ids
+            )
+            .order_by("id")
+            .values_list("object_id", "hashtag__name")
+        ):
+            hashtags[object_id].append(name)
+
+        authors = {post.author_id: post.author for post in posts}
+        users = UserStats.from_models_basic(authors.values())
+        current_user_id = getattr(current_user, "id", None)
+
+        return [
+            {
+                "id": post.id,
+                "title": post.title,
+                "content": post.content,
+                "created_at": post.created_at,
+                "author": users[post.author_id],
+                "upvotes": tallies[post.id].likes_count,
+                "comments_count": comments_count[post.id],
+                "hashtags": hashtags[post.id],
+                "is_author": post.author_id == current_user_id,
+            }
+            for post in posts
+        ]
+
+
+def _count_subquery(queryset: QuerySet, group_by: str):
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(count=Count("*"))
+            .values("count")
+        ),
+        0,
+    )
 
 
 # Todo: Create Generic Model for PaginatedResponse
 class PaginatedPostsResponse(Schema):
     items: List[PostOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
-    num_pages: int
+    num_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 class Message(Schema):
@@ -71,18 +127,41 @@ class CommentOut(ModelSchema):
 
     @staticmethod
     def from_orm_with_replies(comment: Comment, current_user: Optional[User]):
-        return CommentOut(
-            id=comment.id,
-            author=UserStats.from_model(comment.author, basic_details=True),
-            content=comment.content,
-            created_at=comment.created_at,
-            upvotes=comment.reactions.filter(vote=1).count(),
-            replies=[
-                CommentOut.from_orm_with_replies(reply, current_user)
-                for reply in comment.replies.all()
-            ],
-            is_author=(comment.author == current_user) if current_user else False,
-        )
+        thread = Comment.objects.filter(post_id=comment.post_id)
+        return CommentOut.from_thread(
+            thread.filter(pk__in=get_subtree_ids(thread, comment)),
+            current_user,
+            roots=[comment],
+        )[0]
+
+    @staticmethod
+    def from_thread(
+        comments: QuerySet,
+        current_user: Optional[User],
+        roots: Optional[List[Comment]] = None,
+    ) -> List["CommentOut"]:
+        """
+        Serialize the comments of a single post as nested threads, loading
+        authors and upvotes in bulk.
+        """
+        comments = list(comments.select_related("author").order_by("created_at", "id"))
+
+        users = UserStats.from_models_basic(comment.author for comment in comments)
+        upvotes = get_upvotes(Comment, [comment.id for comment in comments])
+        current_user_id = getattr(current_user, "id", None)
+
+        def make_node(comment: Comment, replies: List["CommentOut"]):
+            return CommentOut(
+                id=comment.id,
+                author=users[comment.author_id],
+                content=comment.content,
+                created_at=comment.created_at,
+                upvotes=upvotes.get(comment.id, 0),
+                replies=replies,
+                is_author=comment.author_id == current_user_id,
+            )
+
+        return build_comment_tree(comments, make_node, roots)
 
 
 class CommentCreateSchema(Schema):
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from articles.models import Article, Reaction, Review
+from communities.models import Community, CommunityArticle, Membership
+from myapp.resolvers import get_content_type_id
+from stats.models import DailyStat
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily article and community statistics from scratch."
+
+    def handle(self, *args, **options):
+        sources = [
+            (
+                Article,
+                DailyStat.REVIEWS,
+                Review.objects.all(),
+                "article_id",
+                "created_at",
+            ),
+            (
+                Article,
+                DailyStat.COMMUNITY_REVIEWS,
+                Review.objects.filter(community__isnull=False),
+                "article_id",
+                "created_at",
+            ),
+            (
+                Article,
+                DailyStat.LIKES,
+                Reaction.objects.filter(
+                    content_type_id=get_content_type_id(Article),
+                    object_id__in=Article.objects.values("id"),
+                    vote=Reaction.LIKE,
+                ),
+                "object_id",
+                "created_at",
+            ),
+            (
+                Community,
+                DailyStat.MEMBERS,
+                Membership.objects.all(),
+                "community_id",
+                "joined_at",
+            ),
+            (
+                Community,
+                DailyStat.ARTICLES,
+                CommunityArticle.objects.all(),
+                "community_id",
+                "submitted_at",
+            ),
+        ]
+
+        for model, metric, queryset, subject, happened_at in sources:
+            # Grouped by the day in the current time zone, as `record` does
+            rows = (
+                queryset.order_by()
+                .values(subject, f"{happened_at}__date")
+                .annotate(count=Count("id"))
+                .values_list(subject, f"{happened_at}__date", "count")
+            )
+            content_type_id = get_content_type_id(model)
+            with transaction.atomic():
+                DailyStat.objects.filter(
+                    content_type_id=content_type_id, metric=metric
+                ).delete()
+                stats = DailyStat.objects.bulk_create(
+                    (
+                        DailyStat(
+                            content_type_id=content_type_id,
+                            object_id=object_id,
+                            metric=metric,
+                            day=day,
+                            count=count,
+                        )
+                        for object_id, day, count in rows.iterator()
+                    ),
+                    batch_size=1000,
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {len(stats)} daily {metric} rows.")
+            )
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    CommunityArticle = apps.get_model('communities', 'CommunityArticle')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    DailyStat = apps.get_model('stats', 'DailyStat')
+    Membership = apps.get_model('communities', 'Membership')
+    Reaction = apps.get_model('articles', 'Reaction')
+    Review = apps.get_model('articles', 'Review')
+
+    article_type, _ = ContentType.objects.get_or_create(app_label='articles', model='article')
+    community_type, _ = ContentType.objects.get_or_create(app_label='communities', model='community')
+    sources = [
+        (article_type, 'reviews', Review.objects.all(), 'article_id', 'created_at'),
+        (article_type, 'community_reviews', Review.objects.filter(community__isnull=False), 'article_id', 'created_at'),
+        (
+            article_type,
+            'likes',
+            Reaction.objects.filter(content_type=article_type, object_id__in=Article.objects.values('id'), vote=1),
+            'object_id',
+            'created_at',
+        ),
+        (community_type, 'members', Membership.objects.all(), 'community_id', 'joined_at'),
+        (community_type, 'articles', CommunityArticle.objects.all(), 'community_id', 'submitted_at'),
+    ]
+    for content_type, metric, queryset, subject, happened_at in sources:
+        rows = (
+            queryset.order_by()
+            .values(subject, f'{happened_at}__date')
+            .annotate(count=Count('id'))
+            .values_list(subject, f'{happened_at}__date', 'count')
+        )
+        DailyStat.objects.bulk_create(
+            (
+                DailyStat(content_type=content_type, object_id=object_id, metric=metric, day=day, count=count)
+                for object_id, day, count in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('articles', '0021_article_hot_score'),
+        ('communities', '0009_trigram_indexes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('metric', models.CharField(choices=[('reviews', 'Reviews'), ('community_reviews', 'Reviews within a community'), ('likes', 'Likes'), ('members', 'Members joined'), ('articles', 'Articles submitted')], max_length=20)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id', 'metric', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
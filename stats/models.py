@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Type
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from myapp.resolvers import get_content_type_id
+
+
+class DailyStat(models.Model):
+    """
+    Number of events of one metric that happened to an article or community
+    on one day, kept in sync by the receivers of the counted models and
+    rebuilt by `manage.py rebuild_daily_stats`.
+
+    Events are counted on the day they happened, so deleting a counted row
+    later decrements that day rather than today.
+    """
+
+    # Article metrics
+    REVIEWS = "reviews"
+    COMMUNITY_REVIEWS = "community_reviews"
+    LIKES = "likes"
+    # Community metrics
+    MEMBERS = "members"
+    ARTICLES = "articles"
+    METRIC_CHOICES = [
+        (REVIEWS, "Reviews"),
+        (COMMUNITY_REVIEWS, "Reviews within a community"),
+        (LIKES, "Likes"),
+        (MEMBERS, "Members joined"),
+        (ARTICLES, "Articles submitted"),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Also the index behind date range reads
+        unique_together = ("content_type", "object_id", "metric", "day")
+
+    def __str__(self):
+        return (
+            f"{self.content_type_id} {self.object_id} {self.metric} "
+            f"{self.day}: {self.count}"
+        )
+
+    @classmethod
+    def record(
+        cls,
+        model: Type[models.Model],
+        object_id: int,
+        metric: str,
+        happened_at: datetime,
+        delta: int = 1,
+    ) -> None:
+        """
+        Atomically shift the count of `metric` on the day of `happened_at`,
+        e.g. `DailyStat.record(Article, 1, DailyStat.LIKES, like.created_at)`.
+        """
+        if not delta or object_id is None:
+            return
+        key = dict(
+            content_type_id=get_content_type_id(model),
+            object_id=object_id,
+            metric=metric,
+            day=timezone.localdate(happened_at),
+        )
+        # Only increments create rows, a decrement can come from the cascade
+        # of the article or community being deleted
+        if delta > 0:
+            cls.objects.bulk_create([cls(**key)], ignore_conflicts=True)
+        cls.objects.filter(**key).update(count=Greatest(F("count") + delta, 0))
+
+    @classmethod
+    def get_series(
+        cls,
+        model: Type[models.Model],
+        object_id: int,
+        metrics: Iterable[str],
+        start: date,
+        end: Optional[date] = None,
+    ) -> Dict[str, Dict[date, int]]:
+        """
+        Return day -> count for every metric in `metrics` between `start` and
+        `end` (inclusive, defaults to today) with a single query. Days without
+        events are left out.
+        """
+        series = {metric: {} for metric in metrics}
+        rows = cls.objects.filter(
+            content_type_id=get_content_type_id(model),
+            object_id=object_id,
+            metric__in=series,
+            day__range=(start, end or timezone.localdate()),
+            count__gt=0,
+        ).values_list("metric", "day", "count")
+        for metric, day, count in rows:
+            series[metric][day] = count
+        return series
+
+    @classmethod
+    def forget(cls, model: Type[models.Model], object_id: int) -> None:
+        cls.objects.filter(
+            content_type_id=get_content_type_id(model), object_id=object_id
+        ).delete()
+
+
+def cumulative_counts(total: int, daily: Dict[date, int], days: int) -> List[Dict]:
+    """
+    Turn the daily counts of the last `days` days into running totals that
+    end at `total` today, oldest day first.
+    """
+    today = timezone.localdate()
+    counts = []
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        counts.append({"date": day, "count": total})
+        total -= daily.get(day, 0)
+    counts.reverse()
+    return counts
@@ -0,0 +1,59 @@
+"""
+Outgoing email, sent by the task worker instead of inside the request
+"""
+
+import traceback
+from typing import Dict, List, Optional
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from tasks.queue import enqueue, task
+
+
+@task(max_attempts=5, retry_backoff=60, concurrency=2, batch_size=50)
+def send_queued_mail(payloads: List[Dict]) -> List[Optional[str]]:
+    # One SMTP connection for the whole batch, but every message is sent and
+    # retried on its own so that a failure never sends the others twice
+    messages = []
+    for payload in payloads:
+        message = EmailMultiAlternatives(
+            subject=payload["subject"],
+            body=payload["message"],
+            from_email=payload["from_email"],
+            to=payload["recipient_list"],
+        )
+        if payload.get("html_message"):
+            message.attach_alternative(payload["html_message"], "text/html")
+        messages.append(message)
+
+    errors = []
+    with get_connection(fail_silently=False) as connection:
+        for message in messages:
+            try:
+                connection.send_messages([message])
+            except Exception:
+                errors.append(traceback.format_exc())
+            else:
+                errors.append(None)
+    return errors
+
+
+def queue_mail(
+    subject: str,
+    message: str,
+    from_email: Optional[str],
+    recipient_list: List[str],
+    html_message: Optional[str] = None,
+) -> None:
+    """
+    Same arguments as `django.core.mail.send_mail`, but the email is sent by
+    `manage.py run_worker` once the current transaction commits.
+    """
+    enqueue(
+        send_queued_mail,
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient_list=list(recipient_list),
+        html_message=html_message,
+    )
@@ -0,0 +1,54 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.queue import run_pending_tasks
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the tasks that are due now and exit.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Number of tasks claimed per round.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.TASK_POLL_INTERVAL,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+
+        def stop(signum, frame):
+            # Finish the current round before exiting
+            self.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        total = 0
+        while not self.stopping:
+            ran = run_pending_tasks(worker_id, options["limit"])
+            total += ran
+            if options["once"] and ran < options["limit"]:
+                break
+            if not ran:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {total} tasks."))
@@ -0,0 +1,64 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """
+    A unit of background work, run by `manage.py run_worker`.
+
+    Finished tasks are deleted, tasks that exhausted their attempts are kept
+    with the last error for inspection.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    ]
+
+    # Dotted path of the @task function
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["run_at", "id"],
+                condition=Q(status="pending"),
+                name="task_pending_run_at",
+            ),
+            models.Index(
+                fields=["name", "locked_by"],
+                condition=Q(status="running"),
+                name="task_running_name",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class PeriodicRun(models.Model):
+    """
+    When a periodic management command last ran, for commands whose work
+    depends on the time elapsed since, e.g. `decay_hot_scores`.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    last_run_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} ({self.last_run_at})"
@@ -0,0 +1,254 @@
+"""
+Database-backed background task queue
+
+Tasks are rows of `tasks.models.Task`. Workers claim due rows with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can poll the same
+table without handing out a task twice, and run them outside of the claiming
+transaction. Enqueuing inside a transaction only makes the task visible once
+it commits.
+
+    @task(max_attempts=3)
+    def rebuild_something(article_id):
+        ...
+
+    enqueue(rebuild_something, article_id=article.id)
+"""
+
+import hashlib
+import logging
+import os
+import random
+import socket
+import traceback
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: Callable
+    max_attempts: int = 5
+    # Seconds before the first retry, doubled on every further attempt
+    retry_backoff: int = 30
+    # Most tasks of this kind running at once across all workers
+    concurrency: Optional[int] = None
+    # When set, the function receives a list of up to `batch_size` payloads.
+    # It may return a list with the error of each payload, None for the ones
+    # that succeeded, so that only the failed ones are retried.
+    batch_size: Optional[int] = None
+
+
+def task(
+    max_attempts: int = 5,
+    retry_backoff: int = 30,
+    concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+):
+    """
+    Register a function as a background task. Its payload is passed as
+    keyword arguments, or as a list of dicts for batched tasks.
+    """
+
+    def decorator(func):
+        func.task_spec = TaskSpec(
+            name=f"{func.__module__}.{func.__qualname__}",
+            func=func,
+            max_attempts=max_attempts,
+            retry_backoff=retry_backoff,
+            concurrency=concurrency,
+            batch_size=batch_size,
+        )
+        return func
+
+    return decorator
+
+
+def enqueue(func: Callable, run_at: Optional[datetime] = None, **payload) -> Task:
+    spec = func.task_spec
+    return Task.objects.create(
+        name=spec.name,
+        payload=payload,
+        max_attempts=spec.max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def _get_spec(name: str) -> TaskSpec:
+    return import_string(name).task_spec
+
+
+def _lock_task_name(name: str) -> None:
+    # Serializes the running-count check of one task name between workers,
+    # other databases already serialize writers
+    if connections[Task.objects.db].vendor != "postgresql":
+        return
+    key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+    with connections[Task.objects.db].cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+
+
+def claim_tasks(worker_id: str, limit: int) -> List[Task]:
+    """
+    Lock up to `limit` due tasks for `worker_id`, respecting the concurrency
+    limit of every task name, and mark them running.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=settings.TASK_LEASE_SECONDS)
+
+    with transaction.atomic():
+        # Hand the tasks of crashed workers out again
+        Task.objects.filter(status=Task.RUNNING, locked_at__lt=now - lease).update(
+            status=Task.PENDING, locked_at=None, locked_by=""
+        )
+
+        candidates = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.PENDING, run_at__lte=now)
+            .order_by("run_at", "id")[:limit]
+        )
+
+        by_name: Dict[str, List[Task]] = defaultdict(list)
+        for candidate in candidates:
+            by_name[candidate.name].append(candidate)
+
+        claimed = []
+        for name, tasks in by_name.items():
+            try:
+                spec = _get_spec(name)
+            except ImportError:
+                # Claimed anyway so that running it records the error
+                claimed.extend(tasks)
+                continue
+            if spec.concurrency is not None:
+                # A worker runs the tasks it claimed one after the other, so
+                # the limit is on the number of workers busy with this name
+                _lock_task_name(name)
+                busy = (
+                    Task.objects.filter(name=name, status=Task.RUNNING)
+                    .values("locked_by")
+                    .distinct()
+                    .count()
+                )
+                if busy >= spec.concurrency:
+                    continue
+            claimed.extend(tasks)
+
+        for claimed_task in claimed:
+            claimed_task.status = Task.RUNNING
+            claimed_task.locked_at = now
+            claimed_task.locked_by = worker_id
+            claimed_task.attempts += 1
+        Task.objects.bulk_update(
+            claimed, ["status", "locked_at", "locked_by", "attempts"]
+        )
+
+    return claimed
+
+
+def _finish(tasks: List[Task]) -> None:
+    if tasks:
+        Task.objects.filter(pk__in=[finished.pk for finished in tasks]).delete()
+
+
+def _fail(tasks: List[Task], spec: Optional[TaskSpec], error: str) -> None:
+    now = timezone.now()
+    for failed in tasks:
+        failed.last_error = error
+        failed.locked_at = None
+        failed.locked_by = ""
+        if spec is None or failed.attempts >= failed.max_attempts:
+            failed.status = Task.FAILED
+            logger.error(
+                "Task %s %s failed for good: %s", failed.pk, failed.name, error
+            )
+            continue
+        failed.status = Task.PENDING
+        backoff = spec.retry_backoff * 2 ** (failed.attempts - 1)
+        # Jitter keeps a batch of failures from retrying in lockstep
+        failed.run_at = now + timedelta(seconds=backoff * random.uniform(1, 1.25))
+    Task.objects.bulk_update(
+        tasks, ["status", "run_at", "locked_at", "locked_by", "last_error"]
+    )
+
+
+def _renew_lease(tasks: List[Task], worker_id: str) -> List[Task]:
+    """
+    Restart the lease of claimed tasks that are about to run, returning the
+    ones still held by `worker_id`. A round can outlast the lease, and the
+    tasks another worker took over meanwhile must not run twice.
+    """
+    now = timezone.now()
+    held = Task.objects.filter(
+        pk__in=[claimed.pk for claimed in tasks],
+        status=Task.RUNNING,
+        locked_by=worker_id,
+    )
+    if held.update(locked_at=now) == len(tasks):
+        return tasks
+    # Some were taken over, the renewed ones are those stamped just now
+    held_ids = set(held.filter(locked_at=now).values_list("pk", flat=True))
+    return [claimed for claimed in tasks if claimed.pk in held_ids]
+
+
+def _run(tasks: List[Task], worker_id: str) -> None:
+    name = tasks[0].name
+    try:
+        spec = _get_spec(name)
+    except ImportError:
+        _fail(tasks, None, traceback.format_exc())
+        return
+
+    chunks = (
+        [tasks[i : i + spec.batch_size] for i in range(0, len(tasks), spec.batch_size)]
+        if spec.batch_size
+        else [[single] for single in tasks]
+    )
+    for chunk in chunks:
+        chunk = _renew_lease(chunk, worker_id)
+        if not chunk:
+            continue
+        try:
+            if spec.batch_size:
+                errors = spec.func([queued.payload for queued in chunk])
+            else:
+                spec.func(**chunk[0].payload)
+                errors = None
+        except Exception:
+            _fail(chunk, spec, traceback.format_exc())
+            continue
+
+        if errors is None:
+            _finish(chunk)
+            continue
+        _finish([queued for queued, error in zip(chunk, errors) if error is None])
+        for queued, error in zip(chunk, errors):
+            if error is not None:
+                _fail([queued], spec, str(error))
+
+
+def run_pending_tasks(worker_id: Optional[str] = None, limit: int = 100) -> int:
+    """
+    Claim and run one round of due tasks, returning how many were run.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    claimed = claim_tasks(worker_id, limit)
+
+    by_name: Dict[str, List[Task]] = defaultdict(list)
+    for claimed_task in claimed:
+        by_name[claimed_task.name].append(claimed_task)
+    for tasks in by_name.values():
+        _run(tasks, worker_id)
+
+    return len(claimed)
@@ -0,0 +1,204 @@
+import base64
+import binascii
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.urls import reverse
+from ninja import Router
+from ninja.responses import codes_4xx
+
+from articles.models import Article
+from communities.models import Community
+from communities.roles import is_admin
+from myapp.schemas import Message
+from uploads.models import UploadSession
+from uploads.schemas import (
+    UploadFinalizeSchema,
+    UploadSessionCreateSchema,
+    UploadSessionOut,
+)
+from uploads.sessions import (
+    OffsetMismatch,
+    UploadError,
+    append_chunk,
+    attach_upload,
+    create_upload_session,
+    verify_upload,
+)
+from uploads.storage import check_upload_token, presign_upload
+from users.auth import JWTAuth
+
+router = Router(tags=["Uploads"])
+
+
+@router.post("/", response={201: UploadSessionOut, 400: Message}, auth=JWTAuth())
+def create_upload(request: HttpRequest, payload: UploadSessionCreateSchema):
+    try:
+        session = create_upload_session(request.auth, **payload.dict())
+    except UploadError as e:
+        return 400, {"message": str(e)}
+
+    return 201, {
+        "id": session.id,
+        "purpose": session.purpose,
+        "status": session.status,
+        "expires_at": session.expires_at,
+        "upload": (
+            _resumable_target(request, session)
+            if session.resumable
+            else presign_upload(session, request)
+        ),
+    }
+
+
+def _resumable_target(request: HttpRequest, session: UploadSession):
+    url = reverse("api_v1:upload_chunks", kwargs={"session_id": session.id})
+    return {
+        "method": "PATCH",
+        "url": request.build_absolute_uri(url),
+        "headers": {
+            "Content-Type": "application/offset+octet-stream",
+            "Upload-Offset": "0",
+        },
+    }
+
+
+@router.post(
+    "/{session_id}/finalize",
+    response={200: UploadSessionOut, codes_4xx: Message},
+    auth=JWTAuth(),
+)
+def finalize_upload(
+    request: HttpRequest, session_id: int, payload: UploadFinalizeSchema
+):
+    session = UploadSession.objects.get(id=session_id, owner=request.auth)
+
+    try:
+        verify_upload(session)
+
+        if session.purpose == UploadSession.PROFILE_IMAGE:
+            attach_upload(session, request.auth)
+        elif payload.target_id is not None:
+            if session.purpose in (
+                UploadSession.ARTICLE_PDF,
+                UploadSession.ARTICLE_IMAGE,
+            ):
+                target = Article.objects.get(id=payload.target_id)
+                if target.submitter != request.auth:
+                    return 403, {
+                        "message": "You don't have permission to update this article."
+                    }
+            else:
+                target = Community.objects.get(id=payload.target_id)
+                if not is_admin(request, target):
+                    return 403, {
+                        "message": (
+                            "You do not have permission to modify this community."
+                        )
+                    }
+            attach_upload(session, target)
+    except UploadError as e:
+        return 400, {"message": str(e)}
+
+    session.refresh_from_db()
+    return {
+        "id": session.id,
+        "purpose": session.purpose,
+        "status": session.status,
+        "expires_at": session.expires_at,
+    }
+
+
+@router.put(
+    "/{session_id}/content",
+    response={204: None, codes_4xx: Message},
+    url_name="upload_content",
+)
+def upload_content(request: HttpRequest, session_id: int, token: str):
+    """
+    Stand-in for presigned URLs on storages that have none, such as the
+    local filesystem. The body is streamed to the storage as is.
+    """
+    if not check_upload_token(session_id, token):
+        return 403, {"message": "Invalid or expired upload token."}
+
+    session = UploadSession.objects.get(id=session_id, status=UploadSession.PENDING)
+    if int(request.headers.get("Content-Length") or 0) > session.size:
+        return 413, {"message": "The file is larger than declared."}
+
+    default_storage.delete(session.key)
+    name = default_storage.save(session.key, File(request, name=session.filename))
+    if name != session.key:
+        session.key = name
+        session.save(update_fields=["key"])
+    return 204, None
+
+
+"""
+Resumable uploads, a subset of the tus protocol
+
+HEAD returns how much of the file has been received, PATCH appends the
+chunk in the body at the given Upload-Offset.
+"""
+
+
+def _tus_response(session: UploadSession, status: int = 204) -> HttpResponse:
+    response = HttpResponse(status=status)
+    response["Upload-Offset"] = str(session.offset)
+    response["Upload-Length"] = str(session.size)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@router.api_operation(
+    ["HEAD"], "/{session_id}/chunks", auth=JWTAuth(), url_name="upload_chunks"
+)
+def get_upload_offset(request: HttpRequest, session_id: int):
+    session = UploadSession.objects.get(
+        id=session_id, owner=request.auth, resumable=True
+    )
+    return _tus_response(session, status=200)
+
+
+@router.patch("/{session_id}/chunks", auth=JWTAuth())
+def append_upload_chunk(request: HttpRequest, session_id: int):
+    session = UploadSession.objects.get(
+        id=session_id, owner=request.auth, resumable=True
+    )
+
+    if request.content_type != "application/offset+octet-stream":
+        return JsonResponse(
+            {"message": "Chunks must be sent as application/offset+octet-stream."},
+            status=415,
+        )
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        return JsonResponse({"message": "Missing Upload-Offset header."}, status=400)
+
+    # "sha256 <base64 digest>", per the tus checksum extension
+    checksum = request.headers.get("Upload-Checksum")
+    if checksum is not None:
+        algorithm, _, value = checksum.partition(" ")
+        try:
+            if algorithm != "sha256":
+                raise ValueError
+            checksum = base64.b64decode(value, validate=True).hex()
+        except (ValueError, binascii.Error):
+            return JsonResponse(
+                {"message": "Upload-Checksum must be a base64 encoded sha256."},
+                status=400,
+            )
+
+    try:
+        session = append_chunk(session, offset, request, checksum)
+    except OffsetMismatch as e:
+        session.refresh_from_db(fields=["offset"])
+        response = JsonResponse({"message": str(e)}, status=409)
+        response["Upload-Offset"] = str(session.offset)
+        return response
+    except UploadError as e:
+        return JsonResponse({"message": str(e)}, status=400)
+
+    return _tus_response(session)
@@ -0,0 +1,44 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from uploads.models import UploadChunk, UploadSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired upload sessions that were never completed, along with "
+        "their stored chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of sessions deleted per query.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            sessions = list(
+                UploadSession.objects.filter(
+                    status=UploadSession.PENDING, expires_at__lt=timezone.now()
+                ).values_list("id", "key")[: options["batch_size"]]
+            )
+            if not sessions:
+                break
+
+            ids = [session_id for session_id, _ in sessions]
+            names = [key for _, key in sessions]
+            names += UploadChunk.objects.filter(session_id__in=ids).values_list(
+                "key", flat=True
+            )
+            for name in names:
+                # Nothing may have been uploaded yet
+                default_storage.delete(name)
+            UploadSession.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} upload sessions."))
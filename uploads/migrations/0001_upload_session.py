@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('article_pdf', 'Article PDF'), ('article_image', 'Article image'), ('profile_image', 'Profile picture'), ('community_profile_image', 'Community profile picture'), ('community_banner_image', 'Community banner')], max_length=30)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(max_length=100)),
+                ('size', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('verified', 'Verified'), ('attached', 'Attached')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0001_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='offset',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='resumable',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveBigIntegerField()),
+                ('size', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('key', models.CharField(max_length=255)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='uploads.uploadsession')),
+            ],
+            options={
+                'ordering': ['offset'],
+                'unique_together': {('session', 'offset')},
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import models
+
+from users.models import User
+
+
+class UploadSession(models.Model):
+    """
+    A file a client uploads straight to storage through a presigned URL,
+    see uploads/sessions.py. Only the declared size, content type and hash
+    are known until the upload is finalized.
+    """
+
+    ARTICLE_PDF = "article_pdf"
+    ARTICLE_IMAGE = "article_image"
+    PROFILE_IMAGE = "profile_image"
+    COMMUNITY_PROFILE_IMAGE = "community_profile_image"
+    COMMUNITY_BANNER_IMAGE = "community_banner_image"
+    PURPOSE_CHOICES = [
+        (ARTICLE_PDF, "Article PDF"),
+        (ARTICLE_IMAGE, "Article image"),
+        (PROFILE_IMAGE, "Profile picture"),
+        (COMMUNITY_PROFILE_IMAGE, "Community profile picture"),
+        (COMMUNITY_BANNER_IMAGE, "Community banner"),
+    ]
+
+    PENDING = "pending"
+    VERIFIED = "verified"
+    ATTACHED = "attached"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (VERIFIED, "Verified"),
+        (ATTACHED, "Attached"),
+    ]
+
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    purpose = models.CharField(max_length=30, choices=PURPOSE_CHOICES)
+    # Name of the object in the default storage
+    key = models.CharField(max_length=255, unique=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    # Hex SHA-256 digest declared by the client
+    sha256 = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Resumable uploads arrive in chunks, see `append_chunk`
+    resumable = models.BooleanField(default=False)
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.purpose} {self.key} ({self.status})"
+
+
+class UploadChunk(models.Model):
+    """
+    A received part of a resumable upload, kept in temporary storage until
+    the last chunk arrives and the parts are assembled.
+    """
+
+    session = models.ForeignKey(
+        UploadSession, on_delete=models.CASCADE, related_name="chunks"
+    )
+    offset = models.PositiveBigIntegerField()
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ("session", "offset")
+        ordering = ["offset"]
+
+    def __str__(self):
+        return f"{self.session_id} @ {self.offset} ({self.size} bytes)"
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Dict, Literal, Optional
+
+from ninja import Schema
+
+from uploads.models import UploadSession
+
+UploadPurpose = Literal[tuple(purpose for purpose, _ in UploadSession.PURPOSE_CHOICES)]
+
+
+class UploadSessionCreateSchema(Schema):
+    purpose: UploadPurpose
+    filename: str
+    content_type: str
+    size: int
+    # Hex encoded SHA-256 digest of the file
+    sha256: str
+    # Send the file in chunks with PATCH requests that can be resumed
+    resumable: bool = False
+
+
+class UploadTarget(Schema):
+    method: Literal["PUT", "PATCH"]
+    url: str
+    headers: Dict[str, str]
+
+
+class UploadSessionOut(Schema):
+    id: int
+    purpose: str
+    status: str
+    expires_at: datetime
+    upload: Optional[UploadTarget] = None
+
+
+class UploadFinalizeSchema(Schema):
+    # Article or community the file is attached to, the current user for
+    # profile pictures. Without it the upload is only verified, and can be
+    # attached when creating an article.
+    target_id: Optional[int] = None
@@ -0,0 +1,292 @@
+"""
+Upload sessions
+
+A client declares the file it is about to upload (`create_upload_session`),
+sends it straight to storage with the returned URL, then finalizes the
+session. Finalizing checks the stored object against the declaration and
+its purpose (`verify_upload`) and attaches it to the model it was uploaded
+for (`attach_upload`), so workers never stream file contents.
+
+Resumable sessions instead receive the file through `append_chunk`, one
+chunk per request at the current offset, so an interrupted transfer picks
+up where it stopped. The last chunk assembles and verifies the file.
+"""
+
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from articles.models import Article, ArticlePDF
+from communities.models import Community
+from uploads.models import UploadChunk, UploadSession
+from uploads.storage import (
+    HashingReader,
+    assemble_chunks,
+    object_sha256,
+    object_size,
+    read_head,
+    save_stream,
+)
+from users.models import User
+
+
+class UploadError(ValueError):
+    pass
+
+
+class OffsetMismatch(UploadError):
+    pass
+
+
+@dataclass(frozen=True)
+class UploadPolicy:
+    # Directory of the FileField the upload ends up in
+    prefix: str
+    content_types: Tuple[str, ...]
+    # Name of the setting holding the largest accepted size in bytes
+    max_size_setting: str
+
+    @property
+    def max_size(self) -> int:
+        return getattr(settings, self.max_size_setting)
+
+
+IMAGE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+UPLOAD_POLICIES = {
+    UploadSession.ARTICLE_PDF: UploadPolicy(
+        "article_pdfs/", ("application/pdf",), "UPLOAD_MAX_PDF_SIZE"
+    ),
+    UploadSession.ARTICLE_IMAGE: UploadPolicy(
+        "article_images/", IMAGE_TYPES, "UPLOAD_MAX_IMAGE_SIZE"
+    ),
+    UploadSession.PROFILE_IMAGE: UploadPolicy(
+        "profile_images/", IMAGE_TYPES, "UPLOAD_MAX_IMAGE_SIZE"
+    ),
+    UploadSession.COMMUNITY_PROFILE_IMAGE: UploadPolicy(
+        "community_images/", IMAGE_TYPES, "UPLOAD_MAX_IMAGE_SIZE"
+    ),
+    UploadSession.COMMUNITY_BANNER_IMAGE: UploadPolicy(
+        "community_images/", IMAGE_TYPES, "UPLOAD_MAX_IMAGE_SIZE"
+    ),
+}
+
+# Leading bytes of every accepted content type
+MAGIC_NUMBERS = {
+    "application/pdf": (b"%PDF-",),
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/gif": (b"GIF87a", b"GIF89a"),
+}
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for content_type, signatures in MAGIC_NUMBERS.items():
+        if head.startswith(signatures):
+            return content_type
+    return None
+
+
+def create_upload_session(
+    owner: User,
+    purpose: str,
+    filename: str,
+    content_type: str,
+    size: int,
+    sha256: str,
+    resumable: bool = False,
+) -> UploadSession:
+    policy = UPLOAD_POLICIES[purpose]
+    if content_type not in policy.content_types:
+        expected = ", ".join(policy.content_types)
+        raise UploadError(f"Unsupported content type, expected one of {expected}.")
+    if not 0 < size <= policy.max_size:
+        raise UploadError(f"The file must be between 1 and {policy.max_size} bytes.")
+    if not re.fullmatch(r"[0-9a-f]{64}", sha256.lower()):
+        raise UploadError("sha256 must be a hex encoded SHA-256 digest.")
+
+    filename = get_valid_filename(os.path.basename(filename)) or "upload"
+    return UploadSession.objects.create(
+        owner=owner,
+        purpose=purpose,
+        # A directory per upload keeps the original name free of collisions
+        key=f"{policy.prefix}{uuid.uuid4().hex}/{filename[-100:]}",
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        sha256=sha256.lower(),
+        resumable=resumable,
+        expires_at=timezone.now()
+        + timedelta(
+            seconds=(
+                settings.UPLOAD_RESUMABLE_EXPIRY_SECONDS
+                if resumable
+                else settings.UPLOAD_URL_EXPIRY_SECONDS
+            )
+        ),
+    )
+
+
+def verify_upload(session: UploadSession) -> None:
+    """
+    Check the stored object against the size, content type and hash the
+    session declared, deleting it if it doesn't match.
+    """
+    if session.status != UploadSession.PENDING:
+        return
+
+    size = object_size(session.key)
+    if size is None:
+        if session.expires_at < timezone.now():
+            raise UploadError("The upload session has expired.")
+        raise UploadError("The file has not been uploaded yet.")
+
+    if size != session.size:
+        error = f"Expected {session.size} bytes, {size} were uploaded."
+    elif sniff_content_type(read_head(session.key, 16)) != session.content_type:
+        error = f"The file is not a valid {session.content_type} file."
+    elif object_sha256(session.key) != session.sha256:
+        error = "The file does not match its SHA-256 digest."
+    else:
+        session.status = UploadSession.VERIFIED
+        session.save(update_fields=["status"])
+        return
+
+    default_storage.delete(session.key)
+    raise UploadError(error)
+
+
+def append_chunk(
+    session: UploadSession,
+    offset: int,
+    stream,
+    checksum: Optional[str] = None,
+) -> UploadSession:
+    """
+    Store the next chunk of a resumable upload from `stream`, which must
+    start at the session's current offset. `checksum` is the optional hex
+    SHA-256 of the chunk. Returns the updated session, verified once the
+    last chunk has been received.
+    """
+    if not session.resumable or session.status != UploadSession.PENDING:
+        raise UploadError("The upload does not accept chunks.")
+    if session.expires_at < timezone.now():
+        raise UploadError("The upload session has expired.")
+    if offset != session.offset:
+        raise OffsetMismatch(f"Expected offset {session.offset}.")
+
+    # Streamed to temporary storage, only a read buffer is held in memory
+    reader = HashingReader(stream, session.size - offset)
+    key = save_stream(f"upload_chunks/{session.pk}/{offset:020d}", reader)
+    complete = offset + reader.size == session.size
+
+    error = None
+    if reader.overflow:
+        error = "The chunk goes past the declared size."
+    elif not reader.size:
+        error = "The chunk is empty."
+    elif checksum is not None and reader.digest.hexdigest() != checksum:
+        error = "The chunk does not match its checksum."
+    elif not complete and reader.size < settings.UPLOAD_CHUNK_MIN_SIZE:
+        error = (
+            "Chunks but the last must be at least "
+            f"{settings.UPLOAD_CHUNK_MIN_SIZE} bytes."
+        )
+    if error is not None:
+        default_storage.delete(key)
+        raise UploadError(error)
+
+    with transaction.atomic():
+        locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if locked.offset != offset:
+            # Another request stored this chunk in the meantime
+            default_storage.delete(key)
+            raise OffsetMismatch(f"Expected offset {locked.offset}.")
+        UploadChunk.objects.create(
+            session=locked,
+            offset=offset,
+            size=reader.size,
+            sha256=reader.digest.hexdigest(),
+            key=key,
+        )
+        locked.offset = offset + reader.size
+        locked.save(update_fields=["offset"])
+
+    if complete:
+        chunks = list(locked.chunks.values_list("key", flat=True))
+        name = assemble_chunks(locked.key, locked.content_type, chunks)
+        locked.chunks.all().delete()
+        if name != locked.key:
+            locked.key = name
+            locked.save(update_fields=["key"])
+        verify_upload(locked)
+    return locked
+
+
+def _target_model(purpose: str):
+    if purpose in (UploadSession.ARTICLE_PDF, UploadSession.ARTICLE_IMAGE):
+        return Article
+    if purpose == UploadSession.PROFILE_IMAGE:
+        return User
+    return Community
+
+
+@transaction.atomic
+def attach_upload(session: UploadSession, target) -> None:
+    """
+    Attach a verified upload to the article, user or community it was
+    uploaded for. Permissions on `target` are checked by the caller.
+    """
+    session = UploadSession.objects.select_for_update().get(pk=session.pk)
+    if session.status == UploadSession.PENDING:
+        raise UploadError("The upload has not been finalized.")
+    if session.status == UploadSession.ATTACHED:
+        raise UploadError("The upload is already attached.")
+    if not isinstance(target, _target_model(session.purpose)):
+        raise UploadError("The upload was made for another kind of object.")
+
+    if session.purpose == UploadSession.ARTICLE_PDF:
+        ArticlePDF.objects.create(article=target, pdf_file_url=session.key)
+    else:
+        field = {
+            UploadSession.ARTICLE_IMAGE: "article_image_url",
+            UploadSession.PROFILE_IMAGE: "profile_pic_url",
+            UploadSession.COMMUNITY_PROFILE_IMAGE: "profile_pic_url",
+            UploadSession.COMMUNITY_BANNER_IMAGE: "banner_pic_url",
+        }[session.purpose]
+        setattr(target, field, session.key)
+        target.save(update_fields=[field])
+
+    session.status = UploadSession.ATTACHED
+    session.save(update_fields=["status"])
+
+
+def get_verified_uploads(owner: User, purpose: str, ids) -> list:
+    """
+    Return the owner's verified, unattached uploads with the given ids, in
+    the given order, raising UploadError if any of them isn't one. Must run
+    in the transaction that attaches them, the sessions stay locked until
+    it ends so that a concurrent request can't take them too.
+    """
+    ids = list(dict.fromkeys(ids))
+    # Locked in a fixed order to avoid deadlocks between requests
+    sessions = UploadSession.objects.select_for_update().order_by("pk").in_bulk(ids)
+    for session_id in ids:
+        session = sessions.get(session_id)
+        if session is None or session.owner_id != owner.pk:
+            raise UploadError(f"Upload {session_id} does not exist.")
+        verify_upload(session)
+        if session.purpose != purpose or session.status != UploadSession.VERIFIED:
+            raise UploadError(f"Upload {session_id} cannot be attached here.")
+    return [sessions[session_id] for session_id in ids]
@@ -0,0 +1,247 @@
+"""
+Direct-to-storage transfers
+
+On S3 the client PUTs the object to a presigned URL and S3 itself checks the
+declared SHA-256. Other storages (the local filesystem in development and
+tests) get a signed URL to `upload_content`, which writes the request body
+to the storage without going through multipart parsing.
+
+Resumable uploads are stored chunk by chunk and assembled once complete,
+with a server side multipart copy on S3.
+"""
+
+import base64
+import hashlib
+import io
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from uploads.models import UploadSession
+
+UPLOAD_TOKEN_SALT = "uploads.content"
+
+# Bytes read at once when hashing an object
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _s3_client():
+    # S3Boto3Storage and its subclasses expose the bucket they write to
+    bucket = getattr(default_storage, "bucket", None)
+    return bucket.meta.client if bucket is not None else None
+
+
+def _s3_key(name: str) -> str:
+    return default_storage._normalize_name(name)
+
+
+def presign_upload(session: UploadSession, request) -> Dict:
+    """
+    Return the method, URL and headers the client has to send the file with.
+    """
+    headers = {"Content-Type": session.content_type}
+    client = _s3_client()
+    if client is not None:
+        checksum = base64.b64encode(bytes.fromhex(session.sha256)).decode()
+        url = client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": default_storage.bucket_name,
+                "Key": _s3_key(session.key),
+                "ContentType": session.content_type,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=settings.UPLOAD_URL_EXPIRY_SECONDS,
+            HttpMethod="PUT",
+        )
+        headers["x-amz-checksum-sha256"] = checksum
+    else:
+        token = signing.TimestampSigner(salt=UPLOAD_TOKEN_SALT).sign(str(session.pk))
+        url = request.build_absolute_uri(
+            reverse("api_v1:upload_content", kwargs={"session_id": session.pk})
+        )
+        url = f"{url}?token={token}"
+    return {"method": "PUT", "url": url, "headers": headers}
+
+
+def check_upload_token(session_id: int, token: str) -> bool:
+    try:
+        value = signing.TimestampSigner(salt=UPLOAD_TOKEN_SALT).unsign(
+            token, max_age=settings.UPLOAD_URL_EXPIRY_SECONDS
+        )
+    except signing.BadSignature:
+        return False
+    return value == str(session_id)
+
+
+def object_size(name: str) -> Optional[int]:
+    """
+    Return the size of a stored object, or None if nothing was uploaded.
+    """
+    if not default_storage.exists(name):
+        return None
+    return default_storage.size(name)
+
+
+def read_head(name: str, length: int) -> bytes:
+    client = _s3_client()
+    if client is not None:
+        # A ranged GET, opening the file would download all of it
+        response = client.get_object(
+            Bucket=default_storage.bucket_name,
+            Key=_s3_key(name),
+            Range=f"bytes=0-{length - 1}",
+        )
+        return response["Body"].read()
+    with default_storage.open(name) as file:
+        return file.read(length)
+
+
+def object_sha256(name: str) -> str:
+    """
+    Return the hex SHA-256 digest of a stored object. S3 already verified
+    the checksum the object was uploaded with, other storages are hashed.
+    """
+    client = _s3_client()
+    if client is not None:
+        head = client.head_object(
+            Bucket=default_storage.bucket_name,
+            Key=_s3_key(name),
+            ChecksumMode="ENABLED",
+        )
+        checksum = head.get("ChecksumSHA256", "")
+        # Multipart objects carry a checksum of the part checksums instead
+        if checksum and "-" not in checksum:
+            return base64.b64decode(checksum).hex()
+
+    digest = hashlib.sha256()
+    with default_storage.open(name) as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _StreamReader(io.RawIOBase):
+    """
+    Base of the read-only, non-seekable file objects below, which implement
+    read(). Storages probe `closed` and `seekable()` before saving them.
+    """
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class HashingReader(_StreamReader):
+    """
+    File object over at most `limit` bytes of `stream`, hashing them as they
+    are read. `overflow` tells whether the stream had more.
+    """
+
+    def __init__(self, stream, limit: int):
+        super().__init__()
+        self.stream = stream
+        self.remaining = limit
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.overflow = False
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size) if size else b""
+        if not data and not self.overflow and self.remaining == 0:
+            # Peek a single byte to detect a body longer than the limit
+            self.overflow = bool(self.stream.read(1))
+        self.remaining -= len(data)
+        self.size += len(data)
+        self.digest.update(data)
+        return data
+
+
+class ChainedReader(_StreamReader):
+    """
+    File object concatenating stored objects, opening one at a time.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        super().__init__()
+        self.names = iter(names)
+        self.current = None
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            if self.current is None:
+                name = next(self.names, None)
+                if name is None:
+                    return b""
+                self.current = default_storage.open(name)
+            data = self.current.read(HASH_CHUNK_SIZE if size < 0 else size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+        super().close()
+
+
+def save_stream(name: str, stream) -> str:
+    """
+    Write a file-like object to the storage without loading it in memory,
+    returning the name it was stored under.
+    """
+    return default_storage.save(name, File(stream, name=name.rsplit("/", 1)[-1]))
+
+
+def assemble_chunks(name: str, content_type: str, chunk_names: List[str]) -> str:
+    """
+    Concatenate stored chunks into the object `name` and delete them. Every
+    chunk but the last must be at least 5 MiB on S3.
+    """
+    client = _s3_client()
+    if client is not None:
+        bucket = default_storage.bucket_name
+        key = _s3_key(name)
+        upload_id = client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type
+        )["UploadId"]
+        try:
+            parts = []
+            for number, chunk_name in enumerate(chunk_names, start=1):
+                copied = client.upload_part_copy(
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    CopySource={"Bucket": bucket, "Key": _s3_key(chunk_name)},
+                )
+                parts.append(
+                    {"PartNumber": number, "ETag": copied["CopyPartResult"]["ETag"]}
+                )
+            client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            raise
+    else:
+        name = save_stream(name, ChainedReader(chunk_names))
+
+    for chunk_name in chunk_names:
+        default_storage.delete(chunk_name)
+    return name
@@ -0,0 +1,251 @@
+import base64
+import hashlib
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+import boto3
+import requests
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from moto import mock_aws
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from articles.models import Article
+from uploads import sessions
+from uploads.models import UploadSession
+from uploads.sessions import UploadError
+from users.models import User
+
+PDF = b"%PDF-1.4\n" + b"A scientific article.\n" * 100
+# Same size and signature as PDF, so only the digest tells them apart
+TAMPERED_PDF = b"%PDF-1.4\n" + b"A scientific articlE.\n" * 100
+
+# Two chunks, the first of the smallest size accepted
+CHUNK_SIZE = 5 * 1024 * 1024
+LARGE_PDF = b"%PDF-1.4\n" + b"A much longer scientific article.\n" * 160000
+
+TEST_BUCKET = "test-uploads"
+
+
+class UploadFlowTests:
+    """
+    Create an upload session, send the file to the URL it returns and
+    finalize it, against the storage set up by the subclass.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="author", email="author@example.com", password="secret"
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def send(self, target, content):
+        raise NotImplementedError
+
+    def create_upload(self, content, sha256=None, **fields):
+        response = self.client.post(
+            "/api/uploads/",
+            {
+                "purpose": UploadSession.ARTICLE_PDF,
+                "filename": "paper.pdf",
+                "content_type": "application/pdf",
+                "size": len(content),
+                "sha256": sha256 or hashlib.sha256(content).hexdigest(),
+                **fields,
+            },
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def finalize(self, session_id):
+        return self.client.post(
+            f"/api/uploads/{session_id}/finalize",
+            {},
+            content_type="application/json",
+            **self.auth,
+        )
+
+    def create_article(self, pdf_upload_ids):
+        details = {
+            "payload": {
+                "title": "Uploaded article",
+                "abstract": "Sent straight to storage.",
+                "keywords": [],
+                "authors": [],
+                "submission_type": "Public",
+                "pdf_upload_ids": pdf_upload_ids,
+            }
+        }
+        return self.client.post(
+            "/api/articles/articles/", {"details": json.dumps(details)}, **self.auth
+        )
+
+    def test_upload_is_verified(self):
+        upload = self.create_upload(PDF)
+        self.send(upload["upload"], PDF)
+
+        response = self.finalize(upload["id"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], UploadSession.VERIFIED)
+        session = UploadSession.objects.get(id=upload["id"])
+        with default_storage.open(session.key) as file:
+            self.assertEqual(file.read(), PDF)
+
+    def test_digest_mismatch_is_rejected(self):
+        upload = self.create_upload(PDF)
+        self.send(upload["upload"], TAMPERED_PDF)
+
+        response = self.finalize(upload["id"])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("SHA-256", response.json()["message"])
+        session = UploadSession.objects.get(id=upload["id"])
+        self.assertEqual(session.status, UploadSession.PENDING)
+        self.assertFalse(default_storage.exists(session.key))
+
+    def test_article_takes_over_upload_once(self):
+        upload = self.create_upload(PDF)
+        self.send(upload["upload"], PDF)
+
+        response = self.create_article([upload["id"]])
+        self.assertEqual(response.status_code, 200)
+        session = UploadSession.objects.get(id=upload["id"])
+        self.assertEqual(session.status, UploadSession.ATTACHED)
+        article = Article.objects.get(id=response.json()["id"])
+        self.assertEqual(
+            [pdf.pdf_file_url.name for pdf in article.pdfs.all()], [session.key]
+        )
+
+        # Reusing the upload fails cleanly, without an article left behind
+        response = self.create_article([upload["id"]])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Article.objects.count(), 1)
+
+    def test_failed_attach_rolls_the_article_back(self):
+        uploads = [self.create_upload(PDF) for _ in range(2)]
+        for upload in uploads:
+            self.send(upload["upload"], PDF)
+
+        # As if a concurrent request attached the second upload first
+        def attach_upload(session, target):
+            if session.id == uploads[1]["id"]:
+                raise UploadError("The upload is already attached.")
+            sessions.attach_upload(session, target)
+
+        with mock.patch("articles.api.attach_upload", attach_upload):
+            response = self.create_article([upload["id"] for upload in uploads])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Article.objects.exists())
+
+        # Neither upload was taken, so the submission can be retried
+        response = self.create_article([upload["id"] for upload in uploads])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["article_pdf_urls"]), 2)
+
+    def send_chunk(self, session_id, offset, chunk):
+        return self.client.patch(
+            f"/api/uploads/{session_id}/chunks",
+            chunk,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+            HTTP_UPLOAD_CHECKSUM="sha256 "
+            + base64.b64encode(hashlib.sha256(chunk).digest()).decode(),
+            **self.auth,
+        )
+
+    def get_offset(self, session_id):
+        response = self.client.head(f"/api/uploads/{session_id}/chunks", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return int(response["Upload-Offset"])
+
+    def test_resumable_upload_is_verified(self):
+        # Every chunk but the last must reach the smallest S3 part size
+        first, last = LARGE_PDF[:CHUNK_SIZE], LARGE_PDF[CHUNK_SIZE:]
+        upload = self.create_upload(LARGE_PDF, resumable=True)
+        self.assertEqual(upload["upload"]["method"], "PATCH")
+
+        response = self.send_chunk(upload["id"], 0, first)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_offset(upload["id"]), len(first))
+
+        # A chunk sent again at a stale offset is refused
+        response = self.send_chunk(upload["id"], 0, first)
+        self.assertEqual(response.status_code, 409)
+
+        response = self.send_chunk(upload["id"], len(first), last)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_offset(upload["id"]), len(LARGE_PDF))
+
+        session = UploadSession.objects.get(id=upload["id"])
+        self.assertEqual(session.status, UploadSession.VERIFIED)
+        self.assertFalse(session.chunks.exists())
+        with default_storage.open(session.key) as file:
+            self.assertEqual(file.read(), LARGE_PDF)
+
+
+class FileSystemUploadTests(UploadFlowTests, TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            },
+            MEDIA_ROOT=media_root,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
+
+    def send(self, target, content):
+        # The signed stand-in URL of `upload_content`
+        self.assertEqual(target["method"], "PUT")
+        response = self.client.generic(
+            "PUT", target["url"], content, **_header_meta(target["headers"])
+        )
+        self.assertEqual(response.status_code, 204)
+
+
+class S3UploadTests(UploadFlowTests, TestCase):
+    def setUp(self):
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=TEST_BUCKET)
+
+        settings_override = override_settings(
+            STORAGES={
+                "default": {"BACKEND": "storages.backends.s3boto3.S3Boto3Storage"},
+            },
+            AWS_STORAGE_BUCKET_NAME=TEST_BUCKET,
+            AWS_S3_REGION_NAME="us-east-1",
+            AWS_S3_CUSTOM_DOMAIN=f"{TEST_BUCKET}.s3.amazonaws.com",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
+
+    def send(self, target, content):
+        # A presigned S3 URL. Unlike S3, moto stores bodies that don't match
+        # the checksum header, finalizing then catches them by hashing.
+        self.assertEqual(target["method"], "PUT")
+        self.assertIn("x-amz-checksum-sha256", target["headers"])
+        response = requests.put(target["url"], data=content, headers=target["headers"])
+        self.assertEqual(response.status_code, 200)
+
+
+def _header_meta(headers):
+    # Request headers as the test client takes them
+    meta = {}
+    for name, value in headers.items():
+        if name.lower() == "content-type":
+            meta["content_type"] = value
+        else:
+            meta[f"HTTP_{name.upper().replace('-', '_')}"] = value
+    return meta
@@ -9,16 +9,23 @@ from ninja.errors import HttpRequest
 from ninja.responses import codes_4xx, codes_5xx
 
 # Todo: Move the Reaction model to the users app
-from articles.models import Article, Reaction
+from articles.models import Article, Reaction, ReactionTally
 from articles.schemas import ArticleOut, PaginatedArticlesResponse
 from communities.models import Community
-from myapp.schemas import Message, UserStats
+from myapp.pagination import InvalidCursor, decode_cursor, paginate_by_cursor
+from myapp.schemas import AutocompleteOut, Message, UserStats
+from myapp.search import autocomplete
 from posts.models import Post
 from users.auth import JWTAuth
-from users.models import Hashtag, HashtagRelation, Notification, User
+from users.hashtags import sync_hashtags
+from users.models import Notification, NotificationCounter, User
+from users.notifications import mark_notifications_read
 from users.schemas import (
     FavoriteItemSchema,
+    MarkNotificationsReadSchema,
     NotificationSchema,
+    PaginatedNotificationSchema,
+    UnreadNotificationCountSchema,
     UserArticleSchema,
     UserCommunitySchema,
     UserDetails,
@@ -68,15 +75,7 @@ def update_user(
     if payload.details.research_interests:
         print(payload.details.research_interests)
         # Use hashtags to store research interests
-        content_type = ContentType.objects.get_for_model(User)
-        HashtagRelation.objects.filter(
-            content_type=content_type, object_id=user.id
-        ).delete()
-        for hashtag_name in payload.details.research_interests:
-            hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name.lower())
-            HashtagRelation.objects.create(
-                hashtag=hashtag, content_type=content_type, object_id=user.id
-            )
+        sync_hashtags(user, payload.details.research_interests)
 
     user.save()
     return UserDetails.resolve_user(user)
@@ -88,6 +87,19 @@ def get_user_stats(request: HttpRequest):
     return UserStats.from_model(request.auth)
 
 
+@router.get("/autocomplete", response=List[AutocompleteOut], auth=JWTAuth())
+def autocomplete_usernames(
+    request: HttpRequest,
+    search: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+):
+    users = User.objects.filter(is_active=True)
+    return [
+        AutocompleteOut(id=user.id, name=user.username)
+        for user in autocomplete(users, "username", search, limit)
+    ]
+
+
 """
 User's Content API
 """
@@ -188,14 +200,11 @@ def get_my_articles(
     elif status_filter == StatusFilter.UNSUBMITTED:
         articles = articles.filter(status="Pending", community=None)
 
-    paginator = Paginator(articles, limit)
+    paginator = Paginator(articles.select_related("submitter"), limit)
     paginated_articles = paginator.get_page(page)
 
     return 200, PaginatedArticlesResponse(
-        items=[
-            ArticleOut.from_orm_with_custom_fields(article, request.auth)
-            for article in paginated_articles
-        ],
+        items=ArticleOut.from_queryset_batch(paginated_articles, request.auth),
         total=paginator.count,
         page=page,
         page_size=limit,
@@ -210,14 +219,13 @@ def get_my_articles(
 )
 def get_my_posts(request):
     user = request.auth
-    posts = Post.objects.filter(author=user, is_deleted=False).order_by("-created_at")
-    post_content_type = ContentType.objects.get_for_model(Post)
+    posts = list(
+        Post.objects.filter(author=user, is_deleted=False).order_by("-created_at")
+    )
+    tallies = ReactionTally.get_tallies(Post, [post.id for post in posts])
 
     result = []
     for post in posts:
-        likes_count = Reaction.objects.filter(
-            content_type=post_content_type, object_id=post.id, vote=Reaction.LIKE
-        ).count()
 
         # Determine the most recent action (creation or comment)
         latest_comment = (
@@ -234,7 +242,7 @@ def get_my_posts(request):
             {
                 "title": post.title,
                 "created_at": post.created_at,
-                "likes_count": likes_count,
+                "likes_count": tallies[post.id].likes_count,
                 "action": action,
                 "action_date": action_date,
             }
@@ -258,7 +266,15 @@ def get_my_favorites(request):
     post_type = ContentType.objects.get_for_model(Post)
 
     # Get user's liked items
-    liked_items = Reaction.objects.filter(user=user, vote=Reaction.LIKE)
+    liked_items = list(Reaction.objects.filter(user=user, vote=Reaction.LIKE))
+    post_tallies = ReactionTally.get_tallies(
+        post_type,
+        [
+            item.object_id
+            for item in liked_items
+            if item.content_type_id == post_type.id
+        ],
+    )
 
     for item in liked_items:
         if item.content_type == article_type:
@@ -289,7 +305,7 @@ def get_my_favorites(request):
                     "type": "Post",
                     "details": (
                         f"Post by {post.author.username} · "
-                        f"{post.reactions.filter(vote=Reaction.LIKE).count()} likes"
+                        f"{post_tallies[post.id].likes_count} likes"
                     ),
                     "tag": "Post",
                 }
@@ -305,7 +321,11 @@ Notification API
 
 @router.get(
     "/notifications",
-    response={200: List[NotificationSchema], codes_4xx: Message, codes_5xx: Message},
+    response={
+        200: PaginatedNotificationSchema,
+        codes_4xx: Message,
+        codes_5xx: Message,
+    },
     auth=JWTAuth(),
 )
 def get_notifications(
@@ -313,6 +333,8 @@ def get_notifications(
     article_slug: Optional[str] = Query(None, description="Filter by article slug"),
     community_id: Optional[int] = Query(None, description="Filter by community ID"),
     post_id: Optional[int] = Query(None, description="Filter by post ID"),
+    cursor: Optional[str] = Query(None),
+    size: int = Query(20, ge=1, le=100),
 ):
     user_notifications = Notification.objects.filter(user=request.auth)
 
@@ -330,22 +352,70 @@ def get_notifications(
 
     user_notifications = user_notifications.order_by("-created_at")
 
-    return 200, [
-        NotificationSchema(
-            **{
-                "id": notif.id,
-                "message": notif.message,
-                "content": notif.content,
-                "isRead": notif.is_read,
-                "link": notif.link,
-                "category": notif.category,
-                "notificationType": notif.notification_type,
-                "createdAt": notif.created_at,
-                "expiresAt": notif.expires_at,
-            }
+    try:
+        cursor_page = paginate_by_cursor(user_notifications, cursor, size)
+    except InvalidCursor as e:
+        return 400, {"message": str(e)}
+
+    return 200, PaginatedNotificationSchema(
+        items=[
+            NotificationSchema(
+                **{
+                    "id": notif.id,
+                    "message": notif.message,
+                    "content": notif.content,
+                    "isRead": notif.is_read,
+                    "link": notif.link,
+                    "category": notif.category,
+                    "notificationType": notif.notification_type,
+                    "createdAt": notif.created_at,
+                    "expiresAt": notif.expires_at,
+                }
+            )
+            for notif in cursor_page.items
+        ],
+        per_page=size,
+        next_cursor=cursor_page.next_cursor,
+        prev_cursor=cursor_page.prev_cursor,
+    )
+
+
+@router.get(
+    "/notifications/unread-count",
+    response={200: UnreadNotificationCountSchema, codes_4xx: Message},
+    auth=JWTAuth(),
+)
+def get_unread_notification_count(request):
+    categories = dict(
+        NotificationCounter.objects.filter(
+            user=request.auth, unread_count__gt=0
+        ).values_list("category", "unread_count")
+    )
+    return {"total": sum(categories.values()), "categories": categories}
+
+
+@router.post(
+    "/notifications/mark-as-read",
+    response={200: Message, codes_4xx: Message, codes_5xx: Message},
+    auth=JWTAuth(),
+)
+def mark_notifications_as_read(request, payload: MarkNotificationsReadSchema):
+    condition = Q()
+    if payload.ids is not None:
+        condition &= Q(pk__in=payload.ids)
+    if payload.category is not None:
+        condition &= Q(category=payload.category)
+    if payload.before is not None:
+        try:
+            created_at, notification_id = decode_cursor(payload.before, 2)
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+        condition &= Q(created_at__lt=created_at) | Q(
+            created_at=created_at, pk__lte=notification_id
         )
-        for notif in user_notifications
-    ]
+
+    marked = mark_notifications_read(request.auth.id, condition)
+    return {"message": f"{marked} notification(s) marked as read."}
 
 
 @router.post(
@@ -354,16 +424,9 @@ def get_notifications(
     auth=JWTAuth(),
 )
 def mark_notification_as_read(request, notification_id: int):
-    try:
-        notification = Notification.objects.get(pk=notification_id, user=request.auth)
-        if not notification:
-            return 404, {"message": "Notification does not exist."}
-
-        if not notification.is_read:
-            notification.is_read = True
-            notification.save()
-            return {"message": "Notification marked as read."}
-        else:
-            return {"message": "Notification was already marked as read."}
-    except Exception as e:
-        return 500, {"message": str(e)}
+    if mark_notifications_read(request.auth.id, Q(pk=notification_id)):
+        return {"message": "Notification marked as read."}
+
+    if not Notification.objects.filter(pk=notification_id, user=request.auth).exists():
+        return 404, {"message": "Notification does not exist."}
+    return {"message": "Notification was already marked as read."}
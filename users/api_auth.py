@@ -4,7 +4,6 @@ This file contains the API endpoints related to user management.
 
 from django.conf import settings
 from django.contrib.auth import authenticate, login
-from django.core.mail import send_mail
 from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
 from django.db import IntegrityError
 from django.http import JsonResponse
@@ -18,6 +17,7 @@ from ninja.responses import codes_4xx, codes_5xx
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from myapp.schemas import Message
+from tasks.mail import queue_mail
 from users.models import Reputation, User
 from users.schemas import (
     LogInSchemaIn,
@@ -74,7 +74,7 @@ def signup(request: HttpRequest, payload: UserCreateSchema):
         plain_message = strip_tags(html_content)
 
         # Send email
-        send_mail(
+        queue_mail(
             subject="Activate your account",
             message=plain_message,
             from_email="from@example.com",
@@ -146,7 +146,7 @@ def resend_activation(request: HttpRequest, email: str):
         plain_message = strip_tags(html_content)
 
         # Send email
-        send_mail(
+        queue_mail(
             subject="Activate your account",
             message=plain_message,
             from_email="from@example.com",
@@ -187,6 +187,8 @@ def login_user(request, payload: LogInSchemaIn):
 
     # Generate JWT tokens
     refresh = RefreshToken.for_user(user)
+    # Lets authenticated requests know the username without loading the user
+    refresh["username"] = user.username
 
     access_token = str(refresh.access_token)
     refresh_token = str(refresh)
@@ -244,7 +246,7 @@ def request_reset(request: HttpRequest, email: str):
     plain_message = strip_tags(html_content)
 
     # Send email
-    send_mail(
+    queue_mail(
         subject="Password Reset Request",
         message=plain_message,
         from_email="from@example.com",
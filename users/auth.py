@@ -1,25 +1,118 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
 from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject, empty
 from ninja.errors import HttpError
 from ninja.security import HttpBearer
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from users.models import INACTIVE_USER_KEY, USER_CACHE_KEY, User
+
+# Stateless, so one instance serves every request
+jwt_authentication = JWTAuthentication()
+
+
+def load_user(user_id: int) -> User:
+    """
+    Return the active user with `user_id`, from the user cache when possible.
+    """
+    key = USER_CACHE_KEY.format(user_id)
+    user = cache.get(key) if settings.AUTH_USER_CACHE_TIMEOUT else None
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None and settings.AUTH_USER_CACHE_TIMEOUT:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    if user is None or not user.is_active:
+        raise HttpError(403, "Authentication failed: Unable to identify user.")
+    return user
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    The user an access token was issued to.
+
+    `id`, `pk` and `username` are read from the token claims, which is all
+    ORM filters, comparisons and most endpoints need. The `User` row is only
+    loaded, through `load_user`, once any other attribute is accessed.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    _meta = User._meta
+
+    def __init__(self, user_id: int, username: str = None):
+        super().__init__(lambda: load_user(user_id))
+        # LazyObject forwards attribute writes to the wrapped user
+        self.__dict__["id"] = user_id
+        if username is not None:
+            self.__dict__["username"] = username
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __getattr__(self, name):
+        # The ORM probes lookup values with hasattr() (resolve_expression,
+        # as_sql, ...), answer for names a `User` can't have without loading
+        if (
+            self._wrapped is empty
+            and name not in ("_state", "_password", "_prefetched_objects_cache")
+            and not hasattr(User, name)
+        ):
+            raise AttributeError(name)
+        return super().__getattr__(name)
+
+    # Report the wrapped class without loading it, so that isinstance() checks
+    # in the ORM and in Model.__eq__ only need the primary key
+    @property
+    def __class__(self):
+        return User
+
+    def __eq__(self, other):
+        if isinstance(other, Model):
+            return other._meta.concrete_model is User and other.pk == self.id
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __bool__(self):
+        return True
+
+
+def get_token_user(token: str):
+    """
+    Validate an access token and return the user it belongs to, either the
+    cached `User` row or a `LazyUser`.
+    """
+    try:
+        validated_token = jwt_authentication.get_validated_token(token)
+        user_id = User._meta.pk.to_python(validated_token[jwt_settings.USER_ID_CLAIM])
+    except TokenError as e:
+        raise HttpError(401, f"Token error: {str(e)}")
+    except (InvalidToken, KeyError):
+        raise HttpError(401, "Your session has expired. Please log in again.")
+
+    row_key = USER_CACHE_KEY.format(user_id)
+    inactive_key = INACTIVE_USER_KEY.format(user_id)
+    cached = cache.get_many([row_key, inactive_key])
+    if cached.get(inactive_key):
+        raise HttpError(403, "Authentication failed: Unable to identify user.")
+    if cached.get(row_key) is not None:
+        return cached[row_key]
+    return LazyUser(user_id, validated_token.get("username"))
 
 
 class JWTAuth(HttpBearer):
     def authenticate(self, request: HttpRequest, token):
-        jwt_authentication = JWTAuthentication()
-        try:
-            validated_token = jwt_authentication.get_validated_token(token)
-            user = jwt_authentication.get_user(validated_token)
-            if user is None:
-                raise HttpError(403, "Authentication failed: Unable to identify user.")
-            return user
-        except TokenError as e:
-            raise HttpError(401, f"Token error: {str(e)}")
-        except InvalidToken:
-            raise HttpError(401, "Your session has expired. Please log in again.")
-        except Exception as e:
-            raise HttpError(500, f"Authentication failed: {str(e)}")
+        return get_token_user(token)
 
 
 # Function-based view to handle partially protected endpoints
@@ -37,17 +130,6 @@ def OptionalJWTAuth(request: HttpRequest):
     if token is None or token == "null":
         return True
 
-    jwt_authentication = JWTAuthentication()
-    try:
-        validated_token = jwt_authentication.get_validated_token(token)
-        user = jwt_authentication.get_user(validated_token)
-        if user is None:
-            raise HttpError(403, "Authentication failed: Unable to identify user.")
-        request.auth = user
-        return user
-    except TokenError as e:
-        raise HttpError(401, f"Token error: {str(e)}")
-    except InvalidToken:
-        raise HttpError(401, "Your session has expired. Please log in again.")
-    except Exception as e:
-        raise HttpError(500, f"Authentication failed: {str(e)}")
+    user = get_token_user(token)
+    request.auth = user
+    return user
@@ -7,16 +7,22 @@ from typing import List, Optional
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.paginator import Paginator
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from ninja import Query, Router
 from ninja.errors import HttpRequest
 
 # Todo: Move the Reaction model to the users app
-from articles.models import Article, Reaction
+from articles.models import Article, Reaction, ReactionTally
 from articles.schemas import ArticleBasicOut, ArticleFilters
+from articles.similarity import similar_articles
 from communities.models import Community
-from myapp.schemas import FilterType, Message
+from myapp.cache import cached_response
+from myapp.pagination import InvalidCursor, paginate_by_cursor
+from myapp.resolvers import get_content_type
+from myapp.schemas import AutocompleteOut, FilterType, Message
+from myapp.search import autocomplete, fuzzy_search
 from posts.models import Post
 from posts.schemas import PaginatedPostsResponse, PostOut
 from users.auth import JWTAuth, OptionalJWTAuth
@@ -43,11 +49,6 @@ Bookmarks API
 """
 
 
-def get_content_type(content_type_value: str) -> ContentType:
-    app_label, model = content_type_value.split(".")
-    return ContentType.objects.get(app_label=app_label, model=model)
-
-
 @router.post(
     "/toggle-bookmark",
     response={200: BookmarkToggleResponseSchema, 400: Message},
@@ -94,7 +95,16 @@ def get_bookmark_status(request, content_type: ContentTypeEnum, object_id: int):
 @router.get("/bookmarks", response=List[BookmarkSchema], auth=JWTAuth())
 def get_bookmarks(request):
     user = request.auth
-    bookmarks = Bookmark.objects.filter(user=user).select_related("content_type")
+    bookmarks = list(Bookmark.objects.filter(user=user).select_related("content_type"))
+    post_type = ContentType.objects.get_for_model(Post)
+    post_tallies = ReactionTally.get_tallies(
+        post_type,
+        [
+            bookmark.object_id
+            for bookmark in bookmarks
+            if bookmark.content_type_id == post_type.id
+        ],
+    )
 
     result = []
     for bookmark in bookmarks:
@@ -125,7 +135,7 @@ def get_bookmarks(request):
                     "type": "Post",
                     "details": (
                         f"Post by {obj.author.username} · "
-                        f"{obj.reactions.filter(vote=1).count()} likes"
+                        f"{post_tallies[obj.id].likes_count} likes"
                     ),
                 }
             )
@@ -136,8 +146,18 @@ def get_bookmarks(request):
 @router.get(
     "/articles/relevant-articles", response=List[ArticleBasicOut], auth=OptionalJWTAuth
 )
-def get_relevant_articles(request, filters: ArticleFilters = Query(...)):
-    queryset = Article.objects.exclude(communityarticle__community__type="hidden")
+def get_relevant_articles(
+    request,
+    filters: ArticleFilters = Query(...),
+    article_id: Optional[int] = Query(None),
+):
+    # If the article_id is invalid, we'll just ignore it and continue with
+    # other filters
+    by_article = bool(article_id) and Article.objects.filter(id=article_id).exists()
+
+    # Neighbours by shared hashtags, precomputed in articles/similarity.py
+    queryset = similar_articles(article_id) if by_article else Article.objects.all()
+    queryset = queryset.exclude(communityarticle__community__type="hidden")
 
     if filters.community_id:
         queryset = queryset.filter(
@@ -145,36 +165,10 @@ def get_relevant_articles(request, filters: ArticleFilters = Query(...)):
             communityarticle__community__type__ne="hidden",
         )
 
-    if filters.article_id:
-        try:
-            base_article = Article.objects.get(id=filters.article_id)
-            base_keywords = set(
-                HashtagRelation.objects.filter(
-                    content_type=ContentType.objects.get_for_model(Article),
-                    object_id=base_article.id,
-                ).values_list("hashtag__name", flat=True)
-            )
-
-            queryset = queryset.exclude(
-                id=filters.article_id
-            )  # Exclude the base article
-            queryset = queryset.annotate(
-                relevance_score=Count(
-                    "hashtagrelation",
-                    filter=Q(hashtagrelation__hashtag__name__in=base_keywords),
-                )
-            )
-            queryset = queryset.filter(relevance_score__gt=0)
-            queryset = queryset.order_by("-relevance_score", "-created_at")
-        except Article.DoesNotExist:
-            # If the article_id is invalid, we'll just ignore it
-            # and continue with other filters
-            pass
-
+    if by_article:
+        pass  # Already ordered from the most similar
     elif filters.filter_type == FilterType.POPULAR:
-        queryset = queryset.annotate(
-            popularity_score=Count("reviews") + Count("discussions")
-        ).order_by("-popularity_score")
+        queryset = queryset.order_by("-hot_score", "-id")
     elif filters.filter_type == FilterType.RECENT:
         queryset = queryset.order_by("-created_at")
     elif filters.filter_type == FilterType.RELEVANT:
@@ -202,6 +196,7 @@ Reaction API (Like/Dislike)
     response={200: Message, 400: Message},
     auth=JWTAuth(),
 )
+@transaction.atomic
 def post_reaction(request, reaction: ReactionIn):
     content_type = get_content_type(reaction.content_type.value)
 
@@ -256,23 +251,22 @@ def post_reaction(request, reaction: ReactionIn):
 def get_reaction_count(request, content_type: ContentTypeEnum, object_id: int):
     content_type = get_content_type(content_type.value)
 
-    reactions = Reaction.objects.filter(content_type=content_type, object_id=object_id)
-
-    likes = reactions.filter(vote=VoteEnum.LIKE.value).count()
-    dislikes = reactions.filter(vote=VoteEnum.DISLIKE.value).count()
+    tally = ReactionTally.get_tallies(content_type, [object_id])[object_id]
 
     # Check if the authenticated user is the author
     current_user: Optional[User] = None if not request.auth else request.auth
     user_reaction = None
 
     if current_user:
-        user_reaction_obj = reactions.filter(user=current_user).first()
+        user_reaction_obj = Reaction.objects.filter(
+            content_type=content_type, object_id=object_id, user=current_user
+        ).first()
         if user_reaction_obj:
             user_reaction = VoteEnum(user_reaction_obj.vote)
 
     return ReactionCountOut(
-        likes=likes,
-        dislikes=dislikes,
+        likes=tally.likes_count,
+        dislikes=tally.dislikes_count,
         user_reaction=user_reaction,
     )
 
@@ -282,13 +276,15 @@ Hashtags API
 """
 
 
-@router.get("/hashtags/", response=PaginatedHashtagOut)
+@router.get("/hashtags/", response={200: PaginatedHashtagOut, 400: Message})
+@cached_response("hashtags", families=["hashtags"])
 def get_hashtags(
     request,
     sort: SortEnum = Query(SortEnum.POPULAR),
     search: str = Query(None),
     page: int = Query(1),
     per_page: int = Query(20),
+    cursor: Optional[str] = Query(None),
 ):
     """
     Get a list of hashtags from the database.
@@ -296,7 +292,7 @@ def get_hashtags(
     hashtags = Hashtag.objects.annotate(count=Count("hashtagrelation"))
 
     if search:
-        hashtags = hashtags.filter(name__icontains=search)
+        hashtags = fuzzy_search(hashtags, ["name"], search)
 
     if sort == SortEnum.POPULAR:
         hashtags = hashtags.order_by("-count", "name")
@@ -305,6 +301,23 @@ def get_hashtags(
     else:  # ALPHABETICAL
         hashtags = hashtags.order_by("name")
 
+    # Rank search results by similarity, the requested sort breaks ties
+    if search:
+        hashtags = hashtags.order_by("-search_similarity", *hashtags.query.order_by)
+
+    if cursor is not None:
+        try:
+            cursor_page = paginate_by_cursor(hashtags, cursor, per_page)
+        except InvalidCursor as e:
+            return 400, {"message": str(e)}
+
+        return PaginatedHashtagOut(
+            items=[HashtagOut(name=h.name, count=h.count) for h in cursor_page.items],
+            per_page=per_page,
+            next_cursor=cursor_page.next_cursor,
+            prev_cursor=cursor_page.prev_cursor,
+        )
+
     paginator = Paginator(hashtags, per_page)
     page_obj = paginator.get_page(page)
 
@@ -317,6 +330,18 @@ def get_hashtags(
     )
 
 
+@router.get("/hashtags/autocomplete", response=List[AutocompleteOut])
+def autocomplete_hashtags(
+    request,
+    search: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+):
+    return [
+        AutocompleteOut(id=hashtag.id, name=hashtag.name)
+        for hashtag in autocomplete(Hashtag.objects.all(), "name", search, limit)
+    ]
+
+
 # Todo: Delete this API endpoint
 @router.get("/my-posts", response=PaginatedPostsResponse, auth=JWTAuth())
 def list_my_posts(
@@ -347,10 +372,10 @@ def list_my_posts(
     order_prefix = "-" if sort_order == "desc" else ""
     posts = posts.order_by(f"{order_prefix}{sort_by}")
 
-    paginator = Paginator(posts, size)
+    paginator = Paginator(posts.select_related("author"), size)
     page_obj = paginator.get_page(page)
     return PaginatedPostsResponse(
-        items=[PostOut.resolve_post(post, user) for post in page_obj],
+        items=PostOut.resolve_posts(page_obj, user),
         total=paginator.count,
         page=page,
         size=size,
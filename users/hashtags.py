@@ -0,0 +1,63 @@
+"""
+Hashtag synchronization for articles, posts, communities and users
+"""
+
+from typing import Iterable, List
+
+from django.db import models, transaction
+
+from myapp.resolvers import get_content_type_id, get_hashtag_ids
+from users.models import HashtagRelation, hashtags_synced
+
+
+def normalize_hashtags(names: Iterable[str]) -> List[str]:
+    """
+    Lowercase and strip `names`, dropping blanks and duplicates while keeping
+    the original order.
+    """
+    return list(dict.fromkeys(name.strip().lower() for name in names if name.strip()))
+
+
+@transaction.atomic
+def sync_hashtags(obj: models.Model, names: Iterable[str]) -> None:
+    """
+    Make `names` the exact set of hashtags attached to `obj`.
+
+    Missing hashtags are created and only the relations that changed are
+    inserted or deleted, in a fixed number of queries regardless of how many
+    tags are involved. The bulk writes skip the per-row model signals, so a
+    single `hashtags_synced` signal is sent instead when anything changed.
+    """
+    model = obj._meta.model
+    content_type_id = get_content_type_id(model)
+    wanted = list(get_hashtag_ids(normalize_hashtags(names)).values())
+
+    relations = HashtagRelation.objects.filter(
+        content_type_id=content_type_id, object_id=obj.pk
+    )
+    existing = set(relations.values_list("hashtag_id", flat=True))
+    stale = existing.difference(wanted)
+    if stale:
+        # delete() would send post_delete for every row, each refreshing the
+        # article search vector and bumping the hashtag caches, which the
+        # single `hashtags_synced` below already does. Nothing cascades from
+        # HashtagRelation, so a plain DELETE is all it takes.
+        stale_relations = relations.filter(hashtag_id__in=stale)
+        stale_relations._raw_delete(stale_relations.db)
+
+    # Keep the order of `names`, relations are listed by id
+    added = [hashtag_id for hashtag_id in wanted if hashtag_id not in existing]
+    if added:
+        HashtagRelation.objects.bulk_create(
+            [
+                HashtagRelation(
+                    hashtag_id=hashtag_id,
+                    content_type_id=content_type_id,
+                    object_id=obj.pk,
+                )
+                for hashtag_id in added
+            ]
+        )
+
+    if stale or added:
+        hashtags_synced.send(sender=model, instance=obj)
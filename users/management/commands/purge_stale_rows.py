@@ -0,0 +1,165 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from communities.models import Invitation, JoinRequest
+from myapp.cache import bump_cache_version
+from users.models import Notification, NotificationCounter
+
+# Lifetime of the signed link in invitation emails, see
+# `respond_to_email_invitation`
+EMAIL_INVITATION_MAX_AGE = timedelta(seconds=345600)
+
+
+def lock_counters(ids):
+    # Taken before the notifications themselves, in the order of
+    # `mark_notifications_read`, which counts a user's unread notifications
+    # under this lock before marking them. Both would otherwise subtract the
+    # same rows from the counters.
+    list(
+        NotificationCounter.objects.select_for_update()
+        .filter(user_id__in=Notification.objects.filter(pk__in=ids).values("user_id"))
+        .order_by("user_id", "id")
+        .values_list("id", flat=True)
+    )
+
+
+def forget_unread(rows):
+    # The raw delete skips the receivers that maintain the unread counters
+    NotificationCounter.shift(
+        {
+            key: -count
+            for key, count in Counter(
+                (row["user_id"], row["category"]) for row in rows if not row["is_read"]
+            ).items()
+        }
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired notifications, old rejected join requests and old "
+        "invitations in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Age after which rejected join requests and answered "
+            "invitations are deleted.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to pause between batches.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options["days"])
+
+        targets = [
+            (
+                "expired notifications",
+                Notification.objects.filter(expires_at__lte=now),
+                ["user_id", "category", "is_read"],
+                lock_counters,
+                forget_unread,
+            ),
+            (
+                "rejected join requests",
+                JoinRequest.objects.filter(
+                    status=JoinRequest.REJECTED, rejection_timestamp__lt=cutoff
+                ),
+                [],
+                None,
+                None,
+            ),
+            (
+                "invitations",
+                Invitation.objects.filter(
+                    Q(
+                        invited_at__lt=cutoff,
+                        status__in=[Invitation.ACCEPTED, Invitation.REJECTED],
+                    )
+                    | Q(
+                        email__isnull=False,
+                        status=Invitation.PENDING,
+                        invited_at__lt=now - EMAIL_INVITATION_MAX_AGE,
+                    )
+                ),
+                [],
+                None,
+                None,
+            ),
+        ]
+
+        for label, queryset, fields, lock, on_delete in targets:
+            started = time.monotonic()
+            deleted = self.purge(queryset, fields, lock, on_delete, options)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Deleted {deleted} {label} in {elapsed:.1f}s "
+                    f"({deleted / elapsed if elapsed else 0:.0f} rows/s)."
+                )
+            )
+            if deleted and queryset.model is JoinRequest:
+                bump_cache_version("communities")
+
+    def purge(self, queryset, fields, lock, on_delete, options) -> int:
+        """
+        Delete the rows of `queryset` in id order, one short transaction per
+        batch. Every batch is committed on its own, so an interrupted run is
+        simply picked up by the next one. `lock(ids)` runs before the rows of
+        a batch are locked and read.
+        """
+        deleted = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    queryset.filter(id__gt=last_id)
+                    .order_by("id")
+                    .values_list("id", flat=True)[: options["batch_size"]]
+                )
+                if not ids:
+                    break
+                if lock is not None:
+                    lock(ids)
+                rows = list(
+                    queryset.select_for_update()
+                    .filter(pk__in=ids)
+                    .order_by("id")
+                    .values("id", *fields)
+                )
+
+                # Nothing references these tables, so the rows can be deleted
+                # without collecting them for cascades and signals first
+                batch = queryset.model.objects.filter(
+                    pk__in=[row["id"] for row in rows]
+                )
+                deleted += batch._raw_delete(batch.db)
+                if on_delete is not None:
+                    on_delete(rows)
+
+            last_id = ids[-1]
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"  {deleted} {queryset.model.__name__} rows deleted")
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        return deleted
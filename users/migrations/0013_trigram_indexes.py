@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-16 23:47
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    AddIndex that is skipped on databases without trigram operator classes.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0012_alter_notification_notification_type'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddPostgresIndex(
+            model_name='hashtag',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='hashtag_name_trgm'),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='gin_trgm_ops'), name='user_username_trgm'),
+        ),
+    ]
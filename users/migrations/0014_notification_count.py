@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Notification = apps.get_model('users', 'Notification')
+    NotificationCounter = apps.get_model('users', 'NotificationCounter')
+
+    rows = (
+        Notification.objects.filter(is_read=False)
+        .order_by()
+        .values('user_id', 'category')
+        .annotate(unread_count=Count('id'))
+    )
+    NotificationCounter.objects.bulk_create((NotificationCounter(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0019_article_search_vector'),
+        ('communities', '0009_trigram_indexes'),
+        ('posts', '0002_comment_is_deleted_post_is_deleted'),
+        ('users', '0014_notification_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=20)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'category'], name='notification_user_unread'),
+        ),
+        migrations.AddField(
+            model_name='notificationcounter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='notificationcounter',
+            unique_together={('user', 'category')},
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
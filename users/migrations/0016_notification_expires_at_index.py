@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0019_article_search_vector'),
+        ('communities', '0009_trigram_indexes'),
+        ('posts', '0002_comment_is_deleted_post_is_deleted'),
+        ('users', '0015_notification_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at'], name='notification_expires_at'),
+        ),
+    ]
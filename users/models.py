@@ -2,15 +2,28 @@
 Holds the User model and UserManager class.
 """
 
-from typing import Literal, Optional, Tuple
+from collections import defaultdict
+from typing import Dict, Literal, Optional, Tuple
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
-from django.db.models import Sum
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest, Upper
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
 from django.utils.timezone import now, timedelta
 from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from myapp.cache import bump_cache_version
+
+# Cached `User` rows and deactivation markers read by users/auth.py
+USER_CACHE_KEY = "auth-user:{}"
+INACTIVE_USER_KEY = "auth-user:{}:inactive"
 
 
 class UserManager(BaseUserManager):
@@ -65,6 +78,12 @@ class User(AbstractUser):
 
     class Meta:
         db_table = "user"
+        indexes = [
+            GinIndex(
+                OpClass(Upper("username"), name="gin_trgm_ops"),
+                name="user_username_trgm",
+            )
+        ]
 
     def __int__(self) -> int:
         return self.id
@@ -105,6 +124,8 @@ class Notification(models.Model):
     content = models.TextField(blank=True, null=True)
     link = models.URLField(blank=True, null=True)
     is_read = models.BooleanField(default=False)
+    # Number of unread events coalesced into this notification
+    count = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
 
@@ -115,13 +136,83 @@ class Notification(models.Model):
             f"{self.message}"
         )
 
+    class Meta:
+        indexes = [
+            # Newest first listing, see `get_notifications`
+            models.Index(
+                fields=["user", "-created_at", "-id"], name="notification_user_created"
+            ),
+            models.Index(
+                fields=["user", "category"],
+                condition=Q(is_read=False),
+                name="notification_user_unread",
+            ),
+            # Expired notifications, see `purge_stale_rows`
+            models.Index(
+                fields=["expires_at"],
+                condition=Q(expires_at__isnull=False),
+                name="notification_expires_at",
+            ),
+        ]
+
     def set_expiration(self, days: int):
         self.expires_at = now() + timedelta(days=days)
 
 
+class NotificationCounter(models.Model):
+    """
+    Running number of unread notifications per user and category, kept in
+    sync by the receivers at the bottom of this module and by the bulk
+    writes in users/notifications.py.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.CharField(max_length=20)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "category")
+
+    def __str__(self):
+        return f"{self.user_id} {self.category}: {self.unread_count} unread"
+
+    @classmethod
+    def shift(cls, deltas: Dict[Tuple[int, str], int]) -> None:
+        """
+        Atomically shift the unread counts of (user id, category) pairs, e.g.
+        `NotificationCounter.shift({(1, "posts"): 1})`.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        # Only increments create counters, a decrement can come from the
+        # cascade of a user being deleted
+        cls.objects.bulk_create(
+            [
+                cls(user_id=user_id, category=category)
+                for (user_id, category), delta in deltas.items()
+                if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        # One UPDATE per distinct (category, delta), usually a single one
+        grouped = defaultdict(list)
+        for (user_id, category), delta in deltas.items():
+            grouped[category, delta].append(user_id)
+        for (category, delta), user_ids in grouped.items():
+            cls.objects.filter(user_id__in=user_ids, category=category).update(
+                unread_count=Greatest(F("unread_count") + delta, 0)
+            )
+
+
 class Hashtag(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"), name="hashtag_name_trgm"
+            )
+        ]
+
 
 # Genertic HashTag model
 class HashtagRelation(models.Model):
@@ -243,3 +334,60 @@ class Bookmark(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - Bookmark for {self.content_object}"
+
+
+# Sent by users.hashtags.sync_hashtags, which writes the relations of
+# `instance` in bulk without per-row signals
+hashtags_synced = Signal()
+
+
+@receiver(post_save, sender=Hashtag)
+@receiver(post_delete, sender=Hashtag)
+@receiver(post_save, sender=HashtagRelation)
+@receiver(post_delete, sender=HashtagRelation)
+@receiver(hashtags_synced)
+def invalidate_hashtags_cache(sender, **kwargs):
+    # Hashtags are listed on their own and as article keywords, post
+    # hashtags and community tags
+    bump_cache_version("hashtags", "articles", "posts", "communities")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Reputation)
+def invalidate_users_cache(sender, update_fields=None, **kwargs):
+    # Logins only touch `last_login`, which no response shows
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    # Detail responses embed the author's username, picture and reputation
+    bump_cache_version("users")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    def forget():
+        cache.delete(USER_CACHE_KEY.format(instance.pk))
+        if instance.is_active and kwargs["signal"] is post_save:
+            cache.delete(INACTIVE_USER_KEY.format(instance.pk))
+        else:
+            # Lazily authenticated requests never load the row, so the
+            # marker has to outlive every access token issued before
+            cache.set(
+                INACTIVE_USER_KEY.format(instance.pk),
+                True,
+                jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+            )
+
+    transaction.on_commit(forget)
+
+
+@receiver(post_save, sender=Notification)
+def count_created_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        NotificationCounter.shift({(instance.user_id, instance.category): 1})
+
+
+@receiver(post_delete, sender=Notification)
+def count_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        NotificationCounter.shift({(instance.user_id, instance.category): -1})
@@ -0,0 +1,193 @@
+"""
+Notification fan-out
+
+`notify` sends one notification to many users with chunked bulk inserts and
+can coalesce repeated events into the recipient's unread notification.
+`notify_community` targets everyone holding some roles in a community and
+hands large audiences over to the task worker.
+"""
+
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Count, F, Q, Value
+from django.db.models.functions import Cast, Replace
+from django.utils.timezone import now, timedelta
+
+from communities.models import Community
+from communities.roles import ADMIN, ROLE_TABLES
+from tasks.queue import enqueue, task
+from users.models import Notification, NotificationCounter
+
+# Rows per INSERT, and recipients per coalescing lookup
+NOTIFICATION_BATCH_SIZE = 1000
+
+# Notifications describing the same event, see `notify`
+COALESCE_FIELDS = ("notification_type", "community_id", "article_id", "post_id", "link")
+
+
+def _chunks(items: Iterable, size: int):
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _normalize_fields(fields: Dict) -> Dict:
+    # Related objects are stored by id so that the fields can be queued
+    for name in ("community", "article", "post"):
+        if name in fields:
+            related = fields.pop(name)
+            fields[f"{name}_id"] = related.pk if related is not None else None
+    return fields
+
+
+@transaction.atomic
+def create_notifications(notifications: Iterable[Notification]) -> int:
+    """
+    Insert prepared notifications, NOTIFICATION_BATCH_SIZE rows per query.
+    """
+    created = 0
+    for chunk in _chunks(notifications, NOTIFICATION_BATCH_SIZE):
+        Notification.objects.bulk_create(chunk)
+        created += len(chunk)
+        # bulk_create() skips the receivers that count single notifications
+        deltas = Counter(
+            (notification.user_id, notification.category)
+            for notification in chunk
+            if not notification.is_read
+        )
+        NotificationCounter.shift(deltas)
+    return created
+
+
+@transaction.atomic
+def notify(user_ids: Iterable[int], coalesce: Optional[str] = None, **fields) -> int:
+    """
+    Send the notification described by `fields` to every user in `user_ids`,
+    returning the number of users notified.
+
+    With `coalesce`, a user who still has an unread notification for the same
+    event (type, community, article, post and link) from the last
+    NOTIFICATION_COALESCE_SECONDS gets that one bumped instead of a new one:
+    its count goes up and its message becomes `coalesce`, with "{count}"
+    replaced by the new count.
+    """
+    fields = _normalize_fields(fields)
+    user_ids = [user_id for user_id in dict.fromkeys(user_ids) if user_id is not None]
+
+    notified = 0
+    for chunk in _chunks(user_ids, NOTIFICATION_BATCH_SIZE):
+        coalesced = {}
+        if coalesce is not None:
+            coalesced = dict(
+                Notification.objects.filter(
+                    user_id__in=chunk,
+                    is_read=False,
+                    created_at__gte=now()
+                    - timedelta(seconds=settings.NOTIFICATION_COALESCE_SECONDS),
+                    **{name: fields.get(name) for name in COALESCE_FIELDS},
+                ).values_list("user_id", "id")
+            )
+            if coalesced:
+                count = F("count") + 1
+                Notification.objects.filter(pk__in=coalesced.values()).update(
+                    count=count,
+                    message=Replace(
+                        Value(coalesce), Value("{count}"), Cast(count, CharField())
+                    ),
+                    content=fields.get("content"),
+                    created_at=now(),
+                )
+
+        notified += len(coalesced) + create_notifications(
+            Notification(user_id=user_id, **fields)
+            for user_id in chunk
+            if user_id not in coalesced
+        )
+    return notified
+
+
+def get_role_holders(
+    community_id: int, roles: Sequence[str], limit: Optional[int] = None
+) -> List[int]:
+    """
+    Return the ids of the users holding any of `roles` in the community.
+    """
+    queries = [
+        ROLE_TABLES[role]
+        .objects.filter(community_id=community_id)
+        .values_list("user_id", flat=True)
+        for role in roles
+    ]
+    # UNION also drops users holding several of the roles
+    user_ids = queries[0].union(*queries[1:]) if len(queries) > 1 else queries[0]
+    if limit is not None:
+        user_ids = user_ids[:limit]
+    return list(user_ids)
+
+
+@task(max_attempts=3, concurrency=2)
+def fan_out_notification(
+    community_id: int, roles: List[str], coalesce: Optional[str], fields: Dict
+) -> None:
+    notify(get_role_holders(community_id, roles), coalesce=coalesce, **fields)
+
+
+def notify_community(
+    community: Community,
+    roles: Sequence[str] = (ADMIN,),
+    coalesce: Optional[str] = None,
+    **fields,
+) -> None:
+    """
+    Notify everyone holding any of `roles` in `community`, see `notify`.
+
+    Audiences over NOTIFICATION_INLINE_LIMIT users are notified by the task
+    worker rather than inside the request.
+    """
+    fields = _normalize_fields({"community": community, **fields})
+    limit = settings.NOTIFICATION_INLINE_LIMIT
+    user_ids = get_role_holders(community.pk, roles, limit + 1)
+    if len(user_ids) > limit:
+        enqueue(
+            fan_out_notification,
+            community_id=community.pk,
+            roles=list(roles),
+            coalesce=coalesce,
+            fields=fields,
+        )
+    else:
+        notify(user_ids, coalesce=coalesce, **fields)
+
+
+@transaction.atomic
+def mark_notifications_read(user_id: int, condition: Q = Q()) -> int:
+    """
+    Mark the user's unread notifications matching `condition` as read with a
+    single UPDATE, returning how many were marked.
+    """
+    # Concurrent calls for the same user wait here, so that a notification
+    # is never subtracted from the counters twice
+    list(
+        NotificationCounter.objects.select_for_update()
+        .filter(user_id=user_id)
+        .values_list("id", flat=True)
+    )
+    unread = Notification.objects.filter(condition, user_id=user_id, is_read=False)
+    marked = dict(
+        unread.order_by()
+        .values("category")
+        .annotate(marked=Count("id"))
+        .values_list("category", "marked")
+    )
+    if not marked:
+        return 0
+
+    unread.update(is_read=True)
+    NotificationCounter.shift(
+        {(user_id, category): -count for category, count in marked.items()}
+    )
+    return sum(marked.values())
@@ -5,7 +5,7 @@ and other user-related actions.
 
 from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from django.contrib.contenttypes.models import ContentType
 from ninja import ModelSchema, Schema
@@ -213,6 +213,27 @@ class NotificationSchema(Schema):
     expiresAt: datetime | None
 
 
+class PaginatedNotificationSchema(Schema):
+    items: List[NotificationSchema]
+    per_page: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class UnreadNotificationCountSchema(Schema):
+    total: int
+    categories: Dict[str, int]
+
+
+class MarkNotificationsReadSchema(Schema):
+    # All given filters must match, none at all marks every notification
+    ids: Optional[List[int]] = None
+    # A cursor from `GET /notifications`, marks that notification and all
+    # older ones
+    before: Optional[str] = None
+    category: Optional[str] = None
+
+
 """
 Reaction Schemas
 """
@@ -271,10 +292,12 @@ class HashtagOut(Schema):
 
 class PaginatedHashtagOut(Schema):
     items: List[HashtagOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 """